@@ -0,0 +1,416 @@
+"""
+Archival of cold data to Parquet files.
+
+Rows older than the retention horizon are moved from the database to one
+compressed Parquet file per table and day:
+
+    IHR_ARCHIVE_DIR/<db_table>/<YYYY-MM-DD>.parquet
+
+Columns of archived files are the model attnames (e.g. asn_id), so archived
+rows can be turned back into (unsaved) model instances and serialized like
+rows fetched from the database. Files archived before prefix statuses were
+stored as codes have status names (e.g. rpki_status), they are converted to
+codes when read. Archived days are always the oldest ones,
+the boundary between archived and hot data is the day following the last
+archived file.
+"""
+import itertools
+import os
+from datetime import datetime, time, timedelta, timezone
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connection, transaction
+
+from .dimensions import atlas_locations, prefix_statuses
+from .querycache import bump_version
+from .ingest import natural_key
+from .models import Atlas_location, Prefix_status, Hegemony, Hegemony_prefix, Atlas_delay
+
+ARCHIVE_DIR = getattr(settings, 'IHR_ARCHIVE_DIR', os.path.join(settings.BASE_DIR, 'archive'))
+# Number of days of data kept in the database
+RETENTION_DAYS = getattr(settings, 'IHR_RETENTION_DAYS', 365)
+COMPRESSION = 'zstd'
+# Rows fetched from the database and written per Parquet row group
+FETCH_SIZE = 100000
+
+ARCHIVED_MODELS = {
+    'hegemony': Hegemony,
+    'hegemony_prefix': Hegemony_prefix,
+    'atlas_delay': Atlas_delay,
+}
+
+# table -> (directory mtime, first and last archived days)
+_ranges = {}
+
+
+def table_dir(model):
+    return os.path.join(ARCHIVE_DIR, model._meta.db_table)
+
+
+def day_path(model, day):
+    return os.path.join(table_dir(model), '{}.parquet'.format(day.isoformat()))
+
+
+def day_start(day):
+    return datetime.combine(day, time(), tzinfo=timezone.utc)
+
+
+def archived_days(model):
+    """Return the sorted list of archived days"""
+    try:
+        names = os.listdir(table_dir(model))
+    except FileNotFoundError:
+        return []
+
+    days = []
+    for name in names:
+        if name.endswith('.parquet'):
+            try:
+                days.append(datetime.strptime(name[:-len('.parquet')], '%Y-%m-%d').date())
+            except ValueError:
+                continue
+    return sorted(days)
+
+
+def archived_range(model):
+    """
+    Return the first and last archived days of the given model, or None if
+    nothing is archived.
+    """
+    table = model._meta.db_table
+    try:
+        mtime = os.stat(table_dir(model)).st_mtime
+    except FileNotFoundError:
+        return None
+
+    # The directory is listed again only when files are added or removed
+    cached = _ranges.get(table)
+    if cached is None or cached[0] != mtime:
+        days = archived_days(model)
+        cached = (mtime, (days[0], days[-1]) if days else None)
+        _ranges[table] = cached
+
+    return cached[1]
+
+
+def boundary(model):
+    """
+    Return the first timebin stored in the database for the given model,
+    older data is in the archive. Return None if nothing is archived.
+    """
+    days = archived_range(model)
+    if days is None:
+        return None
+    return day_start(days[1] + timedelta(days=1))
+
+
+############ Reading ##########
+# django-filter lookups evaluated by pyarrow while reading files
+PARQUET_OPERATORS = {'exact': '==', 'in': 'in', 'lte': '<=', 'gte': '>=', 'lt': '<', 'gt': '>'}
+
+
+class TooManyRows(Exception):
+    """More archived rows match a query than allowed"""
+
+    def __init__(self, nb_rows):
+        super().__init__(nb_rows)
+        self.nb_rows = nb_rows
+
+
+def parquet_filter(model, field_name, lookup_expr, value):
+    """
+    Return the pyarrow filter of a django-filter lookup, or None if the
+    lookup is only available with filter_frame.
+    """
+    if '__' in field_name or lookup_expr not in PARQUET_OPERATORS:
+        return None
+    if lookup_expr == 'in' and not value:
+        return None
+    return (model._meta.get_field(field_name).attname, PARQUET_OPERATORS[lookup_expr], value)
+
+
+def legacy_status_columns(model, names):
+    """
+    Return the status columns (name -> attname) stored with status names in
+    a file with the given column names
+    """
+    return {field.name: field.attname for field in model._meta.concrete_fields
+            if field.related_model is Prefix_status and field.attname not in names and field.name in names}
+
+
+def convert_statuses(frame, renamed):
+    """Replace status names with their codes in the given columns"""
+    frame = frame.rename(columns=renamed)
+    for attname in renamed.values():
+        codes = {name: prefix_statuses.code(name) for name in frame[attname].unique()}
+        frame[attname] = frame[attname].map(codes)
+    return frame
+
+
+def read_day(model, path, start, end, lookups):
+    """
+    Return the rows of an archived file with a timebin between start and end
+    and matching the given lookups. Lookups on columns are evaluated by
+    pyarrow, so only matching rows are loaded.
+    """
+    import pandas as pd
+    import pyarrow.parquet as pq
+
+    renamed = legacy_status_columns(model, pq.read_schema(path).names)
+
+    pushed = [('timebin', '>=', start), ('timebin', '<=', end)]
+    remaining = []
+    for lookup in lookups:
+        # Status names are converted to codes after reading
+        parquet = None if lookup[0] in renamed else parquet_filter(model, *lookup)
+        if parquet is None:
+            remaining.append(lookup)
+        else:
+            pushed.append(parquet)
+
+    columns = [field.name if field.name in renamed else field.attname
+            for field in model._meta.concrete_fields]
+    frame = pd.read_parquet(path, columns=columns, filters=pushed)
+    if renamed:
+        frame = convert_statuses(frame, renamed)
+
+    for lookup in remaining:
+        frame = filter_frame(frame, model, *lookup)
+    return frame
+
+
+def read(model, start, end, lookups=(), filters=(), max_rows=None):
+    """
+    Return a DataFrame with archived rows of the given model with a timebin
+    between start and end (inclusive) and matching the given lookups
+    ((field_name, lookup_expr, value) tuples) and filters (functions
+    filtering a DataFrame). Raise TooManyRows as soon as more than max_rows
+    rows match.
+    """
+    # pandas (and pyarrow) are only needed to access the archive
+    import pandas as pd
+
+    columns = [field.attname for field in model._meta.concrete_fields]
+    frames = []
+    nb_rows = 0
+    # Only archived days are looked up
+    days = archived_range(model)
+    if days is None:
+        return pd.DataFrame(columns=columns)
+    day = max(start.astimezone(timezone.utc).date(), days[0])
+    last_day = min(end.astimezone(timezone.utc).date(), days[1])
+    while day <= last_day:
+        path = day_path(model, day)
+        if os.path.exists(path):
+            frame = read_day(model, path, start, end, lookups)
+            for filter in filters:
+                frame = filter(frame)
+
+            nb_rows += len(frame)
+            if max_rows is not None and nb_rows > max_rows:
+                raise TooManyRows(nb_rows)
+            frames.append(frame)
+        day += timedelta(days=1)
+
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
+
+
+def frame_column(frame, model, field_name):
+    """
+    Return the Series corresponding to a filter field name. Related lookups
+    are supported only for Atlas locations (e.g. startpoint__name).
+    """
+    parts = field_name.split('__')
+    field = model._meta.get_field(parts[0])
+
+    if len(parts) == 1:
+        return frame[field.attname]
+
+    if field.related_model is Atlas_location and len(parts) == 2:
+        index = ('type', 'name', 'af').index(parts[1])
+        return frame[field.attname].map(lambda id: atlas_locations.get(id)[index])
+
+    raise ValueError('{} is not available for archived data'.format(field_name))
+
+
+def filter_frame(frame, model, field_name, lookup_expr, value):
+    """Apply a django-filter lookup to a DataFrame"""
+    column = frame_column(frame, model, field_name)
+
+    if lookup_expr == 'exact':
+        mask = column == value
+    elif lookup_expr == 'in':
+        mask = column.isin(value)
+    elif lookup_expr == 'lte':
+        mask = column <= value
+    elif lookup_expr == 'gte':
+        mask = column >= value
+    elif lookup_expr == 'lt':
+        mask = column < value
+    elif lookup_expr == 'gt':
+        mask = column > value
+    elif lookup_expr == 'contains':
+        mask = column.str.contains(value, regex=False)
+    elif lookup_expr == 'icontains':
+        mask = column.str.lower().str.contains(value.lower(), regex=False)
+    else:
+        raise ValueError('Lookup {} is not available for archived data'.format(lookup_expr))
+
+    return frame[mask]
+
+
+def sort_frame(frame, model, ordering):
+    """Sort a DataFrame as the given ordering of a queryset"""
+    columns, ascending = [], []
+    for field in ordering:
+        try:
+            columns.append(model._meta.get_field(field.lstrip('-')).attname)
+        except FieldDoesNotExist:
+            continue
+        ascending.append(not field.startswith('-'))
+
+    if not columns:
+        return frame
+    return frame.sort_values(columns, ascending=ascending, kind='mergesort', ignore_index=True)
+
+
+def to_instances(model, frame):
+    """Return unsaved model instances for the rows of the DataFrame"""
+    columns = list(frame.columns)
+    return [model(**dict(zip(columns, row))) for row in frame.itertuples(index=False, name=None)]
+
+
+class FrameInstances:
+    """
+    Sequence of the model instances of a DataFrame, instances are created
+    only for the requested slice (e.g. a page of results).
+    """
+
+    def __init__(self, model, frame):
+        self.model = model
+        self.frame = frame
+
+    def __len__(self):
+        return len(self.frame)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return to_instances(self.model, self.frame.iloc[index])
+        return to_instances(self.model, self.frame.iloc[[index]])[0]
+
+
+############ Archiving ##########
+def write_day(model, day, batches):
+    """
+    Write the rows of one day, given as DataFrames written as separate row
+    groups, merged with the existing file if any. Return the number of given
+    rows.
+    """
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    path = day_path(model, day)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    nb_rows = None
+    if os.path.exists(path):
+        # Rows already archived by an interrupted run, merged in memory
+        archived = pd.read_parquet(path)
+        renamed = legacy_status_columns(model, archived.columns)
+        if renamed:
+            archived = convert_statuses(archived, renamed)
+        frames = list(batches)
+        nb_rows = sum(len(frame) for frame in frames)
+        frame = pd.concat([archived] + frames, ignore_index=True)
+        batches = [frame.drop_duplicates(subset=natural_key(model), keep='last')]
+
+    # Write to a temporary file so readers never see a partial file
+    tmp_path = path + '.tmp'
+    writer = None
+    written = 0
+    try:
+        for frame in batches:
+            if writer is None:
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                writer = pq.ParquetWriter(tmp_path, table.schema, compression=COMPRESSION)
+            else:
+                table = pa.Table.from_pandas(frame, schema=writer.schema, preserve_index=False)
+            writer.write_table(table)
+            written += len(frame)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is not None:
+        os.replace(tmp_path, path)
+    return written if nb_rows is None else nb_rows
+
+
+def fetch_batches(cursor, columns):
+    """Yield the rows fetched by the cursor as DataFrames of FETCH_SIZE rows"""
+    import pandas as pd
+
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            return
+        yield pd.DataFrame(rows, columns=columns)
+
+
+def archive_day(model, day):
+    """
+    Move the rows of the given day from the database to the archive. Return
+    the number of archived rows.
+    """
+    table = model._meta.db_table
+    columns = [field.column for field in model._meta.concrete_fields]
+    start = day_start(day)
+    end = start + timedelta(days=1)
+
+    with transaction.atomic():
+        # Server-side cursor, rows are fetched and written FETCH_SIZE at a
+        # time
+        with connection.chunked_cursor() as cursor:
+            cursor.execute('SELECT {} FROM {} WHERE timebin >= %s AND timebin < %s'.format(
+                ', '.join(columns), table), [start, end])
+            batches = fetch_batches(cursor, columns)
+            first = next(batches, None)
+            if first is None:
+                return 0
+            nb_rows = write_day(model, day, itertools.chain([first], batches))
+
+        # Rows are deleted only if the file has been written
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM {} WHERE timebin >= %s AND timebin < %s'.format(table),
+                    [start, end])
+
+    return nb_rows
+
+
+def oldest_day(model):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT MIN(timebin) FROM {}'.format(model._meta.db_table))
+        oldest = cursor.fetchone()[0]
+    return oldest.astimezone(timezone.utc).date() if oldest is not None else None
+
+
+def archive(model, retention_days=RETENTION_DAYS):
+    """
+    Archive all days older than retention_days. Yield the archived days and
+    their number of rows.
+    """
+    horizon = datetime.now(timezone.utc).date() - timedelta(days=retention_days)
+    day = oldest_day(model)
+    if day is None:
+        return
+
+    while day < horizon:
+        nb_rows = archive_day(model, day)
+        if nb_rows:
+            bump_version(model._meta.db_table)
+            yield day, nb_rows
+        day += timedelta(days=1)
@@ -0,0 +1,173 @@
+"""
+PostgreSQL backend sharing a pool of persistent connections between the
+threads of a worker.
+
+Django opens a new connection for each request when CONN_MAX_AGE is 0 and
+keeps one connection per thread otherwise. With this backend closing a
+connection rolls back any pending transaction, resets the session (DISCARD
+ALL) and returns it to the pool instead, and new connections are taken
+from the pool, hence the TCP and authentication handshake is paid only once
+per pooled connection. The pool is configured with the POOL entry of the
+database settings:
+
+    'ENGINE': 'ihr.backends.postgresql_pool',
+    'CONN_MAX_AGE': 0,
+    'POOL': {
+        'MAX_IDLE': 10,             # idle connections kept per worker
+        'MAX_AGE': 600,             # seconds before a connection is recycled
+        'CHECK_ON_CHECKOUT': True,  # validate idle connections before reuse
+    },
+"""
+import collections
+import threading
+import time
+
+import psycopg2
+from psycopg2 import extensions
+from django.db.backends.postgresql import base
+
+from ... import metrics
+
+DEFAULT_POOL_SETTINGS = {
+    'MAX_IDLE': 10,
+    'MAX_AGE': 600,
+    'CHECK_ON_CHECKOUT': True,
+}
+
+
+class ConnectionPool:
+    """Pool of idle psycopg2 connections for one database alias"""
+
+    def __init__(self, alias, max_idle, max_age, check_on_checkout):
+        self.alias = alias
+        self.max_idle = max_idle
+        self.max_age = max_age
+        self.check_on_checkout = check_on_checkout
+        # Most recently used connections are at the end
+        self._idle = collections.deque()
+        # Creation time of connections currently in use
+        self._created = {}
+        self._lock = threading.Lock()
+
+    def expired(self, created):
+        return self.max_age is not None and time.monotonic() - created > self.max_age
+
+    def is_valid(self, connection):
+        if connection.closed:
+            return False
+        if not self.check_on_checkout:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except psycopg2.Error:
+            return False
+        return True
+
+    def reset(self, connection):
+        """Reset the session state, DISCARD ALL cannot run in a transaction"""
+        autocommit = connection.autocommit
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute("DISCARD ALL")
+        connection.autocommit = autocommit
+
+    def discard(self, connection, reason):
+        metrics.inc('ihr_db_pool_discarded_total', alias=self.alias, reason=reason)
+        try:
+            connection.close()
+        except psycopg2.Error:
+            pass
+
+    def checkout(self, connect):
+        """Return an idle connection, or a new one created with connect()"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                connection, created = self._idle.pop()
+                metrics.set_gauge('ihr_db_pool_idle', len(self._idle), alias=self.alias)
+
+            if self.expired(created):
+                self.discard(connection, 'expired')
+            elif not self.is_valid(connection):
+                self.discard(connection, 'invalid')
+            else:
+                metrics.inc('ihr_db_pool_checkouts_total', alias=self.alias, result='reused')
+                self._created[id(connection)] = created
+                return connection, True
+
+        connection = connect()
+        metrics.inc('ihr_db_pool_checkouts_total', alias=self.alias, result='created')
+        self._created[id(connection)] = time.monotonic()
+        return connection, False
+
+    def checkin(self, connection):
+        """Return a connection to the pool"""
+        created = self._created.pop(id(connection), time.monotonic())
+
+        if connection.closed:
+            metrics.inc('ihr_db_pool_discarded_total', alias=self.alias, reason='closed')
+            return
+        if self.expired(created):
+            self.discard(connection, 'expired')
+            return
+
+        # Leave no pending transaction or session state (SET parameters,
+        # temporary tables, prepared statements, locks) to the next user of
+        # the connection. Django sets its parameters again on checkout.
+        try:
+            if connection.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+            self.reset(connection)
+        except psycopg2.Error:
+            self.discard(connection, 'broken')
+            return
+
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append((connection, created))
+                metrics.set_gauge('ihr_db_pool_idle', len(self._idle), alias=self.alias)
+                return
+
+        self.discard(connection, 'overflow')
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, settings_dict):
+    with _pools_lock:
+        if alias not in _pools:
+            pool_settings = dict(DEFAULT_POOL_SETTINGS, **settings_dict.get('POOL', {}))
+            _pools[alias] = ConnectionPool(
+                    alias,
+                    pool_settings['MAX_IDLE'],
+                    pool_settings['MAX_AGE'],
+                    pool_settings['CHECK_ON_CHECKOUT'],
+                    )
+        return _pools[alias]
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict)
+
+    def get_new_connection(self, conn_params):
+        connection, reused = self.pool.checkout(
+                lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+
+        if reused:
+            # Done by get_new_connection for new connections
+            options = self.settings_dict['OPTIONS']
+            self.isolation_level = options.get('isolation_level', connection.isolation_level)
+
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.checkin(self.connection)
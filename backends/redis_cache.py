@@ -0,0 +1,381 @@
+"""
+Redis cache backend shared by all workers, with value compression and keys
+sharded over several Redis instances.
+
+Keys are assigned to instances with a consistent hash ring, so adding or
+removing an instance moves only the keys of that instance. Values are
+pickled and compressed with zlib when larger than COMPRESS_MIN_LENGTH bytes;
+integers are stored as plain Redis integers so incr() is atomic.
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'ihr.backends.redis_cache.RedisCache',
+            'LOCATION': ['redis://127.0.0.1:6379/1', 'redis://127.0.0.1:6380/1'],
+            'OPTIONS': {
+                'COMPRESS_MIN_LENGTH': 1024,    # bytes
+                'COMPRESS_LEVEL': 6,
+                'MAX_CONNECTIONS': 50,          # per instance and worker
+            },
+        },
+    }
+
+clear() flushes the Redis databases of the cache, they should not be used for
+anything else. The CLIENT_CLASS option replaces redis.Redis, e.g. with
+LocalRedis, an in-process stand-in used by tests.
+"""
+import bisect
+import functools
+import hashlib
+import logging
+import pickle
+import threading
+import time
+import zlib
+
+import redis
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.module_loading import import_string
+
+from .. import metrics
+
+logger = logging.getLogger(__name__)
+
+# Markers of encoded values, plain integers have no marker
+PICKLED = b'p'
+COMPRESSED = b'z'
+
+# Number of points of each instance on the hash ring
+RING_REPLICAS = 160
+
+
+def ring_hash(value):
+    return int(hashlib.md5(value.encode('utf-8')).hexdigest()[:16], 16)
+
+
+class HashRing:
+    """Consistent hash ring mapping keys to nodes"""
+
+    def __init__(self, nodes, replicas=RING_REPLICAS):
+        points = sorted(
+                (ring_hash('{}-{}'.format(node, i)), node)
+                for node in nodes for i in range(replicas)
+                )
+        self._hashes = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def get_node(self, key):
+        index = bisect.bisect(self._hashes, ring_hash(key)) % len(self._hashes)
+        return self._nodes[index]
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def shared_client(client_class, location, max_connections):
+    """Return the client of an instance, shared by all threads of the worker"""
+    with _clients_lock:
+        key = (client_class, location)
+        if key not in _clients:
+            _clients[key] = client_class.from_url(location, max_connections=max_connections)
+        return _clients[key]
+
+
+def fail_silently(default=None):
+    """Cache reads and writes behave like misses when Redis is not reachable"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return method(self, *args, **kwargs)
+            except redis.RedisError as e:
+                metrics.inc('ihr_cache_errors_total', operation=method.__name__.lstrip('_'))
+                logger.warning('Cache %s failed: %s', method.__name__.lstrip('_'), e)
+                return default() if callable(default) else default
+        return wrapper
+    return decorator
+
+
+class RedisCache(BaseCache):
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        if isinstance(location, str):
+            location = location.split(',')
+        self._locations = [loc.strip() for loc in location]
+
+        options = params.get('OPTIONS', {})
+        self.compress_min_length = options.get('COMPRESS_MIN_LENGTH', 1024)
+        self.compress_level = options.get('COMPRESS_LEVEL', 6)
+        self.max_connections = options.get('MAX_CONNECTIONS', 50)
+        client_class = options.get('CLIENT_CLASS', redis.Redis)
+        if isinstance(client_class, str):
+            client_class = import_string(client_class)
+        self.client_class = client_class
+
+        self._ring = HashRing(self._locations)
+
+    ############ Sharding ##########
+    def client(self, location):
+        return shared_client(self.client_class, location, self.max_connections)
+
+    def get_client(self, key):
+        """Return the client of the instance storing the given (full) key"""
+        return self.client(self._ring.get_node(key))
+
+    def group_by_client(self, keys):
+        groups = {}
+        for key in keys:
+            groups.setdefault(self._ring.get_node(key), []).append(key)
+        return [(self.client(location), keys) for location, keys in groups.items()]
+
+    ############ Encoding ##########
+    def encode(self, value):
+        if type(value) is int:
+            return str(value).encode()
+
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(data) >= self.compress_min_length:
+            compressed = zlib.compress(data, self.compress_level)
+            if len(compressed) < len(data):
+                return COMPRESSED + compressed
+        return PICKLED + data
+
+    def decode(self, data):
+        marker = data[:1]
+        if marker == COMPRESSED:
+            return pickle.loads(zlib.decompress(data[1:]))
+        if marker == PICKLED:
+            return pickle.loads(data[1:])
+        return int(data)
+
+    def get_ttl(self, timeout=DEFAULT_TIMEOUT):
+        """
+        Return the expiry of a key in milliseconds, None if the key does not
+        expire and 0 if it should not be stored.
+        """
+        if timeout == DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return None
+        return max(0, int(timeout * 1000))
+
+    def count_bytes(self, direction, nb_bytes):
+        metrics.inc('ihr_cache_bytes_total', nb_bytes, direction=direction, endpoint=metrics.endpoint())
+
+    def full_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    ############ Cache API ##########
+    @fail_silently(default=False)
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.full_key(key, version)
+        ttl = self.get_ttl(timeout)
+        if ttl == 0:
+            return False
+        return bool(self.get_client(key).set(key, self.encode(value), px=ttl, nx=True))
+
+    def get(self, key, default=None, version=None):
+        key = self.full_key(key, version)
+        data = self._get(key)
+        if data is None:
+            return default
+        self.count_bytes('read', len(data))
+        return self.decode(data)
+
+    @fail_silently()
+    def _get(self, key):
+        return self.get_client(key).get(key)
+
+    @fail_silently()
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.full_key(key, version)
+        ttl = self.get_ttl(timeout)
+        client = self.get_client(key)
+        if ttl == 0:
+            client.delete(key)
+        else:
+            data = self.encode(value)
+            self.count_bytes('write', len(data))
+            client.set(key, data, px=ttl)
+
+    @fail_silently(default=False)
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.full_key(key, version)
+        ttl = self.get_ttl(timeout)
+        client = self.get_client(key)
+        if ttl is None:
+            return bool(client.persist(key)) or bool(client.exists(key))
+        if ttl == 0:
+            return bool(client.delete(key))
+        return bool(client.pexpire(key, ttl))
+
+    @fail_silently()
+    def delete(self, key, version=None):
+        key = self.full_key(key, version)
+        self.get_client(key).delete(key)
+
+    @fail_silently(default=dict)
+    def get_many(self, keys, version=None):
+        full_keys = {self.full_key(key, version): key for key in keys}
+        found = {}
+        for client, group in self.group_by_client(full_keys):
+            for key, data in zip(group, client.mget(group)):
+                if data is not None:
+                    self.count_bytes('read', len(data))
+                    found[full_keys[key]] = self.decode(data)
+        return found
+
+    @fail_silently(default=list)
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        ttl = self.get_ttl(timeout)
+        values = {self.full_key(key, version): value for key, value in data.items()}
+        for client, group in self.group_by_client(values):
+            pipeline = client.pipeline(transaction=False)
+            for key in group:
+                if ttl == 0:
+                    pipeline.delete(key)
+                else:
+                    encoded = self.encode(values[key])
+                    self.count_bytes('write', len(encoded))
+                    pipeline.set(key, encoded, px=ttl)
+            pipeline.execute()
+        return []
+
+    @fail_silently()
+    def delete_many(self, keys, version=None):
+        for client, group in self.group_by_client(self.full_key(key, version) for key in keys):
+            client.delete(*group)
+
+    @fail_silently(default=False)
+    def has_key(self, key, version=None):
+        key = self.full_key(key, version)
+        return bool(self.get_client(key).exists(key))
+
+    def incr(self, key, delta=1, version=None):
+        key = self.full_key(key, version)
+        client = self.get_client(key)
+        if not client.exists(key):
+            raise ValueError("Key '%s' not found" % key)
+        try:
+            return client.incrby(key, delta)
+        except redis.ResponseError:
+            # Not stored as an integer
+            value = self.decode(client.get(key)) + delta
+            client.set(key, self.encode(value), keepttl=True)
+            return value
+
+    def clear(self):
+        for location in self._locations:
+            self.client(location).flushdb()
+
+
+class LocalRedis:
+    """
+    In-process stand-in for the subset of redis.Redis used by RedisCache.
+    Clients created with the same URL share their data.
+    """
+    _databases = {}
+    _lock = threading.Lock()
+
+    def __init__(self, url='redis://localhost/0'):
+        with self._lock:
+            # key -> (value, expiry as time.monotonic() or None)
+            self._data = self._databases.setdefault(url, {})
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        return cls(url)
+
+    def _get(self, name):
+        item = self._data.get(name)
+        if item is not None and item[1] is not None and item[1] <= time.monotonic():
+            del self._data[name]
+            return None
+        return item
+
+    def get(self, name):
+        with self._lock:
+            item = self._get(name)
+            return item[0] if item is not None else None
+
+    def mget(self, keys, *args):
+        return [self.get(name) for name in list(keys) + list(args)]
+
+    def set(self, name, value, px=None, nx=False, keepttl=False):
+        if isinstance(value, int):
+            value = str(value).encode()
+        with self._lock:
+            item = self._get(name)
+            if nx and item is not None:
+                return None
+            if keepttl and item is not None:
+                expiry = item[1]
+            else:
+                expiry = time.monotonic() + px / 1000 if px is not None else None
+            self._data[name] = (value, expiry)
+            return True
+
+    def delete(self, *names):
+        with self._lock:
+            return sum(self._data.pop(name, None) is not None for name in names)
+
+    def exists(self, *names):
+        with self._lock:
+            return sum(self._get(name) is not None for name in names)
+
+    def incrby(self, name, amount=1):
+        with self._lock:
+            item = self._get(name)
+            try:
+                value = int(item[0]) + amount if item is not None else amount
+            except ValueError:
+                raise redis.ResponseError('value is not an integer or out of range')
+            self._data[name] = (str(value).encode(), item[1] if item is not None else None)
+            return value
+
+    def pexpire(self, name, time_ms):
+        with self._lock:
+            item = self._get(name)
+            if item is None:
+                return False
+            self._data[name] = (item[0], time.monotonic() + time_ms / 1000)
+            return True
+
+    def persist(self, name):
+        with self._lock:
+            item = self._get(name)
+            if item is None or item[1] is None:
+                return False
+            self._data[name] = (item[0], None)
+            return True
+
+    def flushdb(self):
+        with self._lock:
+            self._data.clear()
+        return True
+
+    def pipeline(self, transaction=True):
+        return LocalPipeline(self)
+
+
+class LocalPipeline:
+    """Commands are buffered and run by execute()"""
+
+    def __init__(self, client):
+        self._client = client
+        self._commands = []
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+
+        def command(*args, **kwargs):
+            self._commands.append((method, args, kwargs))
+            return self
+        return command
+
+    def execute(self):
+        commands, self._commands = self._commands, []
+        return [method(*args, **kwargs) for method, args, kwargs in commands]
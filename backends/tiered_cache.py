@@ -0,0 +1,299 @@
+"""
+Two-tier cache: a bounded in-process LRU in front of a shared cache.
+
+Hits on the local tier avoid the network round trip to the shared cache
+(e.g. Redis). LOCATION is the alias of the shared cache:
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'ihr.backends.tiered_cache.TieredCache',
+            'LOCATION': 'shared',
+            'OPTIONS': {
+                'MAX_SIZE': 64 * 2**20,         # bytes per worker
+                'MAX_ENTRY_SIZE': 256 * 2**10,  # larger values are not kept locally
+                'LOCAL_TIMEOUT': 30,            # seconds
+            },
+        },
+        'shared': {...},
+    }
+
+Local entries are dropped after LOCAL_TIMEOUT seconds, when the LRU exceeds
+MAX_SIZE bytes, and when any worker modifies the key: writes are broadcast
+on a Redis pub/sub channel listened to by a thread in each worker. The local
+tier is bypassed while this thread is not subscribed, and the short local
+timeout bounds the staleness of values read while another worker was
+writing them. Values are kept pickled, as cached objects (e.g. responses)
+are modified by their users.
+"""
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import redis
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .. import metrics
+from ..const import POOL
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'ihr:cache:invalidate'
+# Key of invalidation messages clearing all entries
+CLEAR_ALL = '*'
+# Seconds between reconnections of the invalidation listener
+RECONNECT_DELAY = 5
+
+
+class LocalLRU:
+    """Thread-safe LRU of pickled values bounded by their total size"""
+
+    def __init__(self, max_size, max_entry_size, timeout):
+        self.max_size = max_size
+        self.max_entry_size = max_entry_size
+        self.timeout = timeout
+        self.size = 0
+        # key -> (data, expiry)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, data, timeout=None):
+        if len(data) > self.max_entry_size:
+            self.delete(key)
+            return
+
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (data, time.monotonic() + timeout)
+            self.size += len(data)
+            while self.size > self.max_size:
+                self._pop(next(iter(self._entries)))
+                metrics.inc('ihr_cache_evictions_total', tier='local')
+            metrics.set_gauge('ihr_cache_local_bytes', self.size)
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[0])
+
+    def delete(self, key):
+        with self._lock:
+            self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+class InvalidationListener:
+    """
+    Broadcast modified keys to other workers and drop the keys modified by
+    other workers from the local LRUs.
+    """
+
+    def __init__(self):
+        self.conn = redis.Redis(connection_pool=POOL)
+        # Messages sent by this worker are ignored
+        self.sender = '{}-{}'.format(os.getpid(), uuid.uuid4().hex)
+        self.lrus = {}
+        self.subscribed = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self.listen, name='cache-invalidation', daemon=True)
+                self._thread.start()
+
+    def publish(self, name, key):
+        try:
+            self.conn.publish(CHANNEL, '{} {} {}'.format(self.sender, name, key))
+        except redis.RedisError as e:
+            # Other workers may serve this key until its local timeout
+            logger.warning('Could not broadcast cache invalidation: %s', e)
+
+    def invalidate(self, message):
+        sender, name, key = message.split(' ', 2)
+        lru = self.lrus.get(name)
+        if sender == self.sender or lru is None:
+            return
+        if key == CLEAR_ALL:
+            lru.clear()
+        else:
+            lru.delete(key)
+
+    def listen(self):
+        while True:
+            pubsub = self.conn.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(CHANNEL)
+                self.subscribed.set()
+                for message in pubsub.listen():
+                    if message['type'] == 'message':
+                        self.invalidate(message['data'])
+            except redis.RedisError as e:
+                logger.warning('Cache invalidation listener disconnected: %s', e)
+            finally:
+                # Invalidations may have been missed
+                self.subscribed.clear()
+                for lru in self.lrus.values():
+                    lru.clear()
+                pubsub.close()
+            time.sleep(RECONNECT_DELAY)
+
+
+listener = InvalidationListener()
+_lrus_lock = threading.Lock()
+
+
+def get_lru(name, max_size, max_entry_size, timeout):
+    """Return the LRU of a cache, shared by all threads of the worker"""
+    with _lrus_lock:
+        if name not in listener.lrus:
+            listener.lrus[name] = LocalLRU(max_size, max_entry_size, timeout)
+        return listener.lrus[name]
+
+
+class TieredCache(BaseCache):
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.shared_alias = location
+        options = params.get('OPTIONS', {})
+        self.local = get_lru(
+                location,
+                options.get('MAX_SIZE', 64 * 2**20),
+                options.get('MAX_ENTRY_SIZE', 256 * 2**10),
+                options.get('LOCAL_TIMEOUT', 30),
+                )
+        listener.start()
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def use_local(self):
+        return listener.subscribed.is_set()
+
+    def local_timeout(self, timeout):
+        if timeout == DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        return timeout
+
+    def keep_local(self, key, value, timeout=DEFAULT_TIMEOUT):
+        timeout = self.local_timeout(timeout)
+        if timeout is not None and timeout <= 0:
+            self.local.delete(key)
+        elif self.use_local():
+            self.local.set(key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), timeout)
+
+    def invalidate(self, key):
+        self.local.delete(key)
+        listener.publish(self.shared_alias, key)
+
+    def count(self, tier, result, value=1):
+        if value:
+            metrics.inc('ihr_cache_requests_total', value, cache=self.shared_alias, tier=tier,
+                    result=result, endpoint=metrics.endpoint())
+
+    ############ Cache API ##########
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version)
+        if added:
+            local_key = self.make_key(key, version)
+            self.invalidate(local_key)
+            self.keep_local(local_key, value, timeout)
+        return added
+
+    def get(self, key, default=None, version=None):
+        local_key = self.make_key(key, version)
+        if self.use_local():
+            data = self.local.get(local_key)
+            if data is not None:
+                self.count('local', 'hit')
+                return pickle.loads(data)
+            self.count('local', 'miss')
+
+        value = self.shared.get(key, None, version)
+        if value is None:
+            self.count('shared', 'miss')
+            return default
+
+        self.count('shared', 'hit')
+        self.keep_local(local_key, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        missing = []
+        use_local = self.use_local()
+        for key in keys:
+            data = self.local.get(self.make_key(key, version)) if use_local else None
+            if data is None:
+                missing.append(key)
+            else:
+                found[key] = pickle.loads(data)
+        if use_local:
+            self.count('local', 'hit', len(found))
+            self.count('local', 'miss', len(missing))
+
+        if missing:
+            values = self.shared.get_many(missing, version)
+            self.count('shared', 'hit', len(values))
+            self.count('shared', 'miss', len(missing) - len(values))
+            for key, value in values.items():
+                self.keep_local(self.make_key(key, version), value)
+            found.update(values)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version)
+        local_key = self.make_key(key, version)
+        self.invalidate(local_key)
+        self.keep_local(local_key, value, timeout)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        self.shared.delete(key, version)
+        self.invalidate(self.make_key(key, version))
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.shared.delete_many(keys, version)
+        for key in keys:
+            self.invalidate(self.make_key(key, version))
+
+    def has_key(self, key, version=None):
+        if self.use_local() and self.local.get(self.make_key(key, version)) is not None:
+            return True
+        return self.shared.has_key(key, version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared.incr(key, delta, version)
+        self.invalidate(self.make_key(key, version))
+        return value
+
+    def clear(self):
+        self.shared.clear()
+        self.local.clear()
+        listener.publish(self.shared_alias, CLEAR_ALL)
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/1.9/ref/settings/
 """
 
 import os
+import sys
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -55,8 +56,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'ihr.routers.ReplicaRouterMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'ihr.metrics.MetricsMiddleware',
+    'ihr.warming.QueryHitsMiddleware',
+    'ihr.surrogate.SurrogateKeyMiddleware',
     'django.middleware.cache.UpdateCacheMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -120,13 +125,79 @@ REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'rest_framework.schemas.coreapi.AutoSchema'
 }
 
-#CACHES = {
-#    'default': {
-#        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
-#        'LOCATION': '127.0.0.1:11211',
-#        'TIMEOUT': 3600
-#    },
-#}
+# Small hot values are kept in each worker (see ihr/backends/tiered_cache.py)
+# in front of the cache shared by all workers. Keys of the shared cache can
+# be sharded over several Redis instances by adding their URLs to LOCATION
+# (see ihr/backends/redis_cache.py)
+CACHES = {
+    'default': {
+        'BACKEND': 'ihr.backends.tiered_cache.TieredCache',
+        'LOCATION': 'shared',
+        'TIMEOUT': 3600,
+        'OPTIONS': {
+            'MAX_SIZE': 64 * 2**20,
+            'MAX_ENTRY_SIZE': 256 * 2**10,
+            'LOCAL_TIMEOUT': 30,
+        },
+    },
+    'shared': {
+        'BACKEND': 'ihr.backends.redis_cache.RedisCache',
+        'LOCATION': [
+            'redis://127.0.0.1:6379/1',
+        ],
+        'TIMEOUT': 3600,
+        'OPTIONS': {
+            'COMPRESS_MIN_LENGTH': 1024,
+            'MAX_CONNECTIONS': 50,
+        },
+    },
+}
+# CDN purged by surrogate keys after data changes (see ihr/surrogate.py), e.g.
+# 'ihr.surrogate.FastlyCDN' with IHR_CDN_SERVICE and IHR_CDN_TOKEN
+IHR_CDN_CLIENT = 'ihr.surrogate.NullCDN'
+# Tests use in-process stand-ins of Redis and of the CDN
+if len(sys.argv) > 1 and sys.argv[1] == 'test':
+    CACHES['shared']['OPTIONS']['CLIENT_CLASS'] = 'ihr.backends.redis_cache.LocalRedis'
+    IHR_CDN_CLIENT = 'ihr.surrogate.LocalCDN'
+
+# Maximum number of rows, as estimated by the query planner, that can be
+# fetched by one API request. A maximum plan cost can also be set.
+IHR_QUERY_ROW_BUDGET = 5000000
+IHR_QUERY_COST_BUDGET = None
+# Default statement_timeout (in milliseconds) for API queries
+IHR_STATEMENT_TIMEOUT = 60000
+# Hegemony, prefix hegemony and network delay rows older than
+# IHR_RETENTION_DAYS are moved to Parquet files in IHR_ARCHIVE_DIR by the
+# retention command, the API reads them from there
+IHR_ARCHIVE_DIR = os.path.join(BASE_DIR, 'archive')
+IHR_RETENTION_DAYS = 365
+# The OpenAPI schema is generated once, by the schema command or at the first
+# request, and stored in IHR_SCHEMA_DIR
+IHR_SCHEMA_DIR = os.path.join(BASE_DIR, 'schema')
+# Query results are cached in IHR_QUERY_CACHE with keys including the data
+# version of queried tables, results larger than IHR_QUERY_CACHE_MAX_ROWS
+# rows are not cached
+IHR_QUERY_CACHE = 'default'
+IHR_QUERY_CACHE_TIMEOUT = 3600
+IHR_QUERY_CACHE_MAX_ROWS = 10000
+# URLs requested by the warmcache command after each ingestion, in addition
+# to the most requested ones. Entries are paths or URL names with an optional
+# query string. Requests are made with IHR_CACHE_WARM_HOST, under the path
+# where the API is mounted (IHR_CACHE_WARM_SCRIPT_PREFIX), and with the headers
+# sent by the website, as they are part of the response cache keys.
+IHR_CACHE_WARM_URLS = [
+    'ihr:countryListView',
+    'ihr:networkDelayLocationsListView',
+    'ihr:networkListView?number__in=3356,174,3257,1299,2914',
+]
+IHR_CACHE_WARM_HOST = 'ihr.iijlab.net'
+IHR_CACHE_WARM_SCRIPT_PREFIX = '/ihr/api/'
+IHR_CACHE_WARM_SECURE = True
+IHR_CACHE_WARM_HEADERS = {
+    'HTTP_ACCEPT': 'application/json, text/plain, */*',
+}
+# Number of URLs counted per day, the least requested ones are dropped
+IHR_CACHE_HITS_MAX_URLS = 10000
 
 # Database
 # https://docs.djangoproject.com/en/1.9/ref/settings/#databases
@@ -135,15 +206,42 @@ DATABASES = {
     'default': {
         # 'ENGINE': 'django.db.backends.sqlite3',
         # 'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'ihr.backends.postgresql_pool',
         'NAME': 'ihr',
         'USER': 'django',
         'PASSWORD': SECRET_KEY_PSQL,
         'HOST': 'localhost',
         'PORT': '5432',
-    }
+        # Connections are returned to the pool at the end of each request
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            'MAX_IDLE': 10,
+            'MAX_AGE': 600,
+            'CHECK_ON_CHECKOUT': True,
+        },
+    },
+    # Read replica used for GET requests (see IHR_DB_REPLICAS)
+    # 'replica1': {
+    #     'ENGINE': 'ihr.backends.postgresql_pool',
+    #     'NAME': 'ihr',
+    #     'USER': 'django',
+    #     'PASSWORD': SECRET_KEY_PSQL,
+    #     'HOST': 'localhost',
+    #     'PORT': '5433',
+    #     # Seconds before an unreachable replica is reported as unhealthy
+    #     'OPTIONS': {'connect_timeout': 3},
+    #     'TEST': {'MIRROR': 'default'},
+    # },
 }
 
+DATABASE_ROUTERS = ['ihr.routers.ReplicaRouter']
+# Aliases of the read replicas defined in DATABASES
+IHR_DB_REPLICAS = []
+# Replicas lagging more than this (in seconds) are not used
+IHR_DB_REPLICA_MAX_LAG = 60
+# Seconds between two health checks of a replica
+IHR_DB_REPLICA_CHECK_INTERVAL = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/1.9/ref/settings/#auth-password-validators
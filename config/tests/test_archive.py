@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+from datetime import date, datetime, timezone
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.http import QueryDict
+from rest_framework.exceptions import ParseError
+from ihr import archive
+from ihr.models import Hegemony, Hegemony_prefix
+from ihr.views import requested_timebins
+
+
+class TestRequestedTimebins(SimpleTestCase):
+
+    def test_timebin_range(self):
+        start, end = requested_timebins(QueryDict('timebin__gte=2022-03-10&timebin__lte=2022-03-11T12:00'))
+        self.assertEqual(start.isoformat(), '2022-03-10T00:00:00+00:00')
+        self.assertEqual(end.isoformat(), '2022-03-11T12:00:00+00:00')
+        self.assertEqual(requested_timebins(QueryDict('timebin__gte=2022-03-10')), (None, None))
+
+    def test_invalid_timebins(self):
+        for query in ('timebin=foo', 'timebin__gte=2022-13-45&timebin__lte=2022-03-11'):
+            with self.assertRaises(ParseError):
+                requested_timebins(QueryDict(query))
+
+
+class TestRead(SimpleTestCase):
+
+    def setUp(self):
+        import pandas as pd
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        patcher = mock.patch('ihr.archive.ARCHIVE_DIR', directory)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        archive._ranges.clear()
+
+        timebin = datetime(2022, 3, 10, tzinfo=timezone.utc)
+        archive.write_day(Hegemony, date(2022, 3, 10), [pd.DataFrame({
+            'id': [1, 2, 3, 4], 'timebin': [timebin] * 4, 'originasn_id': [2497, 2497, 15169, 15169],
+            'asn_id': [2914, 3356, 2914, 3356], 'hege': [0.2, 0.4, 0.1, 0.3], 'af': [4, 4, 4, 6]})])
+        self.start = timebin
+        self.end = datetime(2022, 3, 11, tzinfo=timezone.utc)
+
+    def test_lookups(self):
+        frame = archive.read(Hegemony, self.start, self.end,
+                [('originasn', 'in', [2497]), ('hege', 'gte', 0.3)])
+        self.assertEqual(list(frame.id), [2])
+
+        # Lookups not evaluated by pyarrow are applied to the DataFrame
+        frame = archive.read(Hegemony, self.start, self.end, [('originasn', 'in', [])])
+        self.assertTrue(frame.empty)
+
+    def test_row_budget(self):
+        with self.assertRaises(archive.TooManyRows):
+            archive.read(Hegemony, self.start, self.end, max_rows=3)
+        frame = archive.read(Hegemony, self.start, self.end, [('af', 'exact', 4)], max_rows=3)
+        self.assertEqual(len(frame), 3)
+
+    def test_days_are_bounded(self):
+        start = datetime(1970, 1, 1, tzinfo=timezone.utc)
+        end = datetime(9999, 12, 31, tzinfo=timezone.utc)
+        with mock.patch('ihr.archive.os.path.exists', wraps=os.path.exists) as exists:
+            frame = archive.read(Hegemony, start, end)
+        self.assertEqual(len(frame), 4)
+        self.assertEqual(exists.call_count, 1)
+        self.assertEqual(archive.boundary(Hegemony), datetime(2022, 3, 11, tzinfo=timezone.utc))
+
+    def test_row_groups(self):
+        import pandas as pd
+        import pyarrow.parquet as pq
+
+        day = date(2022, 3, 11)
+        timebin = datetime(2022, 3, 11, tzinfo=timezone.utc)
+        batches = [pd.DataFrame({'id': [i], 'timebin': [timebin], 'originasn_id': [2497],
+            'asn_id': [2914 + i], 'hege': [0.5], 'af': [4]}) for i in range(2)]
+        self.assertEqual(archive.write_day(Hegemony, day, batches), 2)
+        self.assertEqual(pq.ParquetFile(archive.day_path(Hegemony, day)).num_row_groups, 2)
+
+        # Rows of an interrupted run are merged with the existing file
+        self.assertEqual(archive.write_day(Hegemony, day, batches[1:]), 1)
+        self.assertEqual(len(pd.read_parquet(archive.day_path(Hegemony, day))), 2)
+
+    def test_sorted_page(self):
+        frame = archive.read(Hegemony, self.start, self.end)
+        frame = archive.sort_frame(frame, Hegemony, ['-hege', 'unknown'])
+        rows = archive.FrameInstances(Hegemony, frame)
+
+        self.assertEqual(len(rows), 4)
+        self.assertEqual([row.id for row in rows[1:3]], [4, 1])
+        self.assertEqual(rows[0].hege, 0.4)
+
+    @mock.patch('ihr.archive.prefix_statuses')
+    def test_status_names(self, prefix_statuses):
+        import pandas as pd
+
+        # File archived before statuses were stored as codes
+        prefix_statuses.code.side_effect = {'Valid': 1, 'NotFound': 2, 'assigned': 3}.get
+        path = archive.day_path(Hegemony_prefix, date(2022, 3, 10))
+        os.makedirs(os.path.dirname(path))
+        pd.DataFrame({'id': [1, 2], 'timebin': [self.start] * 2, 'prefix': ['8.8.8.0/24', '8.8.4.0/24'],
+            'originasn_id': [15169] * 2, 'country_id': ['US'] * 2, 'asn_id': [2497] * 2, 'hege': [0.5] * 2,
+            'af': [4] * 2, 'visibility': [100.0] * 2, 'rpki_status': ['Valid', 'NotFound'],
+            'irr_status': ['Valid', 'Valid'], 'delegated_prefix_status': ['assigned'] * 2,
+            'delegated_asn_status': ['assigned'] * 2, 'descr': ['', ''], 'moas': [False] * 2,
+            }).to_parquet(path, index=False)
+
+        frame = archive.read(Hegemony_prefix, self.start, self.end, [('rpki_status', 'in', [2])])
+        self.assertEqual(list(frame.prefix), ['8.8.4.0/24'])
+        self.assertEqual(frame.iloc[0].irr_status_id, 1)
+        self.assertEqual(frame.iloc[0].delegated_asn_status_id, 3)
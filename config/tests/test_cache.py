@@ -0,0 +1,106 @@
+from django.http import QueryDict
+from django.test import SimpleTestCase
+from ihr.backends.redis_cache import COMPRESSED, HashRing, LocalRedis, RedisCache
+from ihr.backends.tiered_cache import LocalLRU
+from ihr.models import Hegemony
+from ihr.surrogate import purge_keys, response_keys
+
+LOCATIONS = ['redis://shard1/1', 'redis://shard2/1', 'redis://shard3/1']
+
+
+class TestRedisCache(SimpleTestCase):
+
+    def setUp(self):
+        self.cache = RedisCache(LOCATIONS, {
+            'OPTIONS': {
+                'CLIENT_CLASS': LocalRedis,
+                'COMPRESS_MIN_LENGTH': 100,
+            },
+        })
+        self.cache.clear()
+
+    def test_set_get_delete(self):
+        self.cache.set('countries', ['FR', 'JP'])
+        self.assertEqual(self.cache.get('countries'), ['FR', 'JP'])
+        self.cache.delete('countries')
+        self.assertIsNone(self.cache.get('countries'))
+
+    def test_large_values_are_compressed(self):
+        value = {'results': list(range(1000))}
+        self.cache.set('large', value)
+        key = self.cache.make_key('large')
+        self.assertTrue(self.cache.get_client(key).get(key).startswith(COMPRESSED))
+        self.assertEqual(self.cache.get('large'), value)
+
+    def test_many_keys_over_shards(self):
+        values = {'key{}'.format(i): i for i in range(100)}
+        self.cache.set_many(values)
+        self.assertEqual(self.cache.get_many(values), values)
+
+        used = {self.cache._ring.get_node(self.cache.make_key(key)) for key in values}
+        self.assertEqual(used, set(LOCATIONS))
+
+        self.cache.delete_many(values)
+        self.assertEqual(self.cache.get_many(values), {})
+
+    def test_incr_and_add(self):
+        self.assertTrue(self.cache.add('hits', 1))
+        self.assertFalse(self.cache.add('hits', 10))
+        self.assertEqual(self.cache.incr('hits', 2), 3)
+        self.assertEqual(self.cache.get('hits'), 3)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_zero_timeout_is_not_stored(self):
+        self.cache.set('key', 'value', timeout=0)
+        self.assertFalse(self.cache.has_key('key'))
+
+    def test_ring_moves_few_keys(self):
+        keys = ['key{}'.format(i) for i in range(1000)]
+        before = HashRing(LOCATIONS)
+        after = HashRing(LOCATIONS + ['redis://shard4/1'])
+        moved = sum(before.get_node(key) != after.get_node(key) for key in keys)
+        self.assertLess(moved, 400)
+
+
+class TestLocalLRU(SimpleTestCase):
+
+    def test_size_based_eviction(self):
+        lru = LocalLRU(max_size=250, max_entry_size=200, timeout=30)
+        for key in ('a', 'b', 'c'):
+            lru.set(key, b'x' * 100)
+        self.assertIsNone(lru.get('a'))
+        self.assertEqual(lru.size, 200)
+
+        # Recently used entries are kept
+        lru.get('b')
+        lru.set('d', b'x' * 100)
+        self.assertIsNotNone(lru.get('b'))
+        self.assertIsNone(lru.get('c'))
+
+        lru.set('large', b'x' * 201)
+        self.assertIsNone(lru.get('large'))
+
+    def test_timeout(self):
+        lru = LocalLRU(max_size=1000, max_entry_size=1000, timeout=30)
+        lru.set('key', b'value', timeout=0)
+        self.assertIsNone(lru.get('key'))
+
+
+class TestSurrogateKeys(SimpleTestCase):
+
+    def test_response_and_purge_keys(self):
+        params = QueryDict('originasn=2497,15169&af=4&timebin__gte=2022-03-10T00:00&timebin__lte=2022-03-11T00:00')
+        keys = response_keys(Hegemony, params)
+        self.assertIn('ihr_hegemony:originasn:15169', keys)
+        self.assertIn('ihr_hegemony:asn:any', keys)
+        self.assertIn('ihr_hegemony:day:2022-03-11', keys)
+
+        # Either the day or any day is purged
+        purged = purge_keys(Hegemony, 'day', ['2022-03-11'])
+        self.assertEqual(purged, ['ihr_hegemony:day:2022-03-11', 'ihr_hegemony:day:any'])
+        self.assertTrue(set(purged) & set(keys))
+        self.assertFalse(set(purge_keys(Hegemony, 'day', ['2022-03-12'])) & set(keys))
+
+        # Unbounded timebin ranges contain any day
+        self.assertIn('ihr_hegemony:day:any', response_keys(Hegemony, QueryDict('originasn=2497')))
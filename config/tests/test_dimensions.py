@@ -0,0 +1,107 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+from rest_framework.test import APIRequestFactory
+from ihr.dimensions import ASNNames, AtlasLocations, Autocomplete
+from ihr.views import AutocompleteView
+
+
+class TestASNNames(SimpleTestCase):
+
+    def test_missing_asn_is_queried_once(self):
+        names = ASNNames()
+        names._data = {2497: 'IIJ'}
+        names._checked = float('inf')
+
+        with mock.patch('ihr.dimensions.ASN.objects') as objects:
+            query = objects.no_cache.return_value.filter.return_value.values_list.return_value
+            query.first.return_value = None
+
+            self.assertEqual(names.get(2497), 'IIJ')
+            self.assertIsNone(names.get(64512))
+            self.assertIsNone(names.get(64512))
+            self.assertEqual(query.first.call_count, 1)
+
+
+class TestAtlasLocations(SimpleTestCase):
+
+    def setUp(self):
+        self.locations = AtlasLocations()
+        self.locations._data = [None, ('CT', 'Tokyo, 13, JP', 4)]
+        self.locations._keys = {'CT4Tokyo, 13, JP': 1}
+        self.locations._checked = float('inf')
+
+        patcher = mock.patch('ihr.dimensions.Atlas_location.objects')
+        objects = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.query = objects.no_cache.return_value.filter.return_value.values_list.return_value
+        self.query.first.return_value = None
+
+    def test_missing_location_is_queried_once(self):
+        self.assertEqual(self.locations.get(1), ('CT', 'Tokyo, 13, JP', 4))
+        self.assertIsNone(self.locations.get(42))
+        self.assertIsNone(self.locations.get(42))
+        self.assertEqual(self.query.first.call_count, 1)
+
+    def test_new_location(self):
+        self.query.first.return_value = ('AS', '2497', 4)
+        self.assertEqual(self.locations.get(3), ('AS', '2497', 4))
+        self.assertEqual(self.locations.get(3), ('AS', '2497', 4))
+        self.assertEqual(self.query.first.call_count, 1)
+
+    def test_missing_key_is_queried_once(self):
+        self.assertEqual(self.locations.get_id('CT4Tokyo, 13, JP'), 1)
+        self.assertIsNone(self.locations.get_id('CT4Atlantis'))
+        self.assertIsNone(self.locations.get_id('CT4Atlantis'))
+        # Invalid keys are not queried
+        self.assertIsNone(self.locations.get_id('CTx'))
+        self.assertEqual(self.query.first.call_count, 1)
+
+
+class TestAutocomplete(SimpleTestCase):
+
+    def setUp(self):
+        self.autocomplete = Autocomplete()
+        with mock.patch('ihr.dimensions.ASN.objects') as asns, \
+                mock.patch('ihr.dimensions.Country.objects') as countries, \
+                mock.patch('ihr.dimensions.Atlas_location.objects') as locations:
+            asns.no_cache.return_value.values_list.return_value = [
+                    (2497, 'IIJ Internet Initiative Japan Inc.'), (2500, 'WIDE Project'), (25, 'UCB')]
+            countries.no_cache.return_value.values_list.return_value = [('JP', 'Japan')]
+            locations.no_cache.return_value.values_list.return_value = [('CT', 'Tokyo, 13, JP', 4)]
+            self.autocomplete._data = self.autocomplete.load()
+        self.autocomplete._checked = float('inf')
+
+    def names(self, prefix, limit=10):
+        return [name for _, _, name in self.autocomplete.search(prefix, limit)]
+
+    def test_prefix_matches(self):
+        self.assertEqual(self.autocomplete.search('AS2497'),
+                [('asn', 2497, 'IIJ Internet Initiative Japan Inc.')])
+        self.assertEqual(self.names('2'), ['IIJ Internet Initiative Japan Inc.', 'UCB', 'WIDE Project'])
+        self.assertEqual(self.names('25'), ['UCB', 'WIDE Project'])
+        # Any word of the name, each entry is returned once
+        self.assertEqual(self.names(' JAP'), ['Japan', 'IIJ Internet Initiative Japan Inc.'])
+        self.assertEqual(self.autocomplete.search('tok'), [('location', 'CT4Tokyo, 13, JP', 'Tokyo, 13, JP')])
+        self.assertEqual(self.autocomplete.search('jp'),
+                [('country', 'JP', 'Japan'), ('location', 'CT4Tokyo, 13, JP', 'Tokyo, 13, JP')])
+
+    def test_limit(self):
+        self.assertEqual(self.names('2', limit=2), ['IIJ Internet Initiative Japan Inc.', 'UCB'])
+        self.assertEqual(self.names('2', limit=0), [])
+
+    def test_empty_and_unknown_prefix(self):
+        self.assertEqual(self.autocomplete.search(''), [])
+        self.assertEqual(self.autocomplete.search('   '), [])
+        self.assertEqual(self.autocomplete.search('zzz'), [])
+        self.assertEqual(self.autocomplete.search('~'), [])
+
+    def test_view(self):
+        view = AutocompleteView.as_view()
+        factory = APIRequestFactory()
+        with mock.patch('ihr.views.api.autocomplete', self.autocomplete):
+            response = view(factory.get('/autocomplete/', {'q': 'wide'}))
+            self.assertEqual(response.data, [{'type': 'asn', 'id': 2500, 'name': 'WIDE Project'}])
+            self.assertEqual(len(view(factory.get('/autocomplete/', {'q': '25', 'limit': 1})).data), 1)
+            self.assertEqual(view(factory.get('/autocomplete/')).data, [])
+            self.assertEqual(view(factory.get('/autocomplete/', {'q': '25', 'limit': 'all'})).status_code, 400)
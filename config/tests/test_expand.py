@@ -0,0 +1,153 @@
+from datetime import datetime, timezone
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from ihr.models import ASN, Delay_alarms, Delay_alarms_msms, Disco_events, Disco_probes
+from ihr.serializers import DelayAlarmsSerializer
+from ihr.views import DelayAlarmsView, DiscoEventsView
+
+TIMEBIN = datetime(2022, 3, 10, tzinfo=timezone.utc)
+
+
+def list_view(view_class, **params):
+    """View handling a GET request with the given parameters"""
+    view = view_class()
+    view.setup(Request(APIRequestFactory().get('/', params)))
+    view.format_kwarg = None
+    return view
+
+
+def alarms_view(**params):
+    params.setdefault('timebin', TIMEBIN.isoformat())
+    return list_view(DelayAlarmsView, **params)
+
+
+def alarms_queryset(view):
+    return view.filter_queryset(view.get_queryset())
+
+
+@mock.patch('ihr.views.common.check_query_cost')
+class TestExpandableFields(SimpleTestCase):
+
+    def fields(self, view):
+        return set(DelayAlarmsSerializer(context={'request': view.request, 'view': view}).fields)
+
+    def test_default_fields(self, check_query_cost):
+        view = alarms_view()
+        fields = self.fields(view)
+        self.assertNotIn('msm_prb_ids', fields)
+        self.assertNotIn('msmid', fields)
+        self.assertIn('asn_name', fields)
+
+        queryset = alarms_queryset(view)
+        self.assertEqual(queryset.query.deferred_loading, ({'msm_prb_ids'}, True))
+        self.assertEqual(queryset._prefetch_related_lookups, ())
+
+    def test_expanded_fields(self, check_query_cost):
+        view = alarms_view(expand='msm_prb_ids, msmid')
+        self.assertTrue({'msm_prb_ids', 'msmid'} <= self.fields(view))
+
+        queryset = alarms_queryset(view)
+        self.assertEqual(queryset.query.deferred_loading, (frozenset(), True))
+        self.assertEqual(queryset._prefetch_related_lookups, ('msmid',))
+
+        view = alarms_view(expand='msmid')
+        self.assertEqual(self.fields(view) & {'msm_prb_ids', 'msmid'}, {'msmid'})
+
+    def test_schema_documents_all_fields(self, check_query_cost):
+        view = alarms_view()
+        view.swagger_fake_view = True
+        self.assertTrue({'msm_prb_ids', 'msmid'} <= self.fields(view))
+
+
+class TestExpandQueries(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        asn = ASN.objects.create(number=2497, name='IIJ')
+        for i in range(3):
+            alarm = Delay_alarms.objects.create(asn=asn, timebin=TIMEBIN, ip='192.0.2.%s' % i,
+                    link='192.0.2.%s-198.51.100.1' % i, msm_prb_ids={'5010': [1, 2]})
+            Delay_alarms_msms.objects.create(alarm=alarm, msmid=5010, probeid=i)
+
+    def serialize(self, view, queryset=None):
+        if queryset is None:
+            queryset = alarms_queryset(view)
+        serializer = DelayAlarmsSerializer(queryset, many=True,
+                context={'request': view.request, 'view': view})
+        return serializer.data
+
+    @mock.patch('ihr.serializers.asn_names', {2497: 'IIJ'})
+    def test_msmid_is_prefetched(self):
+        view = alarms_view(expand='msmid')
+        queryset = alarms_queryset(view)
+        # One query for the alarms and one for all their measurements
+        with self.assertNumQueries(2):
+            rows = self.serialize(view, queryset)
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(sorted(row['msmid'][0] for row in rows), ['5010 0', '5010 1', '5010 2'])
+        self.assertNotIn('msm_prb_ids', rows[0])
+
+    def test_msm_prb_ids_is_deferred(self):
+        rows = self.serialize(alarms_view())
+        self.assertNotIn('msm_prb_ids', rows[0])
+        self.assertNotIn('msmid', rows[0])
+
+        rows = self.serialize(alarms_view(expand='msm_prb_ids'))
+        self.assertEqual(rows[0]['msm_prb_ids'], {'5010': [1, 2]})
+
+
+class TestDiscoExpand(SimpleTestCase):
+
+    def queryset(self, **params):
+        view = list_view(DiscoEventsView, **params)
+        return view.filter_queryset(view.get_queryset())
+
+    def test_default_queryset(self):
+        queryset = self.queryset()
+        self.assertEqual(queryset._prefetch_related_lookups, ())
+        self.assertNotIn('discoprobes_count', queryset.query.annotations)
+
+    def test_expanded_queryset(self):
+        queryset = self.queryset(expand='discoprobes,discoprobes_count')
+        self.assertEqual(queryset._prefetch_related_lookups, ('discoprobes',))
+        self.assertIn('discoprobes_count', queryset.query.annotations)
+
+
+class TestDiscoExpandQueries(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        event = Disco_events.objects.create(streamtype='asn', streamname='2497',
+                starttime=TIMEBIN, endtime=TIMEBIN, avglevel=12.0, nbdiscoprobes=2)
+        for probe_id in (1, 2):
+            Disco_probes.objects.create(probe_id=probe_id, event=event, starttime=TIMEBIN,
+                    endtime=TIMEBIN, ipv4='192.0.2.%s' % probe_id)
+        Disco_events.objects.create(streamtype='country', streamname='JP',
+                starttime=TIMEBIN, endtime=TIMEBIN)
+
+    def events(self, **params):
+        response = self.client.get(reverse('ihr:discoEventsListView'), dict(params, ordering='id'))
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_default_without_probes(self):
+        events = self.events()
+        self.assertEqual(len(events), 2)
+        self.assertNotIn('discoprobes', events[0])
+        self.assertNotIn('discoprobes_count', events[0])
+
+    def test_expand_probes(self):
+        events = self.events(expand='discoprobes')
+        self.assertEqual(sorted(probe['probe_id'] for probe in events[0]['discoprobes']), [1, 2])
+        self.assertEqual(events[0]['discoprobes'][0]['event'], events[0]['id'])
+        self.assertEqual(events[1]['discoprobes'], [])
+        self.assertNotIn('discoprobes_count', events[0])
+
+    def test_expand_probes_count(self):
+        events = self.events(expand='discoprobes_count')
+        self.assertEqual([event['discoprobes_count'] for event in events], [2, 0])
+        self.assertNotIn('discoprobes', events[0])
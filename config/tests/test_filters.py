@@ -0,0 +1,70 @@
+from django.test import SimpleTestCase
+from rest_framework.exceptions import ParseError
+from ihr.models import ASN, Atlas_location, Hegemony_prefix
+from ihr.views import (HegemonyPrefixFilter, NetworkDelayLocationsFilter, NetworkFilter, PrefixFilter,
+        parse_prefix, rank_by_similarity)
+
+
+class TestPrefixFilters(SimpleTestCase):
+
+    def test_parse_prefix(self):
+        self.assertEqual(parse_prefix(' 8.8.8.0/24'), '8.8.8.0/24')
+        self.assertEqual(parse_prefix('8.8.8.8/24'), '8.8.8.0/24')
+        self.assertEqual(parse_prefix('2001:DB8::1'), '2001:db8::1/128')
+        with self.assertRaises(ParseError):
+            parse_prefix('8.8.8.0/33')
+
+    def test_network_lookups(self):
+        for name, operator in (('prefix__contains', '>>='), ('prefix__contained_by', '<<=')):
+            filterset = HegemonyPrefixFilter({name: '8.8.8.8'}, queryset=Hegemony_prefix.objects.all())
+            sql, params = filterset.qs.query.sql_with_params()
+            self.assertIn('"ihr_hegemony_prefix"."prefix" {} %s::inet'.format(operator), sql)
+            self.assertIn('8.8.8.8/32', params)
+
+    def test_filter_frame(self):
+        import pandas as pd
+
+        frame = pd.DataFrame({'prefix': ['8.0.0.0/8', '8.8.8.0/24', '8.8.4.0/24', '2001:4860::/32']})
+        contains = PrefixFilter(field_name='prefix', lookup_expr='contains')
+        contained_by = PrefixFilter(field_name='prefix', lookup_expr='contained_by')
+
+        self.assertEqual(list(contains.filter_frame(frame, Hegemony_prefix, '8.8.8.8').prefix),
+                ['8.0.0.0/8', '8.8.8.0/24'])
+        self.assertEqual(list(contained_by.filter_frame(frame, Hegemony_prefix, '8.8.0.0/16').prefix),
+                ['8.8.8.0/24', '8.8.4.0/24'])
+
+
+class TestSearchFilters(SimpleTestCase):
+
+    def search(self, value):
+        filterset = NetworkFilter({'search': value}, queryset=ASN.objects.all())
+        return filterset.qs.query.sql_with_params()
+
+    def test_asn_or_number(self):
+        sql, params = self.search('IIJ')
+        self.assertIn('"ihr_asn"."number"::text LIKE %s', sql)
+        # Names are searched with ILIKE, which uses the trigram index
+        self.assertIn('"ihr_asn"."name" ILIKE %s', sql)
+        self.assertNotIn('UPPER(', sql)
+        self.assertEqual(params, ('IIJ', 'IIJ', '%IIJ%', '%IIJ%'))
+
+        # AS and IX prefixes are removed from numbers
+        for value in ('AS2497', 'IX2497'):
+            self.assertEqual(self.search(value)[1][2:], ('%2497%', '%2497%'))
+        self.assertEqual(self.search('ASIA')[1][2:], ('%ASIA%', '%ASIA%'))
+
+    def test_rank_by_similarity(self):
+        sql, params = self.search('IIJ')
+        self.assertIn('GREATEST(SIMILARITY("ihr_asn"."name", %s), SIMILARITY(("ihr_asn"."number")::text, %s))', sql)
+        self.assertTrue(sql.endswith('ORDER BY "similarity" DESC, "ihr_asn"."number" ASC'))
+
+        queryset = rank_by_similarity(Atlas_location.objects.all(), 'Tokyo', 'name')
+        self.assertEqual(queryset.query.order_by, ('-similarity', 'pk'))
+        self.assertNotIn('GREATEST', str(queryset.query))
+
+    def test_location_search(self):
+        filterset = NetworkDelayLocationsFilter({'name': 'Tokyo'}, queryset=Atlas_location.objects.all())
+        sql, params = filterset.qs.query.sql_with_params()
+        self.assertIn('"ihr_atlas_location"."name" ILIKE %s', sql)
+        self.assertIn('%Tokyo%', params)
+        self.assertIn('ORDER BY "similarity" DESC', sql)
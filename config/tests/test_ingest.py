@@ -0,0 +1,94 @@
+import io
+import os
+import tempfile
+from unittest import mock
+
+import redis
+from django.db import connections
+from django.test import SimpleTestCase, TestCase
+from ihr.ingest import DATASETS, load, upsert
+from ihr.models import ASN, Country, Hegemony, Hegemony_prefix, Prefix_status
+
+PREFIX_HEADER = ('timebin,prefix,originasn,country,asn,hege,af,visibility,rpki_status,irr_status,'
+        'delegated_prefix_status,delegated_asn_status,descr,moas\n')
+
+
+class TestCopy(SimpleTestCase):
+
+    def test_text_columns_are_not_null(self):
+        cursor = mock.Mock()
+        stream = io.StringIO(PREFIX_HEADER)
+        DATASETS['hegemony_prefix'].copy(cursor, stream)
+
+        sql = cursor.cursor.copy_expert.call_args[0][0]
+        self.assertIn('FORCE_NOT_NULL (country, rpki_status, irr_status, delegated_prefix_status, '
+                'delegated_asn_status, descr)', sql)
+
+    def test_upsert_values_are_cast(self):
+        rows = [{'timebin': '2022-03-10T00:00:00Z', 'originasn_id': 2497, 'asn_id': 2914, 'af': 4, 'hege': 0.2}]
+        with mock.patch.object(connections['default'], 'cursor'), mock.patch('ihr.ingest.transaction'), \
+                mock.patch('ihr.ingest.execute_values') as execute, mock.patch('ihr.ingest.bump_version'):
+            upsert(Hegemony, rows)
+
+        sql = execute.call_args[0][1]
+        self.assertIn('timebin::timestamp with time zone', sql)
+        self.assertIn('ON CONFLICT (timebin, originasn_id, asn_id, af) DO UPDATE SET hege = EXCLUDED.hege', sql)
+
+
+class TestUpsert(TestCase):
+
+    def setUp(self):
+        for number in (2497, 2914, 15169):
+            ASN.objects.create(number=number, name='AS{}'.format(number))
+
+    def test_rows_are_updated(self):
+        row = {'timebin': '2022-03-10T00:00:00Z', 'originasn_id': 2497, 'asn_id': 2914, 'af': 4, 'hege': 0.2}
+        self.assertEqual(upsert(Hegemony, [row]), 1)
+        self.assertEqual(upsert(Hegemony, [dict(row, hege=0.3)]), 1)
+
+        self.assertEqual(Hegemony.objects.no_cache().get().hege, 0.3)
+
+    def test_generated_ids(self):
+        Country.objects.create(code='US', name='United States')
+        status = Prefix_status.objects.create(id=1, name='Valid')
+        rows = [{'timebin': '2022-03-10T00:00:00Z', 'prefix': prefix, 'originasn_id': 15169,
+            'country_id': 'US', 'asn_id': 2497, 'hege': 0.5, 'af': 4, 'visibility': 100,
+            'rpki_status_id': status.id, 'irr_status_id': status.id, 'delegated_prefix_status_id': status.id,
+            'delegated_asn_status_id': status.id, 'descr': '', 'moas': False}
+            for prefix in ('8.8.8.0/24', '8.8.4.0/24')]
+        self.assertEqual(upsert(Hegemony_prefix, rows), 2)
+        self.assertEqual(upsert(Hegemony_prefix, rows[:1]), 1)
+
+        ids = Hegemony_prefix.objects.no_cache().order_by('id').values_list('id', flat=True)
+        self.assertEqual(list(ids), [1, 2])
+
+
+class TestLoad(TestCase):
+
+    def load_csv(self, dataset, content):
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, 'w') as fo:
+            fo.write(content)
+        return load(DATASETS[dataset], path)
+
+    def test_empty_fields(self):
+        nb_rows, _ = self.load_csv('hegemony_prefix', PREFIX_HEADER
+                + '2022-03-10T00:00:00Z,8.8.8.0/24,15169,US,2497,0.5,4,100,Valid,,assigned,assigned,,false\n')
+        self.assertEqual(nb_rows, 1)
+
+        row = Hegemony_prefix.objects.no_cache().select_related('irr_status').get()
+        self.assertEqual(row.descr, '')
+        self.assertEqual(row.irr_status.name, '')
+        self.assertEqual(row.rpki_status.name, 'Valid')
+
+    @mock.patch('ihr.ingest.purge', side_effect=redis.ConnectionError('refused'))
+    @mock.patch('ihr.ingest.bump_version', side_effect=redis.ConnectionError('refused'))
+    def test_redis_unavailable(self, bump_version, purge):
+        with self.assertLogs('ihr.ingest', 'WARNING') as logs:
+            nb_rows, _ = self.load_csv('hegemony',
+                    'timebin,originasn,asn,hege,af\n2022-03-10T00:00:00Z,2497,2914,0.5,4\n')
+        self.assertEqual(nb_rows, 1)
+        self.assertTrue(purge.called)
+        self.assertIn('Could not bump the version of ihr_hegemony', logs.output[-2])
+        self.assertIn('Could not purge responses of ihr_hegemony', logs.output[-1])
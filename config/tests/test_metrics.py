@@ -0,0 +1,119 @@
+from collections import defaultdict
+from fnmatch import fnmatch
+from unittest import mock
+
+from django.test import SimpleTestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+from ihr import metrics
+from ihr.views import MetricsView
+
+
+class FakeRedis:
+    """Hashes of a Redis server shared by all workers, commands of pipelines run at once"""
+
+    def __init__(self):
+        self.hashes = defaultdict(dict)
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        return []
+
+    def hincrbyfloat(self, key, field, value):
+        self.hashes[key][field] = float(self.hashes[key].get(field, 0)) + value
+
+    def hset(self, key, mapping):
+        self.hashes[key].update({field: str(value) for field, value in mapping.items()})
+
+    def hgetall(self, key):
+        return {field: str(value) for field, value in self.hashes.get(key, {}).items()}
+
+    def delete(self, *keys):
+        for key in keys:
+            self.hashes.pop(key, None)
+
+    def expire(self, key, seconds):
+        pass
+
+    def scan_iter(self, pattern):
+        return [key for key in list(self.hashes) if fnmatch(key, pattern)]
+
+
+class TestMetrics(SimpleTestCase):
+
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = mock.patch('ihr.metrics._conn', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def worker(self, name):
+        """Patch the process-local metrics as those of a new worker"""
+        patcher = mock.patch.multiple(metrics, WORKER=name, _counters=defaultdict(float), _gauges={},
+                _flushed=defaultdict(float))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return patcher
+
+    def test_workers_are_aggregated(self):
+        first = self.worker('web-1')
+        metrics.inc('ihr_query_timeout_total', endpoint='hegemony')
+        metrics.inc('ihr_query_timeout_total', endpoint='hegemony')
+        metrics.set_gauge('ihr_db_pool_idle_connections', 3, alias='default')
+        metrics.flush()
+        # Only increments since the last flush are added
+        metrics.flush()
+        first.stop()
+
+        self.worker('web-2')
+        metrics.inc('ihr_query_timeout_total', endpoint='hegemony')
+        metrics.inc('ihr_query_timeout_total', endpoint='networks')
+        metrics.set_gauge('ihr_db_pool_idle_connections', 1, alias='default')
+        metrics.flush()
+
+        counters, gauges = metrics.aggregated()
+        self.assertEqual(counters, {
+            ('ihr_query_timeout_total', (('endpoint', 'hegemony'),)): 3.0,
+            ('ihr_query_timeout_total', (('endpoint', 'networks'),)): 1.0,
+        })
+        self.assertEqual(gauges, {
+            ('ihr_db_pool_idle_connections', (('alias', 'default'), ('worker', 'web-1'))): 3.0,
+            ('ihr_db_pool_idle_connections', (('alias', 'default'), ('worker', 'web-2'))): 1.0,
+        })
+
+    def test_render(self):
+        counters = {
+            ('ihr_query_timeout_total', (('endpoint', 'networks'),)): 1.0,
+            ('ihr_query_timeout_total', (('endpoint', 'he"ge\\mony'),)): 3.0,
+            ('ihr_response_cache_requests_total', ()): 2,
+        }
+        gauges = {('ihr_db_pool_idle_connections', (('alias', 'default'), ('worker', 'web-1'))): 3.0}
+        self.assertEqual(metrics.render(counters, gauges), '\n'.join([
+            '# TYPE ihr_query_timeout_total counter',
+            'ihr_query_timeout_total{endpoint="he\\"ge\\\\mony"} 3.0',
+            'ihr_query_timeout_total{endpoint="networks"} 1.0',
+            '# TYPE ihr_response_cache_requests_total counter',
+            'ihr_response_cache_requests_total 2.0',
+            '# TYPE ihr_db_pool_idle_connections gauge',
+            'ihr_db_pool_idle_connections{alias="default",worker="web-1"} 3.0',
+        ]) + '\n')
+
+    @mock.patch.object(MetricsView, 'throttle_classes', ())
+    def test_view_is_restricted_to_admins(self):
+        self.worker('web-1')
+        metrics.inc('ihr_query_timeout_total', endpoint='hegemony')
+        view = MetricsView.as_view()
+
+        for user in (None, mock.Mock(is_staff=False)):
+            request = APIRequestFactory().get('/metrics/')
+            if user is not None:
+                force_authenticate(request, user=user)
+            self.assertIn(view(request).status_code, (401, 403))
+
+        request = APIRequestFactory().get('/metrics/')
+        force_authenticate(request, user=mock.Mock(is_staff=True))
+        response = view(request).render()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertIn(b'ihr_query_timeout_total{endpoint="hegemony"} 1.0\n', response.content)
@@ -0,0 +1,74 @@
+from unittest import mock
+
+import psycopg2
+from psycopg2 import extensions
+from django.test import SimpleTestCase
+from ihr.backends.postgresql_pool.base import ConnectionPool
+
+
+def fake_connection():
+    connection = mock.MagicMock(closed=0, autocommit=True)
+    connection.get_transaction_status.return_value = extensions.TRANSACTION_STATUS_IDLE
+    return connection
+
+
+class TestConnectionPool(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch('ihr.backends.postgresql_pool.base.metrics')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = ConnectionPool('default', max_idle=1, max_age=600, check_on_checkout=True)
+
+    def executed(self, connection):
+        cursor = connection.cursor.return_value.__enter__.return_value
+        return [call[0][0] for call in cursor.execute.call_args_list]
+
+    def test_reuse(self):
+        connection = fake_connection()
+        self.assertEqual(self.pool.checkout(lambda: connection), (connection, False))
+        self.pool.checkin(connection)
+        self.assertEqual(self.pool.checkout(fake_connection), (connection, True))
+        self.assertEqual(self.executed(connection), ['DISCARD ALL', 'SELECT 1'])
+
+    def test_checkin_resets_session(self):
+        connection, _ = self.pool.checkout(fake_connection)
+        connection.get_transaction_status.return_value = extensions.TRANSACTION_STATUS_INTRANS
+        self.pool.checkin(connection)
+
+        connection.rollback.assert_called_once_with()
+        self.assertEqual(self.executed(connection), ['DISCARD ALL'])
+        self.assertTrue(connection.autocommit)
+        self.assertEqual(len(self.pool._idle), 1)
+
+    def test_broken_connections_are_discarded(self):
+        connection, _ = self.pool.checkout(fake_connection)
+        connection.rollback.side_effect = psycopg2.OperationalError()
+        connection.get_transaction_status.return_value = extensions.TRANSACTION_STATUS_INERROR
+        self.pool.checkin(connection)
+
+        connection.close.assert_called_once_with()
+        self.assertEqual(len(self.pool._idle), 0)
+
+    def test_invalid_connections_are_replaced(self):
+        connection, _ = self.pool.checkout(fake_connection)
+        self.pool.checkin(connection)
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.execute.side_effect = psycopg2.OperationalError()
+
+        new = fake_connection()
+        self.assertEqual(self.pool.checkout(lambda: new), (new, False))
+        connection.close.assert_called_once_with()
+
+    def test_expired_and_overflow(self):
+        first, _ = self.pool.checkout(fake_connection)
+        second, _ = self.pool.checkout(fake_connection)
+        self.pool.checkin(first)
+        self.pool.checkin(second)
+        second.close.assert_called_once_with()
+
+        with mock.patch.object(self.pool, 'max_age', 0), \
+                mock.patch('ihr.backends.postgresql_pool.base.time.monotonic', return_value=float('inf')):
+            new = fake_connection()
+            self.assertEqual(self.pool.checkout(lambda: new), (new, False))
+        first.close.assert_called_once_with()
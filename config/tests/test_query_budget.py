@@ -0,0 +1,43 @@
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase
+from rest_framework.exceptions import ParseError
+from ihr.views import check_query_cost
+
+
+def explained(rows, cost):
+    """Queryset whose EXPLAIN plan estimates the given rows and cost"""
+    queryset = mock.Mock(spec=['query', 'db'], db='default')
+    queryset.query.sql_with_params.return_value = ('SELECT * FROM ihr_hegemony', [])
+    plan = json.dumps([{'Plan': {'Plan Rows': rows, 'Total Cost': cost}}])
+    return queryset, plan
+
+
+class TestQueryBudget(SimpleTestCase):
+
+    def check(self, queryset, plan, **budget):
+        with mock.patch('ihr.views.common.connections') as connections:
+            cursor = connections.__getitem__.return_value.cursor.return_value.__enter__.return_value
+            cursor.fetchone.return_value = (plan,)
+            return check_query_cost(queryset, **budget)
+
+    def test_plan_within_budget(self):
+        self.assertTrue(self.check(*explained(1000, 50.0), row_budget=5000))
+
+    def test_plan_over_budget(self):
+        with self.assertRaises(ParseError):
+            self.check(*explained(6000, 50.0), row_budget=5000)
+        with self.assertRaises(ParseError) as raised:
+            self.check(*explained(1000, 900.0), row_budget=5000, cost_budget=100)
+        self.assertIn('estimated cost is 900 but at most 100', str(raised.exception.detail))
+
+    def test_cached_queries_are_not_planned(self):
+        queryset, plan = explained(6000, 50.0)
+        queryset.cached = lambda kind: 3000 if kind == 'count' else None
+        self.assertTrue(self.check(queryset, plan, row_budget=5000))
+        queryset.query.sql_with_params.assert_not_called()
+
+        queryset.cached = lambda kind: 6000 if kind == 'count' else None
+        with self.assertRaises(ParseError):
+            self.check(queryset, plan, row_budget=5000)
@@ -0,0 +1,101 @@
+from unittest import mock
+
+import redis
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import models
+from django.db.models.signals import post_save
+from django.test import SimpleTestCase
+from ihr.models import ASN, Hegemony
+from ihr.querycache import query_tables
+
+
+class FakeRedis:
+    """Table versions kept in a dict"""
+
+    def __init__(self):
+        self.values = {}
+
+    def incr(self, key):
+        self.values[key] = self.values.get(key, 0) + 1
+        return self.values[key]
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+
+class TestQueryTables(SimpleTestCase):
+
+    def test_joins_and_subqueries(self):
+        queryset = Hegemony.objects.filter(originasn__name='IIJ',
+                asn__in=ASN.objects.filter(name__icontains='google').values('number'))
+        self.assertEqual(query_tables(queryset.query), ['ihr_asn', 'ihr_hegemony'])
+        self.assertEqual(query_tables(Hegemony.objects.filter(af=4).query), ['ihr_hegemony'])
+
+
+class TestVersionedQuerySet(SimpleTestCase):
+
+    def setUp(self):
+        self.conn = FakeRedis()
+        self.cache = LocMemCache('querycache', {})
+        self.cache.clear()
+        self.rows = [Hegemony(id=i, af=4) for i in range(3)]
+        self.fetched = 0
+
+        for name, value in (('conn', self.conn), ('get_cache', mock.Mock(return_value=self.cache)),
+                ('metrics', mock.Mock())):
+            patcher = mock.patch('ihr.querycache.' + name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def queryset(self):
+        """Queryset whose rows are fetched without database"""
+        test = self
+
+        class Iterable:
+            def __init__(self, queryset):
+                pass
+
+            def __iter__(self):
+                test.fetched += 1
+                return iter(test.rows)
+
+        queryset = Hegemony.objects.filter(af=4)
+        queryset._iterable_class = Iterable
+        return queryset
+
+    def assertFetched(self, fetched):
+        self.assertEqual(list(self.queryset()), self.rows)
+        self.assertEqual(self.fetched, fetched)
+
+    def test_hit_and_miss(self):
+        self.assertFetched(1)
+        self.assertFetched(1)
+        self.assertFetched(1)
+
+    def test_writes_bump_version(self):
+        self.assertFetched(1)
+        with mock.patch.object(models.QuerySet, 'update', return_value=1):
+            Hegemony.objects.filter(af=4).update(hege=0.5)
+        self.assertFetched(2)
+
+        with mock.patch.object(models.QuerySet, 'delete', return_value=(1, {})):
+            Hegemony.objects.filter(af=6).delete()
+        self.assertFetched(3)
+
+        with mock.patch.object(models.QuerySet, 'bulk_create', return_value=[]):
+            Hegemony.objects.bulk_create([])
+        self.assertFetched(4)
+        self.assertEqual(self.conn.get('ihr:version:ihr_hegemony'), 3)
+
+    def test_max_rows(self):
+        with mock.patch('ihr.querycache.MAX_ROWS', 2):
+            self.assertFetched(1)
+            self.assertFetched(2)
+
+    def test_saves_without_redis(self):
+        self.conn.incr = mock.Mock(side_effect=redis.ConnectionError())
+        with self.assertLogs('ihr.querycache', 'WARNING'):
+            post_save.send(sender=Hegemony, instance=self.rows[0], created=True)
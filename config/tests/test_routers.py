@@ -0,0 +1,27 @@
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+from ihr.routers import PRIMARY, ReplicaSet
+
+DATABASES = {'default': {}, 'replica1': {}, 'replica2': {}}
+
+
+@override_settings(DATABASES=DATABASES)
+class TestReplicaSet(SimpleTestCase):
+
+    def test_unknown_alias(self):
+        with self.assertRaises(ImproperlyConfigured):
+            ReplicaSet(['replica1', 'missing'], 60, 10)
+
+    def test_choose_checked_replicas(self):
+        replicas = ReplicaSet(['replica1', 'replica2'], 60, 10)
+        # Do not start the health check thread
+        replicas._checker = mock.Mock()
+
+        # Replicas are not used before their first check
+        self.assertEqual(replicas.choose(), PRIMARY)
+
+        with mock.patch.object(replicas, 'check', side_effect=lambda alias: alias == 'replica2'):
+            replicas.check_all()
+        self.assertEqual({replicas.choose() for _ in range(4)}, {'replica2'})
@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from ihr import schema
+
+DOCUMENTS = {'.json': b'{"swagger": "2.0"}', '.yaml': b'swagger: "2.0"\n'}
+
+
+class TestSchema(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        patcher = mock.patch('ihr.schema.SCHEMA_DIR', directory)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        schema._blobs.clear()
+        self.addCleanup(schema._blobs.clear)
+
+    def get(self, format, **headers):
+        return schema.serve(RequestFactory().get('/swagger' + format, **headers), format)
+
+    def test_stored_schema(self):
+        schema.store(DOCUMENTS)
+        with mock.patch('ihr.schema.generate') as generate:
+            response = self.get('.yaml')
+        generate.assert_not_called()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, DOCUMENTS['.yaml'])
+        self.assertEqual(response['Content-Type'], 'application/yaml')
+        self.assertEqual(response['ETag'], schema.etag(DOCUMENTS['.yaml']))
+        self.assertIn('max-age=3600', response['Cache-Control'])
+
+    def test_not_modified(self):
+        schema.store(DOCUMENTS)
+        tag = schema.etag(DOCUMENTS['.json'])
+        response = self.get('.json', HTTP_IF_NONE_MATCH=tag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], tag)
+
+        response = self.get('.json', HTTP_IF_NONE_MATCH='"outdated"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, DOCUMENTS['.json'])
+
+    @override_settings(DEBUG=False)
+    @mock.patch('ihr.schema.generate', return_value=DOCUMENTS)
+    def test_generated_once(self, generate):
+        self.assertEqual(self.get('.json').content, DOCUMENTS['.json'])
+        self.assertEqual(self.get('.json').content, DOCUMENTS['.json'])
+        generate.assert_called_once_with()
+        # Stored for the other workers
+        self.assertTrue(os.path.exists(schema.path('.yaml')))
+
+    @override_settings(DEBUG=True)
+    @mock.patch('ihr.schema.generate', return_value=DOCUMENTS)
+    def test_not_stored_with_debug(self, generate):
+        self.assertEqual(self.get('.json').status_code, 200)
+        self.assertFalse(os.path.exists(schema.path('.json')))
+
+    def test_only_safe_methods(self):
+        schema.store(DOCUMENTS)
+        response = schema.serve(RequestFactory().post('/swagger.json'), '.json')
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,57 @@
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import SimpleTestCase
+from ihr.serializers import HegemonySerializer
+from ihr.views import QueryTimeout, StatementTimeoutMixin
+
+
+class Cancelled(Exception):
+    """psycopg2 error raised for cancelled queries"""
+    pgcode = '57014'
+
+
+class FailingList:
+
+    def list(self, request, *args, **kwargs):
+        raise self.error
+
+
+class FailingView(StatementTimeoutMixin, FailingList):
+
+    def get_serializer_class(self):
+        return HegemonySerializer
+
+
+class TestStatementTimeout(SimpleTestCase):
+
+    def setUp(self):
+        for name in ('transaction', 'connections', 'router', 'QueryWatchdog', 'metrics'):
+            patcher = mock.patch('ihr.views.common.' + name)
+            setattr(self, name, patcher.start())
+            self.addCleanup(patcher.stop)
+        self.watchdog = self.QueryWatchdog.return_value.__enter__.return_value
+        self.watchdog.cancelled = False
+
+    def list_with_error(self, cause):
+        view = FailingView()
+        view.error = OperationalError()
+        view.error.__cause__ = cause
+        return view.list(mock.Mock())
+
+    def test_timeout(self):
+        with self.assertRaises(QueryTimeout) as raised:
+            self.list_with_error(Cancelled())
+        self.assertEqual(raised.exception.status_code, 503)
+        self.metrics.inc.assert_called_once_with('ihr_query_timeout_total', endpoint='FailingView')
+
+    def test_client_disconnected(self):
+        self.watchdog.cancelled = True
+        with self.assertRaises(QueryTimeout):
+            self.list_with_error(Cancelled())
+        self.metrics.inc.assert_called_once_with('ihr_query_cancelled_total', endpoint='FailingView')
+
+    def test_other_errors(self):
+        with self.assertRaises(OperationalError):
+            self.list_with_error(Exception('connection lost'))
+        self.metrics.inc.assert_not_called()
@@ -0,0 +1,37 @@
+import re
+
+from django.test import SimpleTestCase
+from django.urls import resolve
+from ihr import urls
+from ihr.scripts.startup_benchmark import start_worker
+from ihr.user_api import urls as user_urls
+
+
+def patterns():
+    """
+    Yield the path and the pattern of URLs declared in ihr.urls, except those
+    of the user API router. Groups are replaced by their first alternative.
+    """
+    for pattern in urls.urlpatterns:
+        if pattern in user_urls.urlpatterns:
+            continue
+        regex = pattern.pattern.regex.pattern.lstrip('^').rstrip('$')
+        # e.g. swagger(?P<format>\.json|\.yaml)
+        path = re.sub(r'\(\?P<\w+>([^|)]*)[^)]*\)', r'\1', regex).replace('\\', '')
+        yield '/' + path, pattern
+
+
+class TestUrls(SimpleTestCase):
+
+    def test_urls_resolve_to_their_view(self):
+        paths = list(patterns())
+        self.assertGreater(len(paths), 30)
+        for path, pattern in paths:
+            with self.subTest(path=path):
+                match = resolve(path)
+                self.assertIs(match.func, pattern.callback)
+                self.assertEqual(match.url_name, pattern.name)
+
+    def test_heavy_modules_are_not_loaded(self):
+        # Loaded by the views needing them only
+        self.assertEqual(start_worker()['heavy'], [])
@@ -0,0 +1,66 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+from django.urls import set_script_prefix
+from ihr.warming import QueryHitsMiddleware, configured_urls, log_urls, record_hit, warm
+
+LOG = ('1.2.3.4 - - [10/Mar/2022:10:00:00 +0000] "GET {} HTTP/1.1" 200 512 "-" "curl/7.68.0"\n')
+
+
+@mock.patch('ihr.warming.WARM_SCRIPT_PREFIX', '/ihr/api/')
+class TestWarming(SimpleTestCase):
+
+    def test_hits_are_relative(self):
+        middleware = QueryHitsMiddleware(lambda request: HttpResponse())
+        request = RequestFactory().get('/hegemony/', {'asn': 2497}, SCRIPT_NAME='/ihr/api')
+        with mock.patch('ihr.warming.record_hit') as record_hit:
+            middleware(request)
+        record_hit.assert_called_once_with('/hegemony/?asn=2497')
+
+    def test_only_api_views_are_counted(self):
+        middleware = QueryHitsMiddleware(lambda request: HttpResponse())
+        with mock.patch('ihr.warming.record_hit') as record_hit:
+            for path in ('/', '/unknown/', '/search/'):
+                middleware(RequestFactory().get(path))
+            middleware(RequestFactory().get('/countries/', HTTP_AUTHORIZATION='token'))
+            middleware(RequestFactory().post('/countries/'))
+        record_hit.assert_not_called()
+
+    @mock.patch('ihr.warming.HITS_MAX_URLS', 100)
+    def test_hits_are_trimmed(self):
+        with mock.patch('ihr.warming.conn') as conn:
+            record_hit('/countries/')
+        pipeline = conn.pipeline.return_value
+        key = pipeline.zincrby.call_args[0][0]
+        pipeline.zincrby.assert_called_once_with(key, 1, '/countries/')
+        pipeline.zremrangebyrank.assert_called_once_with(key, 0, -101)
+        pipeline.expire.assert_called_once_with(key, 8 * 86400)
+        pipeline.execute.assert_called_once_with()
+
+    def test_log_urls(self):
+        fd, path = tempfile.mkstemp(suffix='.log')
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, 'w') as fo:
+            for url in ('/ihr/api/countries/', '/ihr/api/countries/', '/ihr/en-us/', '/ihr/api/networks/'):
+                fo.write(LOG.format(url))
+
+        self.assertEqual(log_urls([path], 10), ['/countries/', '/networks/'])
+
+    @mock.patch('ihr.warming.WARM_URLS', ['ihr:countryListView?code=JP', '/networks/'])
+    def test_configured_urls(self):
+        set_script_prefix('/ihr/api/')
+        self.addCleanup(set_script_prefix, '/')
+        self.assertEqual(configured_urls(), ['/countries/?code=JP', '/networks/'])
+
+    def test_warm_under_script_prefix(self):
+        with mock.patch('ihr.warming.Client') as client, mock.patch('ihr.warming.caches'), \
+                mock.patch('ihr.warming.get_cache_key', return_value=None) as get_cache_key:
+            client.return_value.get.return_value.status_code = 200
+            self.assertEqual([status for _, status, _ in warm(['/countries/'])], [200])
+
+        request = get_cache_key.call_args[0][0]
+        self.assertEqual(request.get_full_path(), '/ihr/api/countries/')
+        self.assertEqual(client.return_value.get.call_args[1]['SCRIPT_NAME'], '/ihr/api')
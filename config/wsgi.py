@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "internetHealthReport.settings")
 
 application = get_wsgi_application()
+
+# Load in-process dimension tables (e.g. ASN names) before serving requests
+from ihr.dimensions import preload
+preload()
@@ -0,0 +1,276 @@
+"""
+In-process copies of small dimension tables (e.g. ASN names).
+
+Serializers read these instead of joining the dimension tables on every
+query. Each cache is loaded once per worker and reloaded when the version
+stored in Redis for its table changes, so loaders modifying a dimension
+table should call querycache.bump_version() afterwards.
+"""
+import bisect
+import logging
+import sys
+import threading
+import time
+
+import redis
+from django.db import DatabaseError
+
+from .models import ASN, Country, Atlas_location, Prefix_status
+from .querycache import get_version, get_versions
+
+logger = logging.getLogger(__name__)
+
+# Minimum number of seconds between two version checks in Redis
+CHECK_INTERVAL = 30
+# Maximum number of unknown keys remembered between two reloads, keys come
+# from query parameters
+MAX_MISSING_KEYS = 10000
+
+
+class DimensionCache:
+    """
+    Base class for in-process dimension caches. Subclasses set `model` and
+    implement load() which returns the cached data structure.
+    """
+    model = None
+
+    def __init__(self):
+        self._data = None
+        self._version = None
+        self._checked = 0
+        self._lock = threading.Lock()
+
+    @property
+    def table(self):
+        return self.model._meta.db_table
+
+    def load(self):
+        raise NotImplementedError
+
+    def current_version(self):
+        return get_version(self.table)
+
+    def data(self):
+        """Return cached data, reload it if the table version has changed"""
+        if self._data is None or time.monotonic() - self._checked > CHECK_INTERVAL:
+            self.refresh()
+        return self._data
+
+    def refresh(self, force=False):
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._data is not None and now - self._checked <= CHECK_INTERVAL:
+                return
+
+            try:
+                version = self.current_version()
+            except redis.RedisError:
+                # Keep current data if Redis is not reachable
+                version = self._version
+
+            if force or self._data is None or version != self._version:
+                self._data = self.load()
+                self._version = version
+            self._checked = now
+
+
+class ASNNames(DimensionCache):
+    """Map ASN number to ASN name"""
+    model = ASN
+
+    def load(self):
+        return dict(ASN.objects.no_cache().values_list('number', 'name'))
+
+    def get(self, number):
+        names = self.data()
+        try:
+            return names[number]
+        except KeyError:
+            # ASN added after the last reload, unknown ASNs are also kept
+            # (as None) so they are queried once until the next reload
+            name = ASN.objects.no_cache().filter(number=number).values_list('name', flat=True).first()
+            names[number] = name
+            return name
+
+
+class AtlasLocations(DimensionCache):
+    """
+    List of Atlas locations indexed by id, each location is a (type, name, af)
+    tuple. Ids are dense so a list is much more compact than a dictionary.
+    """
+    model = Atlas_location
+
+    def __init__(self):
+        super().__init__()
+        # Map location keys (type, af, and name concatenated) to ids
+        self._keys = {}
+        # Ids and keys unknown to the database, queried once until the next
+        # reload
+        self._missing_ids = set()
+        self._missing_keys = set()
+
+    @staticmethod
+    def key(type, name, af):
+        return '{}{}{}'.format(type, af, name)
+
+    def load(self):
+        rows = Atlas_location.objects.no_cache().values_list('id', 'type', 'name', 'af')
+        locations = []
+        keys = {}
+        for id, type, name, af in rows:
+            if id >= len(locations):
+                locations.extend([None] * (id + 1 - len(locations)))
+            locations[id] = (sys.intern(type), name, af)
+            keys[self.key(type, name, af)] = id
+        self._keys = keys
+        self._missing_ids = set()
+        self._missing_keys = set()
+        return locations
+
+    def get(self, id):
+        locations = self.data()
+        if id < len(locations) and locations[id] is not None:
+            return locations[id]
+        if id in self._missing_ids:
+            return None
+
+        # Location added after the last reload
+        row = Atlas_location.objects.no_cache().filter(id=id).values_list('type', 'name', 'af').first()
+        if row is None:
+            self._missing_ids.add(id)
+            return None
+        if id >= len(locations):
+            locations.extend([None] * (id + 1 - len(locations)))
+        locations[id] = (sys.intern(row[0]), row[1], row[2])
+        return locations[id]
+
+    def get_id(self, key):
+        """Return the id of the location corresponding to the given key"""
+        self.data()
+        try:
+            return self._keys[key]
+        except KeyError:
+            pass
+        if key in self._missing_keys:
+            return None
+
+        # Location added after the last reload or invalid key
+        try:
+            type, af, name = key[:2], int(key[2]), key[3:]
+        except (ValueError, IndexError):
+            return None
+        id = Atlas_location.objects.no_cache().filter(type=type, af=af, name=name).values_list('id', flat=True).first()
+        if id is not None:
+            self._keys[key] = id
+        elif len(self._missing_keys) < MAX_MISSING_KEYS:
+            self._missing_keys.add(key)
+        return id
+
+
+class PrefixStatuses(DimensionCache):
+    """Map prefix status codes to status names"""
+    model = Prefix_status
+
+    def load(self):
+        return dict(Prefix_status.objects.no_cache().values_list('id', 'name'))
+
+    def get(self, id):
+        names = self.data()
+        try:
+            return names[id]
+        except KeyError:
+            # Status added after the last reload
+            name = Prefix_status.objects.no_cache().filter(id=id).values_list('name', flat=True).first()
+            if name is not None:
+                names[id] = name
+            return name
+
+    def codes(self, substring):
+        """Return the codes of all statuses containing the given substring"""
+        return [id for id, name in self.data().items() if substring in name]
+
+    def code(self, name):
+        """Return the code of a status name, None if the status is unknown"""
+        for id, status in self.data().items():
+            if status == name:
+                return id
+        return Prefix_status.objects.no_cache().filter(name=name).values_list('id', flat=True).first()
+
+
+class Autocomplete(DimensionCache):
+    """
+    Prefix search over ASN numbers and names, country codes and names, and
+    Atlas location names. Search keys (numbers, codes, and names starting at
+    each word) are lowercased and kept in a sorted list searched with bisect,
+    results are (type, id, name) tuples.
+    """
+    models = (ASN, Country, Atlas_location)
+
+    @property
+    def table(self):
+        return ', '.join(model._meta.db_table for model in self.models)
+
+    def current_version(self):
+        return tuple(get_versions(model._meta.db_table for model in self.models))
+
+    @staticmethod
+    def name_keys(name):
+        """Keys matching the beginning of any word of the name"""
+        words = name.lower().split()
+        return set(' '.join(words[i:]) for i in range(len(words)))
+
+    def load(self):
+        pairs = []
+        for number, name in ASN.objects.no_cache().values_list('number', 'name'):
+            entry = ('asn', number, name)
+            pairs.append(('as{}'.format(number), entry))
+            pairs.append((str(number), entry))
+            pairs.extend((key, entry) for key in self.name_keys(name))
+
+        for code, name in Country.objects.no_cache().values_list('code', 'name'):
+            entry = ('country', code, name)
+            pairs.append((code.lower(), entry))
+            pairs.extend((key, entry) for key in self.name_keys(name))
+
+        for type, name, af in Atlas_location.objects.no_cache().values_list('type', 'name', 'af'):
+            entry = ('location', AtlasLocations.key(type, name, af), name)
+            pairs.extend((key, entry) for key in self.name_keys(name))
+
+        pairs.sort(key=lambda pair: pair[0])
+        return [key for key, _ in pairs], [entry for _, entry in pairs]
+
+    def search(self, prefix, limit=10):
+        """Return at most limit entries with a key starting with prefix"""
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+
+        keys, entries = self.data()
+        results = []
+        seen = set()
+        i = bisect.bisect_left(keys, prefix)
+        while i < len(keys) and len(results) < limit and keys[i].startswith(prefix):
+            if entries[i] not in seen:
+                seen.add(entries[i])
+                results.append(entries[i])
+            i += 1
+
+        return results
+
+
+asn_names = ASNNames()
+atlas_locations = AtlasLocations()
+prefix_statuses = PrefixStatuses()
+autocomplete = Autocomplete()
+
+CACHES = [asn_names, atlas_locations, prefix_statuses, autocomplete]
+
+
+def preload():
+    """Load all dimension caches, should be called at worker start"""
+    for cache in CACHES:
+        try:
+            cache.refresh(force=True)
+        except (DatabaseError, redis.RedisError) as e:
+            # Caches are loaded lazily if the database is not ready yet
+            logger.warning("Could not preload %s: %s", cache.table, e)
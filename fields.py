@@ -0,0 +1,70 @@
+from django.db import models
+from django.db.models.lookups import IContains
+
+
+class CidrField(models.Field):
+    """
+    IPv4 or IPv6 prefix stored with the Postgres cidr type. Values are
+    strings (e.g. '8.8.8.0/24'). Besides exact and in lookups, the field
+    supports:
+        contains: prefixes covering the given prefix or IP address (>>=)
+        contained_by: the given prefix and its more-specifics (<<=)
+    Both can use a GiST index with the inet_ops operator class.
+    """
+    description = "IP prefix"
+
+    def db_type(self, connection):
+        return 'cidr'
+
+    def to_python(self, value):
+        if value is None:
+            return value
+        return str(value)
+
+    def from_db_value(self, value, expression, connection):
+        return value
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        if value is None:
+            return value
+        return str(value)
+
+
+class NetworkLookup(models.Lookup):
+    operator = None
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return '%s %s %s::inet' % (lhs, self.operator, rhs), lhs_params + rhs_params
+
+
+@CidrField.register_lookup
+class NetworkContains(NetworkLookup):
+    lookup_name = 'contains'
+    operator = '>>='
+
+
+@CidrField.register_lookup
+class NetworkContainedBy(NetworkLookup):
+    lookup_name = 'contained_by'
+    operator = '<<='
+
+
+class SearchCharField(models.CharField):
+    """
+    CharField searched by substring. The icontains lookup is done with ILIKE
+    instead of UPPER(...) LIKE UPPER(...), so it can use a pg_trgm index
+    (gin_trgm_ops) on the column.
+    """
+
+
+@SearchCharField.register_lookup
+class TrigramIContains(IContains):
+
+    def as_sql(self, compiler, connection):
+        # Plain column, without the UPPER() cast added for icontains
+        lhs, lhs_params = models.Lookup.process_lhs(self, compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return '%s ILIKE %s' % (lhs, rhs), lhs_params + rhs_params
@@ -0,0 +1,352 @@
+"""
+Bulk loading of IHR results (CSV or Parquet files) into the database.
+
+Files are streamed to a temporary staging table with COPY FROM STDIN, then
+foreign keys (ASN, Country, Atlas_location) are resolved with set-based
+queries, creating missing ASN/Country/Atlas_location rows, and rows are
+merged into the target table. Each file is loaded in one transaction.
+
+Rows are upserted on the natural key of the target table (its unique
+constraint) so loading the same data again updates rows instead of
+duplicating them. upsert() provides the same for rows built in Python.
+"""
+import csv
+import io
+import logging
+import time
+
+import redis
+from django.db import connection, models, transaction
+from psycopg2.extras import execute_values
+
+from .querycache import bump_version, bump_model_version
+from .surrogate import purge, purge_keys
+from .models import ASN, Country, Atlas_location, Prefix_status, Hegemony, Hegemony_prefix, Atlas_delay
+
+logger = logging.getLogger(__name__)
+
+STAGE = 'ihr_stage'
+
+
+def natural_key(model):
+    """Return the columns of the model unique constraint"""
+    for constraint in model._meta.constraints:
+        if isinstance(constraint, models.UniqueConstraint):
+            return [model._meta.get_field(name).column for name in constraint.fields]
+    raise ValueError('{} has no unique constraint'.format(model.__name__))
+
+
+def on_conflict_update(model, columns):
+    """ON CONFLICT clause updating the given columns of existing rows"""
+    key = natural_key(model)
+    updates = ', '.join('{0} = EXCLUDED.{0}'.format(col) for col in columns
+            if col not in key and col != model._meta.pk.column)
+    return 'ON CONFLICT ({}) DO UPDATE SET {}'.format(', '.join(key), updates)
+
+
+def upsert(model, rows, batch_size=10000):
+    """
+    Insert rows (dictionaries keyed by column names, e.g. asn_id) in the
+    model table, rows with an existing natural key are updated. Return the
+    number of inserted or updated rows.
+    """
+    table = model._meta.db_table
+    key = natural_key(model)
+    pk = model._meta.pk
+    nb_rows = 0
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        batch = {}
+        for row in rows:
+            # A statement cannot update the same row twice, keep the last one
+            batch[tuple(row[col] for col in key)] = row
+            if len(batch) >= batch_size:
+                nb_rows += _upsert_batch(cursor, table, model, pk, list(batch.values()))
+                batch = {}
+        if batch:
+            nb_rows += _upsert_batch(cursor, table, model, pk, list(batch.values()))
+
+    bump_model_version(model)
+    return nb_rows
+
+
+def _upsert_batch(cursor, table, model, pk, rows):
+    columns = [col for col in rows[0] if col != pk.column]
+    values = ', '.join(columns)
+    # VALUES are typed as text, cast them to the column types
+    fields = {field.column: field for field in model._meta.concrete_fields}
+    casts = ', '.join('{}::{}'.format(col, fields[col].db_type(connection)) for col in columns)
+
+    if isinstance(pk, models.AutoField):
+        select = casts
+    else:
+        # Primary key not generated by the database (e.g. Hegemony_prefix)
+        cursor.execute('LOCK TABLE {} IN SHARE ROW EXCLUSIVE MODE'.format(table))
+        select = '(SELECT COALESCE(MAX({pk}), 0) FROM {table}) + row_number() OVER (), {casts}'.format(
+                pk=pk.column, table=table, casts=casts)
+        values = '{}, {}'.format(pk.column, values)
+
+    sql = 'INSERT INTO {table} ({values}) SELECT {select} FROM (VALUES %s) AS v ({columns}) {conflict}'.format(
+            table=table, values=values, select=select, columns=', '.join(columns),
+            conflict=on_conflict_update(model, columns))
+    execute_values(cursor.cursor, sql, [[row[col] for col in columns] for row in rows],
+            page_size=len(rows))
+    return len(rows)
+
+
+class Dataset:
+    """
+    Base class for loadable datasets. Subclasses define the target model, the
+    columns expected in input files, and the SQL resolving foreign keys and
+    merging staged rows.
+    """
+    model = None
+    # Columns of input files and their SQL types
+    columns = {}
+
+    @property
+    def table(self):
+        return self.model._meta.db_table
+
+    def create_stage(self, cursor):
+        cols = ', '.join('{} {}'.format(name, type) for name, type in self.columns.items())
+        cursor.execute('CREATE TEMPORARY TABLE {} ({}) ON COMMIT DROP'.format(STAGE, cols))
+
+    def copy(self, cursor, stream):
+        """Copy CSV data to the staging table, the first line must be the header"""
+        header = next(csv.reader([stream.readline()]))
+        unknown = set(header) - set(self.columns)
+        missing = set(self.columns) - set(header)
+        if unknown or missing:
+            raise ValueError('Invalid header, unknown columns: {}, missing columns: {}'.format(
+                ', '.join(sorted(unknown)) or None, ', '.join(sorted(missing)) or None))
+
+        # Empty fields are NULL in CSV, text columns get empty strings instead
+        options = 'FORMAT csv'
+        text = [name for name in header if self.columns[name].startswith(('varchar', 'text'))]
+        if text:
+            options += ', FORCE_NOT_NULL ({})'.format(', '.join(text))
+
+        # Use the raw psycopg2 cursor, Django's wrapper has no copy_expert()
+        cursor.cursor.copy_expert(
+                'COPY {} ({}) FROM STDIN WITH ({})'.format(STAGE, ', '.join(header), options),
+                stream)
+
+    def resolve(self, cursor):
+        """Create missing dimension rows, return the list of modified tables"""
+        return []
+
+    def days(self, cursor):
+        """Return the days of staged rows"""
+        cursor.execute('SELECT DISTINCT timebin::date FROM {}'.format(STAGE))
+        return sorted(row[0] for row in cursor.fetchall())
+
+    def merge(self, cursor):
+        """Insert staged rows in the target table, return the number of rows"""
+        raise NotImplementedError
+
+
+def create_missing_asns(cursor, columns):
+    """Create ASN rows for numbers found in the given staging columns"""
+    numbers = ' UNION '.join('SELECT {} AS number FROM {}'.format(col, STAGE) for col in columns)
+    cursor.execute("""
+        INSERT INTO {asn} (number, name, tartiflette, disco, ashash)
+        SELECT s.number, '', false, false, false FROM ({numbers}) AS s
+        WHERE NOT EXISTS (SELECT 1 FROM {asn} a WHERE a.number = s.number)
+        """.format(asn=ASN._meta.db_table, numbers=numbers))
+    return [ASN._meta.db_table] if cursor.rowcount > 0 else []
+
+
+class HegemonyDataset(Dataset):
+    model = Hegemony
+    columns = {
+        'timebin': 'timestamptz',
+        'originasn': 'bigint',
+        'asn': 'bigint',
+        'hege': 'double precision',
+        'af': 'integer',
+    }
+
+    def resolve(self, cursor):
+        return create_missing_asns(cursor, ['originasn', 'asn'])
+
+    def merge(self, cursor):
+        cursor.execute("""
+            INSERT INTO {table} (timebin, originasn_id, asn_id, hege, af)
+            SELECT DISTINCT ON (timebin, originasn, asn, af)
+                timebin, originasn, asn, hege, af FROM {stage}
+            {conflict}
+            """.format(table=self.table, stage=STAGE,
+                conflict=on_conflict_update(self.model, ['hege'])))
+        return cursor.rowcount
+
+
+class HegemonyPrefixDataset(Dataset):
+    model = Hegemony_prefix
+    columns = {
+        'timebin': 'timestamptz',
+        'prefix': 'cidr',
+        'originasn': 'bigint',
+        'country': 'varchar(4)',
+        'asn': 'bigint',
+        'hege': 'double precision',
+        'af': 'integer',
+        'visibility': 'double precision',
+        'rpki_status': 'varchar(32)',
+        'irr_status': 'varchar(32)',
+        'delegated_prefix_status': 'varchar(32)',
+        'delegated_asn_status': 'varchar(32)',
+        'descr': 'varchar(64)',
+        'moas': 'boolean',
+    }
+    # Columns stored as Prefix_status codes
+    status_columns = ('rpki_status', 'irr_status', 'delegated_prefix_status', 'delegated_asn_status')
+
+    def resolve(self, cursor):
+        modified = create_missing_asns(cursor, ['originasn', 'asn'])
+
+        cursor.execute("""
+            INSERT INTO {country} (code, name, tartiflette, disco)
+            SELECT DISTINCT s.country, s.country, false, false FROM {stage} s
+            WHERE NOT EXISTS (SELECT 1 FROM {country} c WHERE c.code = s.country)
+            """.format(country=Country._meta.db_table, stage=STAGE))
+        if cursor.rowcount > 0:
+            modified.append(Country._meta.db_table)
+
+        # Status codes are not generated by the database
+        cursor.execute('LOCK TABLE {} IN SHARE ROW EXCLUSIVE MODE'.format(Prefix_status._meta.db_table))
+        cursor.execute("""
+            INSERT INTO {status} (id, name)
+            SELECT (SELECT COALESCE(MAX(id), 0) FROM {status}) + row_number() OVER (), s.name
+            FROM ({names}) AS s
+            WHERE NOT EXISTS (SELECT 1 FROM {status} st WHERE st.name = s.name)
+            """.format(status=Prefix_status._meta.db_table,
+                names=' UNION '.join('SELECT {} AS name FROM {}'.format(col, STAGE)
+                    for col in self.status_columns)))
+        if cursor.rowcount > 0:
+            modified.append(Prefix_status._meta.db_table)
+
+        return modified
+
+    def merge(self, cursor):
+        # Hegemony_prefix ids are not generated by the database
+        cursor.execute('LOCK TABLE {} IN SHARE ROW EXCLUSIVE MODE'.format(self.table))
+        cursor.execute("""
+            INSERT INTO {table} (id, timebin, prefix, originasn_id, country_id, asn_id,
+                hege, af, visibility, rpki_status_id, irr_status_id, delegated_prefix_status_id,
+                delegated_asn_status_id, descr, moas)
+            SELECT (SELECT COALESCE(MAX(id), 0) FROM {table}) + row_number() OVER (),
+                s.timebin, s.prefix, s.originasn, s.country, s.asn, s.hege, s.af, s.visibility,
+                rs.id, irs.id, dps.id, das.id, s.descr, s.moas
+            FROM (SELECT DISTINCT ON (timebin, prefix, originasn, asn, af) * FROM {stage}) AS s
+            JOIN {status} rs ON rs.name = s.rpki_status
+            JOIN {status} irs ON irs.name = s.irr_status
+            JOIN {status} dps ON dps.name = s.delegated_prefix_status
+            JOIN {status} das ON das.name = s.delegated_asn_status
+            {conflict}
+            """.format(table=self.table, stage=STAGE, status=Prefix_status._meta.db_table,
+                conflict=on_conflict_update(self.model, ['country_id', 'hege', 'visibility',
+                    'rpki_status_id', 'irr_status_id', 'delegated_prefix_status_id',
+                    'delegated_asn_status_id', 'descr', 'moas'])))
+        return cursor.rowcount
+
+
+class AtlasDelayDataset(Dataset):
+    model = Atlas_delay
+    columns = {
+        'timebin': 'timestamptz',
+        'startpoint_type': 'varchar(4)',
+        'startpoint_name': 'varchar(255)',
+        'startpoint_af': 'integer',
+        'endpoint_type': 'varchar(4)',
+        'endpoint_name': 'varchar(255)',
+        'endpoint_af': 'integer',
+        'median': 'double precision',
+        'nbtracks': 'integer',
+        'nbprobes': 'integer',
+        'entropy': 'double precision',
+        'hop': 'integer',
+        'nbrealrtts': 'integer',
+    }
+
+    def resolve(self, cursor):
+        cursor.execute("""
+            INSERT INTO {location} (type, name, af)
+            SELECT s.type, s.name, s.af FROM (
+                SELECT startpoint_type AS type, startpoint_name AS name, startpoint_af AS af FROM {stage}
+                UNION
+                SELECT endpoint_type, endpoint_name, endpoint_af FROM {stage}
+                ) AS s
+            WHERE NOT EXISTS (SELECT 1 FROM {location} l
+                WHERE l.type = s.type AND l.name = s.name AND l.af = s.af)
+            """.format(location=Atlas_location._meta.db_table, stage=STAGE))
+        return [Atlas_location._meta.db_table] if cursor.rowcount > 0 else []
+
+    def merge(self, cursor):
+        cursor.execute("""
+            INSERT INTO {table} (timebin, startpoint_id, endpoint_id, median, nbtracks,
+                nbprobes, entropy, hop, nbrealrtts)
+            SELECT DISTINCT ON (s.timebin, sp.id, ep.id)
+                s.timebin, sp.id, ep.id, s.median, s.nbtracks, s.nbprobes, s.entropy,
+                s.hop, s.nbrealrtts
+            FROM {stage} s
+            JOIN {location} sp ON sp.type = s.startpoint_type
+                AND sp.name = s.startpoint_name AND sp.af = s.startpoint_af
+            JOIN {location} ep ON ep.type = s.endpoint_type
+                AND ep.name = s.endpoint_name AND ep.af = s.endpoint_af
+            {conflict}
+            """.format(table=self.table, stage=STAGE, location=Atlas_location._meta.db_table,
+                conflict=on_conflict_update(self.model, ['median', 'nbtracks', 'nbprobes',
+                    'entropy', 'hop', 'nbrealrtts'])))
+        return cursor.rowcount
+
+
+DATASETS = {
+    'hegemony': HegemonyDataset(),
+    'hegemony_prefix': HegemonyPrefixDataset(),
+    'atlas_delay': AtlasDelayDataset(),
+}
+
+
+def open_csv(path):
+    """Return a CSV text stream for the given CSV or Parquet file"""
+    if path.endswith('.parquet'):
+        # pandas (and pyarrow) are only needed for Parquet files
+        import pandas as pd
+
+        stream = io.StringIO()
+        pd.read_parquet(path).to_csv(stream, index=False)
+        stream.seek(0)
+        return stream
+
+    return open(path, newline='')
+
+
+def load(dataset, path):
+    """
+    Load the given file into the dataset table. Return the number of
+    inserted rows and the elapsed time in seconds.
+    """
+    start = time.monotonic()
+    with open_csv(path) as stream, transaction.atomic(), connection.cursor() as cursor:
+        dataset.create_stage(cursor)
+        dataset.copy(cursor, stream)
+        modified = dataset.resolve(cursor)
+        days = dataset.days(cursor)
+        nb_rows = dataset.merge(cursor)
+
+    # Notify workers once the transaction is committed. Data is loaded even
+    # if Redis is not reachable, cached queries and responses may then be
+    # stale until they expire.
+    for table in modified + [dataset.table]:
+        try:
+            bump_version(table)
+        except redis.RedisError as e:
+            logger.warning('Could not bump the version of %s: %s', table, e)
+    # Cached responses containing loaded days are outdated
+    try:
+        purge(purge_keys(dataset.model, 'day', [day.isoformat() for day in days]))
+    except redis.RedisError as e:
+        logger.warning('Could not purge responses of %s: %s', dataset.table, e)
+
+    return nb_rows, time.monotonic() - start
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from ...ingest import DATASETS, load
+
+
+class Command(BaseCommand):
+    help = "Load CSV or Parquet files into IHR tables using COPY."
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(DATASETS),
+                help='Table where data is loaded.')
+        parser.add_argument('files', nargs='+',
+                help='CSV or Parquet files, CSV files must start with a header.')
+
+    def handle(self, *args, **options):
+        dataset = DATASETS[options['dataset']]
+
+        total_rows = 0
+        total_time = 0
+        for path in options['files']:
+            try:
+                nb_rows, elapsed = load(dataset, path)
+            except (OSError, ValueError, ImportError, DatabaseError) as e:
+                raise CommandError('Could not load {}: {}'.format(path, e))
+
+            total_rows += nb_rows
+            total_time += elapsed
+            self.stdout.write('{}: {} rows in {:.1f}s ({:.0f} rows/sec)'.format(
+                path, nb_rows, elapsed, nb_rows / max(elapsed, 1e-6)))
+
+        self.stdout.write(self.style.SUCCESS('Loaded {} rows in {:.1f}s ({:.0f} rows/sec)'.format(
+            total_rows, total_time, total_rows / max(total_time, 1e-6))))
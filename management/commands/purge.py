@@ -0,0 +1,37 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from ...surrogate import DIMENSIONS, has_field, purge, purge_keys
+
+# Dimensions used to select purged responses, the first given one is used
+PURGE_DIMENSIONS = ('day',) + DIMENSIONS
+
+
+class Command(BaseCommand):
+    help = "Purge cached responses (local cache and CDN) containing modified data."
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset',
+                help='Model name of the modified table (e.g. hegemony, atlas_delay).')
+        parser.add_argument('--day', action='append', default=[],
+                help='Modified day (YYYY-MM-DD), can be repeated.')
+        for dimension in DIMENSIONS:
+            parser.add_argument('--' + dimension, action='append', default=[],
+                    help='Modified {}, can be repeated.'.format(dimension))
+
+    def handle(self, *args, **options):
+        try:
+            model = apps.get_model('ihr', options['dataset'])
+        except LookupError:
+            raise CommandError('Unknown dataset {}'.format(options['dataset']))
+
+        # Responses are tagged with each dimension, purging by one of them
+        # is enough. Without dimension all responses of the dataset are purged.
+        dimension = next((d for d in PURGE_DIMENSIONS if options[d]), None)
+        if dimension is not None and not has_field(model, 'timebin' if dimension == 'day' else dimension):
+            raise CommandError('{} has no {} dimension'.format(options['dataset'], dimension))
+
+        keys = purge_keys(model, dimension, options[dimension] if dimension else ())
+        nb_entries = purge(keys)
+        self.stdout.write(self.style.SUCCESS('Purged keys {} ({} cached responses)'.format(
+            ' '.join(keys), nb_entries)))
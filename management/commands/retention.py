@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from ...archive import ARCHIVED_MODELS, RETENTION_DAYS, archive
+
+
+class Command(BaseCommand):
+    help = "Move rows older than the retention horizon to Parquet files."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', action='append', dest='datasets',
+                choices=sorted(ARCHIVED_MODELS),
+                help='Table to archive, can be repeated (default: all).')
+        parser.add_argument('--days', type=int, default=RETENTION_DAYS,
+                help='Number of days of data kept in the database.')
+
+    def handle(self, *args, **options):
+        datasets = options['datasets'] or sorted(ARCHIVED_MODELS)
+
+        for name in datasets:
+            total_rows = 0
+            try:
+                for day, nb_rows in archive(ARCHIVED_MODELS[name], options['days']):
+                    total_rows += nb_rows
+                    self.stdout.write('{} {}: {} rows archived'.format(name, day, nb_rows))
+            except (OSError, ImportError, DatabaseError) as e:
+                raise CommandError('Could not archive {}: {}'.format(name, e))
+
+            self.stdout.write(self.style.SUCCESS('{}: {} rows archived'.format(name, total_rows)))
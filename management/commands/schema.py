@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.urls import set_script_prefix
+
+from ...schema import SCHEMA_DIR, generate, store
+
+
+class Command(BaseCommand):
+    help = "Generate the OpenAPI schema served at /swagger.json and /swagger.yaml."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--script-prefix', default='/',
+                help='Path where the application is mounted by the web server (e.g. /ihr/api/), '
+                     'used for the basePath of the schema.')
+
+    def handle(self, *args, **options):
+        set_script_prefix(options['script_prefix'])
+        documents = generate()
+        store(documents)
+        for format, content in sorted(documents.items()):
+            self.stdout.write('swagger{}: {} bytes'.format(format, len(content)))
+        self.stdout.write(self.style.SUCCESS('Schema stored in {}'.format(SCHEMA_DIR)))
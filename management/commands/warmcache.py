@@ -0,0 +1,36 @@
+import redis
+from django.core.management.base import BaseCommand, CommandError
+
+from ...warming import configured_urls, log_urls, top_urls, warm
+
+
+class Command(BaseCommand):
+    help = "Fill the response cache with the most requested URLs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=100,
+                help='Number of most requested URLs to warm.')
+        parser.add_argument('--days', type=int, default=1,
+                help='Number of days of hit counts used to find the most requested URLs.')
+        parser.add_argument('--log', action='append', dest='logs', default=[],
+                help='Access log (common or combined format) used instead of hit counts, can be repeated.')
+
+    def handle(self, *args, **options):
+        try:
+            if options['logs']:
+                requested = log_urls(options['logs'], options['top'])
+            else:
+                requested = top_urls(options['top'], options['days'])
+        except (OSError, redis.RedisError) as e:
+            raise CommandError('Could not find the most requested URLs: {}'.format(e))
+
+        # Configured URLs first, without duplicates
+        urls = list(dict.fromkeys(configured_urls() + requested))
+
+        failed = 0
+        for url, status, elapsed in warm(urls):
+            if status != 200:
+                failed += 1
+            self.stdout.write('{}: {} in {:.2f}s'.format(url, status, elapsed))
+
+        self.stdout.write(self.style.SUCCESS('Warmed {} URLs ({} failed)'.format(len(urls), failed)))
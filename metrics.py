@@ -0,0 +1,181 @@
+"""
+Process-local counters and gauges used to monitor the API internals (e.g.
+database connection pool, cache layers).
+
+Each worker periodically adds its counter increments to a Redis hash and
+stores its gauges in a Redis hash expiring with the worker, so render()
+returns metrics aggregated over all workers in the Prometheus text format.
+Counters are labelled with the endpoint of the current request, set by
+MetricsMiddleware.
+"""
+import json
+import os
+import socket
+import threading
+import time
+from collections import defaultdict
+
+import redis
+from django.urls import Resolver404, resolve
+
+_lock = threading.Lock()
+_counters = defaultdict(float)
+_gauges = {}
+_local = threading.local()
+
+COUNTERS_KEY = 'ihr:metrics:counters'
+GAUGES_KEY = 'ihr:metrics:gauges:{}'
+# Seconds between two flushes of a worker metrics to Redis
+FLUSH_INTERVAL = 10
+WORKER = '{}-{}'.format(socket.gethostname(), os.getpid())
+
+# Counter values already added to Redis
+_flushed = defaultdict(float)
+_last_flush = time.monotonic()
+
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items())))
+
+
+def inc(name, value=1, **labels):
+    """Increment the counter identified by name and labels"""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] += value
+
+
+def set_gauge(name, value, **labels):
+    """Set the current value of a gauge"""
+    _gauges[_key(name, labels)] = value
+
+
+def snapshot():
+    """Return a copy of all counters and gauges"""
+    with _lock:
+        return dict(_counters), dict(_gauges)
+
+
+def endpoint():
+    """Return the name of the endpoint of the current request"""
+    return getattr(_local, 'endpoint', None) or 'none'
+
+
+############ Aggregation ##########
+def _conn():
+    # Imported here as const imports DRF and this module is imported by the
+    # database backend
+    from .const import POOL
+    return redis.Redis(connection_pool=POOL)
+
+
+def _field(key):
+    return json.dumps([key[0], list(key[1])])
+
+
+def flush():
+    """Add counter increments and current gauges of this worker to Redis"""
+    global _last_flush
+    # Do not retry on every request if Redis is not reachable
+    _last_flush = time.monotonic()
+    counters, gauges = snapshot()
+    deltas = {key: value - _flushed[key] for key, value in counters.items() if value != _flushed[key]}
+
+    pipeline = _conn().pipeline(transaction=False)
+    for key, delta in deltas.items():
+        pipeline.hincrbyfloat(COUNTERS_KEY, _field(key), delta)
+    if gauges:
+        gauges_key = GAUGES_KEY.format(WORKER)
+        pipeline.delete(gauges_key)
+        pipeline.hset(gauges_key, mapping={_field(key): value for key, value in gauges.items()})
+        pipeline.expire(gauges_key, 6 * FLUSH_INTERVAL)
+    pipeline.execute()
+
+    with _lock:
+        for key, delta in deltas.items():
+            _flushed[key] += delta
+
+
+def maybe_flush():
+    if time.monotonic() - _last_flush > FLUSH_INTERVAL:
+        flush()
+
+
+def aggregated():
+    """Return counters and gauges of all workers, gauges labelled by worker"""
+    conn = _conn()
+    counters = {}
+    for field, value in conn.hgetall(COUNTERS_KEY).items():
+        name, labels = json.loads(field)
+        counters[(name, tuple(tuple(label) for label in labels))] = float(value)
+
+    gauges = {}
+    for gauges_key in conn.scan_iter(GAUGES_KEY.format('*')):
+        worker = gauges_key[len(GAUGES_KEY.format('')):]
+        for field, value in conn.hgetall(gauges_key).items():
+            name, labels = json.loads(field)
+            labels = tuple(sorted([tuple(label) for label in labels] + [('worker', worker)]))
+            gauges[(name, labels)] = float(value)
+
+    return counters, gauges
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render(counters, gauges):
+    """Return metrics in the Prometheus text exposition format"""
+    lines = []
+    for kind, metrics in (('counter', counters), ('gauge', gauges)):
+        names = defaultdict(list)
+        for (name, labels), value in metrics.items():
+            names[name].append((labels, value))
+
+        for name in sorted(names):
+            lines.append('# TYPE {} {}'.format(name, kind))
+            for labels, value in sorted(names[name]):
+                text = ','.join('{}="{}"'.format(label, _escape(v)) for label, v in labels)
+                lines.append('{}{} {}'.format(name, '{' + text + '}' if text else '', repr(float(value))))
+
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """
+    Set the endpoint label of metrics, count response cache hits and misses
+    with the time and size of responses filling the cache.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            _local.endpoint = resolve(request.path_info).url_name
+        except Resolver404:
+            _local.endpoint = None
+
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+
+            # Set by FetchFromCacheMiddleware for cacheable requests
+            cached = getattr(request, '_cache_update_cache', None)
+            if cached is not None and request.method in ('GET', 'HEAD'):
+                name = endpoint()
+                if cached:
+                    inc('ihr_response_cache_requests_total', endpoint=name, result='miss')
+                    inc('ihr_response_cache_fill_seconds_total', time.perf_counter() - start, endpoint=name)
+                    if not response.streaming:
+                        inc('ihr_response_cache_fill_bytes_total', len(response.content), endpoint=name)
+                else:
+                    inc('ihr_response_cache_requests_total', endpoint=name, result='hit')
+            return response
+        finally:
+            _local.endpoint = None
+            try:
+                maybe_flush()
+            except redis.RedisError:
+                # Metrics are not worth failing a request
+                pass
@@ -0,0 +1,46 @@
+from django.db import migrations, models
+
+# Rows with the same natural key, only the last inserted one (highest id) is
+# kept. Deleted duplicates are not restored by the reverse migration.
+DELETE_DUPLICATES = """
+DELETE FROM {table} WHERE id IN (
+    SELECT id FROM (
+        SELECT id, row_number() OVER (PARTITION BY {key} ORDER BY id DESC) AS key_rank
+        FROM {table}) AS keys
+    WHERE key_rank > 1)
+"""
+
+
+def delete_duplicates(table, key):
+    return migrations.RunSQL(DELETE_DUPLICATES.format(table=table, key=key),
+            reverse_sql=migrations.RunSQL.noop)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ihr', '0043_auto_20220510_1402'),
+    ]
+
+    operations = [
+        delete_duplicates('ihr_delay', 'timebin, asn_id'),
+        migrations.AddConstraint(
+            model_name='delay',
+            constraint=models.UniqueConstraint(fields=['timebin', 'asn'], name='unique_delay'),
+        ),
+        delete_duplicates('ihr_hegemony', 'timebin, originasn_id, asn_id, af'),
+        migrations.AddConstraint(
+            model_name='hegemony',
+            constraint=models.UniqueConstraint(fields=['timebin', 'originasn', 'asn', 'af'], name='unique_hegemony'),
+        ),
+        delete_duplicates('ihr_hegemony_prefix', 'timebin, prefix, originasn_id, asn_id, af'),
+        migrations.AddConstraint(
+            model_name='hegemony_prefix',
+            constraint=models.UniqueConstraint(fields=['timebin', 'prefix', 'originasn', 'asn', 'af'], name='unique_hegemony_prefix'),
+        ),
+        delete_duplicates('ihr_atlas_delay', 'timebin, startpoint_id, endpoint_id'),
+        migrations.AddConstraint(
+            model_name='atlas_delay',
+            constraint=models.UniqueConstraint(fields=['timebin', 'startpoint', 'endpoint'], name='unique_atlas_delay'),
+        ),
+    ]
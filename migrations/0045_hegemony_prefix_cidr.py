@@ -0,0 +1,25 @@
+import django.contrib.postgres.indexes
+from django.db import migrations
+import ihr.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ihr', '0044_natural_keys'),
+    ]
+
+    operations = [
+        # The column is converted with USING prefix::cidr (the cast fails for
+        # prefixes with host bits set) and its varchar_pattern_ops index is
+        # dropped
+        migrations.AlterField(
+            model_name='hegemony_prefix',
+            name='prefix',
+            field=ihr.fields.CidrField(db_index=True, help_text='Monitored prefix (IPv4 or IPv6).'),
+        ),
+        migrations.AddIndex(
+            model_name='hegemony_prefix',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['prefix'], name='ihr_hegemony_prefix_gist', opclasses=['inet_ops']),
+        ),
+    ]
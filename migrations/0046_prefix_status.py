@@ -0,0 +1,96 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+STATUSES = [
+    ('rpki_status', 'Route origin validation state for the monitored prefix and origin AS using RPKI.'),
+    ('irr_status', 'Route origin validation state for the monitored prefix and origin AS using IRR.'),
+    ('delegated_prefix_status', "Status of the monitored prefix in the RIR's delegated stats. Status other than 'assigned' are usually considered as bogons."),
+    ('delegated_asn_status', "Status of the origin ASN in the RIR's delegated stats. Status other than 'assigned' are usually considered as bogons."),
+]
+
+# Statuses found in existing data, numbered in alphabetical order
+INSERT_STATUSES = """
+INSERT INTO ihr_prefix_status (id, name)
+    SELECT row_number() OVER (ORDER BY name), name FROM (
+        SELECT rpki_status_name AS name FROM ihr_hegemony_prefix
+        UNION SELECT irr_status_name FROM ihr_hegemony_prefix
+        UNION SELECT delegated_prefix_status_name FROM ihr_hegemony_prefix
+        UNION SELECT delegated_asn_status_name FROM ihr_hegemony_prefix) AS statuses
+"""
+
+
+# All status columns are set by a single update, the table is rewritten once
+def copy_statuses(source, target):
+    """Set the <status>_<target> columns from the <status>_<source> columns"""
+    aliases = ['s{}'.format(i) for i in range(len(STATUSES))]
+    return """
+UPDATE ihr_hegemony_prefix h SET {}
+    FROM {}
+    WHERE {}
+""".format(
+        ', '.join('{}_{} = {}.{}'.format(name, target, alias, target)
+            for (name, _), alias in zip(STATUSES, aliases)),
+        ', '.join('ihr_prefix_status {}'.format(alias) for alias in aliases),
+        ' AND '.join('{}.{} = h.{}_{}'.format(alias, source, name, source)
+            for (name, _), alias in zip(STATUSES, aliases)))
+
+
+def status_field(help_text, null=False):
+    return models.ForeignKey(db_index=False, help_text=help_text, null=null,
+            on_delete=django.db.models.deletion.PROTECT, related_name='+', to='ihr.Prefix_status')
+
+
+class Migration(migrations.Migration):
+
+    # Rows updated in a transaction keep their deferred foreign key checks
+    # pending, Postgres then refuses to alter the table in the same
+    # transaction
+    atomic = False
+
+    dependencies = [
+        ('ihr', '0045_hegemony_prefix_cidr'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Prefix_status',
+            fields=[
+                ('id', models.SmallIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(help_text='RPKI, IRR, or RIR delegated stats status (e.g. Valid, Invalid, NotFound, assigned).', max_length=32, unique=True)),
+            ],
+            options={
+                'base_manager_name': 'objects',
+            },
+        ),
+    ] + [
+        migrations.RenameField(
+            model_name='hegemony_prefix',
+            old_name=name,
+            new_name=name + '_name',
+        )
+        for name, _ in STATUSES
+    ] + [
+        migrations.RunSQL(INSERT_STATUSES, reverse_sql=migrations.RunSQL.noop),
+    ] + [
+        migrations.AddField(
+            model_name='hegemony_prefix',
+            name=name,
+            field=status_field(help_text, null=True),
+        )
+        for name, help_text in STATUSES
+    ] + [
+        migrations.RunSQL(copy_statuses('name', 'id'), reverse_sql=copy_statuses('id', 'name')),
+    ] + [
+        migrations.AlterField(
+            model_name='hegemony_prefix',
+            name=name,
+            field=status_field(help_text),
+        )
+        for name, help_text in STATUSES
+    ] + [
+        migrations.RemoveField(
+            model_name='hegemony_prefix',
+            name=name + '_name',
+        )
+        for name, _ in STATUSES
+    ]
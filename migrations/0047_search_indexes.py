@@ -0,0 +1,39 @@
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+import ihr.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ihr', '0046_prefix_status'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AlterField(
+            model_name='asn',
+            name='name',
+            field=ihr.fields.SearchCharField(help_text='Name registered for the network.', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='atlas_location',
+            name='name',
+            field=ihr.fields.SearchCharField(help_text='Location identifier. The meaning of values dependend on the location type: <ul><li>type=AS: ASN</li><li>type=CT: city name, region name, country code</li><li>type=PB: Atlas Probe ID</li><li>type=IP: IP version (4 or 6)</li></ul> ', max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='asn',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='ihr_asn_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='atlas_location',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='ihr_atlas_location_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        # Substring search on ASNs (number__contains casts numbers to text),
+        # indexes on expressions are not supported by Django models
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS ihr_asn_number_trgm ON ihr_asn USING gin ((number::text) gin_trgm_ops)',
+            reverse_sql='DROP INDEX IF EXISTS ihr_asn_number_trgm',
+        ),
+    ]
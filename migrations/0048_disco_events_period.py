@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ihr', '0047_search_indexes'),
+    ]
+
+    operations = [
+        # Index on an expression (see models.event_period), these are not
+        # supported by Django models
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS ihr_disco_events_period_gist ON ihr_disco_events USING gist (tstzrange(starttime, GREATEST(starttime, endtime), '[]'))",
+            reverse_sql='DROP INDEX IF EXISTS ihr_disco_events_period_gist',
+        ),
+    ]
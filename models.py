@@ -1,59 +1,72 @@
 from django.db import models
-from django.contrib.postgres.fields import JSONField
+from django.db.models.functions import Greatest
+from django.contrib.postgres.fields import JSONField, DateTimeRangeField
+from django.contrib.postgres.indexes import GinIndex, GistIndex
 from model_utils import Choices
 from django.contrib.auth.models import PermissionsMixin 
 from django.contrib.auth.models import Group, Permission 
 from django.contrib.auth.base_user import AbstractBaseUser 
 from django.contrib.auth.models import BaseUserManager
 
-from caching.base import CachingManager, CachingMixin
+from .querycache import VersionedManager
 
-class ASN(CachingMixin, models.Model):
+from .fields import CidrField, SearchCharField
+
+class ASN(models.Model):
     number = models.BigIntegerField(primary_key=True, help_text='Autonomous System Number (ASN) or IXP ID. Note that IXP ID are negative to avoid colision.')
-    name   = models.CharField(max_length=255, help_text='Name registered for the network.')
+    name   = SearchCharField(max_length=255, help_text='Name registered for the network.')
     tartiflette = models.BooleanField(default=False, help_text='True if participate in link delay and forwarding anomaly analysis.')
     disco = models.BooleanField(default=False, help_text='True if participate in network disconnection analysis.')
     ashash = models.BooleanField(default=False, help_text='True if participate in AS dependency analysis.')
 
-    objects = CachingManager()
+    objects = VersionedManager()
 
     class Meta:
-        base_manager_name = 'objects'  # Attribute name of CachingManager(), above
+        base_manager_name = 'objects'  # Attribute name of VersionedManager(), above
+        # Trigram index for substring search on names (the index on
+        # number::text is created by migration 0047_search_indexes)
+        indexes = [
+            GinIndex(fields=['name'], opclasses=['gin_trgm_ops'], name='ihr_asn_name_trgm'),
+        ]
 
     def __str__(self):
         return "ASN%s %s" % (self.number, self.name)
 
-class Country(CachingMixin, models.Model):
+class Country(models.Model):
     code = models.CharField(max_length=4, primary_key=True)
     name   = models.CharField(max_length=255)
     tartiflette = models.BooleanField(default=False)
     disco = models.BooleanField(default=False)
 
-    objects = CachingManager()
+    objects = VersionedManager()
 
     class Meta:
-        base_manager_name = 'objects'  # Attribute name of CachingManager(), above
+        base_manager_name = 'objects'  # Attribute name of VersionedManager(), above
 
     def __str__(self):
         return "%s (%s)" % (self.name, self.code)
 
 
 # Tartiflette
-class Delay(CachingMixin, models.Model):
+class Delay(models.Model):
     timebin = models.DateTimeField(db_index=True, help_text="Timestamp of reported value.")
     asn = models.ForeignKey(ASN, on_delete=models.CASCADE, help_text="ASN or IXP ID of the monitored network (see number in /network/).")
     magnitude = models.FloatField(default=0.0, help_text="Cumulated link delay deviation. Values close to zero represent usual delays for the network, whereas higher values stand for significant links congestion in the monitored network.  ")
 
-    objects = CachingManager()
+    objects = VersionedManager()
 
     class Meta:
-        base_manager_name = 'objects'  # Attribute name of CachingManager(), above
+        base_manager_name = 'objects'  # Attribute name of VersionedManager(), above
+        # Natural key, prevents duplicate rows when data is loaded again
+        constraints = [
+            models.UniqueConstraint(fields=['timebin', 'asn'], name='unique_delay'),
+        ]
 
     def __str__(self):
         return "%s AS%s" % (self.timebin, self.asn.number)
 
 
-class Delay_alarms(CachingMixin, models.Model):
+class Delay_alarms(models.Model):
     asn = models.ForeignKey(ASN, on_delete=models.CASCADE, db_index=True, help_text="ASN or IXPID of the reported network.")
     timebin = models.DateTimeField(db_index=True, help_text="Timestamp of reported alarm.")
     ip = models.CharField(max_length=64, db_index=True)
@@ -64,17 +77,17 @@ class Delay_alarms(CachingMixin, models.Model):
     nbprobes = models.IntegerField(default=0, help_text="Number of Atlas probes monitoring this link at the reported time window.")
     msm_prb_ids = JSONField(default=None, null=True, help_text="List of Atlas measurement IDs and probe IDs used to compute this alarm.")
 
-    objects = CachingManager()
+    objects = VersionedManager()
 
     class Meta:
-        base_manager_name = 'objects'  # Attribute name of CachingManager(), above
+        base_manager_name = 'objects'  # Attribute name of VersionedManager(), above
 
     def __str__(self):
         return "%s AS%s" % (self.timebin, self.asn.number)
 
 
 
-class Forwarding_alarms(CachingMixin, models.Model):
+class Forwarding_alarms(models.Model):
     asn = models.ForeignKey(ASN, on_delete=models.CASCADE, db_index=True, help_text="ASN or IXPID of the reported network.")
     timebin = models.DateTimeField(db_index=True, help_text="Timestamp of reported alarm.")
     ip = models.CharField(max_length=64, db_index=True, help_text="Reported IP address, this IP address is seen an unusually high or low number of times in Atlas traceroutes.")
@@ -84,24 +97,24 @@ class Forwarding_alarms(CachingMixin, models.Model):
     previoushop   = models.CharField(max_length=64, help_text="Last observed IP hop on the usual path.")
     msm_prb_ids = JSONField(default=None, null=True, help_text="List of Atlas measurement IDs and probe IDs used to compute this alarm.")
 
-    objects = CachingManager()
+    objects = VersionedManager()
 
     class Meta:
-        base_manager_name = 'objects'  # Attribute name of CachingManager(), above
+        base_manager_name = 'objects'  # Attribute name of VersionedManager(), above
 
     def __str__(self):
         return "%s AS%s %s" % (self.timebin, self.asn.number, self.ip)
 
 
-class Forwarding(CachingMixin, models.Model):
+class Forwarding(models.Model):
     timebin = models.DateTimeField(db_index=True, help_text="Timestamp of reported value.")
     asn = models.ForeignKey(ASN, on_delete=models.CASCADE, help_text="ASN or IXP ID of the monitored network (see number in /network/).")
     magnitude = models.FloatField(default=0.0, help_text="Cumulated link delay deviation. Values close to zero represent usual delays for the network, whereas higher values stand for significant links congestion in the monitored network.  ")
 
-    objects = CachingManager()
+    objects = VersionedManager()
 
     class Meta:
-        base_manager_name = 'objects'  # Attribute name of CachingManager(), above
+        base_manager_name = 'objects'  # Attribute name of VersionedManager(), above
 
     def __str__(self):
         return "%s AS%s" % (self.timebin, self.asn.number)
@@ -109,7 +122,7 @@ class Forwarding(CachingMixin, models.Model):
 
 
 # Disco
-class Disco_events(CachingMixin, models.Model):
+class Disco_events(models.Model):
     mongoid = models.CharField(max_length=24, default="000000000000000000000000", db_index=True)
     streamtype = models.CharField(max_length=10, help_text="Granularity of the detected event. The possible values are asn, country, admin1, and admin2. Admin1 represents a wider area than admin2, the exact definition might change from one country to another. For example 'California, US' is an admin1 stream and 'San Francisco County, California, US' is an admin2 stream.")
     streamname = models.CharField(max_length=128, help_text="Name of the topological (ASN) or geographical area where the network disconnection happened.")
@@ -120,13 +133,22 @@ class Disco_events(CachingMixin, models.Model):
     totalprobes = models.IntegerField(default=0, help_text="Total number of Atlas probes active in the reported stream (ASN, Country, or geographical area).")
     ongoing = models.BooleanField(default=False, help_text="Deprecated, this value is unused")
 
-    objects = CachingManager()
+    objects = VersionedManager()
 
     class Meta:
         index_together = ("streamtype", "streamname", "starttime", "endtime")
-        base_manager_name = 'objects'  # Attribute name of CachingManager(), above
+        base_manager_name = 'objects'  # Attribute name of VersionedManager(), above
+
+def event_period():
+    """
+    Period covered by a Disco_events row as a tstzrange (bounds included).
+    Overlap queries (period__overlap) on this expression use the GiST index
+    created by migration 0048_disco_events_period.
+    """
+    return models.Func(models.F('starttime'), Greatest('starttime', 'endtime'), models.Value('[]'),
+            function='tstzrange', output_field=DateTimeRangeField())
 
-class Disco_probes(CachingMixin, models.Model):
+class Disco_probes(models.Model):
     probe_id = models.IntegerField(help_text="Atlas probe ID of disconnected probe." )
     event = models.ForeignKey(Disco_events, on_delete=models.CASCADE, db_index=True, related_name="discoprobes", help_text="ID of the network disconnection event where this probe is reported.")
     starttime = models.DateTimeField(help_text="Probe disconnection time.")
@@ -137,40 +159,43 @@ class Disco_probes(CachingMixin, models.Model):
     lat = models.FloatField(default=0.0, help_text="Latitude of the probe during the network detection as reported by RIPE Altas.")
     lon = models.FloatField(default=0.0, help_text="Longitude of the probe during the network detection as reported by RIPE Altas.")
 
-    objects = CachingManager()
+    objects = VersionedManager()
 
     class Meta:
-        base_manager_name = 'objects'  # Attribute name of CachingManager(), above
+        base_manager_name = 'objects'  # Attribute name of VersionedManager(), above
 
 
-class Hegemony(CachingMixin, models.Model):
+class Hegemony(models.Model):
     timebin = models.DateTimeField(db_index=True, help_text="Timestamp of reported value.")
     originasn = models.ForeignKey(ASN, on_delete=models.CASCADE, related_name="local_graph", db_index=True, help_text="Dependent network, it can be any public ASN. Retrieve all dependencies of a network by setting only this parameter and a timebin.")
     asn = models.ForeignKey(ASN, on_delete=models.CASCADE, db_index=True, help_text="Dependency. Transit network commonly seen in BGP paths towards originasn.")
     hege = models.FloatField(default=0.0, help_text="AS Hegemony is the estimated fraction of paths towards the originasn. The values range between 0 and 1, low values represent a small number of path (low dependency) and values close to 1 represent strong dependencies.")
     af = models.IntegerField(default=0, help_text="Address Family (IP version), values are either 4 or 6.")
 
-    objects = CachingManager()
+    objects = VersionedManager()
 
     class Meta:
-        base_manager_name = 'objects'  # Attribute name of CachingManager(), above
+        base_manager_name = 'objects'  # Attribute name of VersionedManager(), above
+        constraints = [
+            models.UniqueConstraint(fields=['timebin', 'originasn', 'asn', 'af'], name='unique_hegemony'),
+        ]
 
     def __str__(self):
         return "%s originAS%s AS%s %s" % (self.timebin, self.originasn.number, self.asn.number, self.hege)
 
-class HegemonyCone(CachingMixin, models.Model):
+class HegemonyCone(models.Model):
     timebin = models.DateTimeField(db_index=True, help_text="Timestamp of reported value.")
     asn = models.ForeignKey(ASN, on_delete=models.CASCADE, db_index=True, help_text="Autonomous System Number (ASN).")
     conesize = models.IntegerField(default=0, help_text="Number of dependent networks, namely, networks that are reached through the asn, this is similar to CAIDA's customer cone size. The detailed list of all dependent networks is obtained by querying /hegemony/ with parameter asn (e.g /hegemony/?asn=2497&timebin=2020-03-01 gives IIJ's customer networks).")
     af = models.IntegerField(default=0, help_text="Address Family (IP version), values are either 4 or 6.")
 
-    objects = CachingManager()
+    objects = VersionedManager()
 
     class Meta:
         index_together = ("timebin", "asn", "af")
-        base_manager_name = 'objects'  # Attribute name of CachingManager(), above
+        base_manager_name = 'objects'  # Attribute name of VersionedManager(), above
 
-class Hegemony_country(CachingMixin, models.Model):
+class Hegemony_country(models.Model):
     timebin = models.DateTimeField(db_index=True, help_text="Timestamp of reported value.")
     country = models.ForeignKey(Country, on_delete=models.CASCADE, db_index=True, help_text="Monitored country. Retrieve all dependencies of a country by setting only this parameter and a timebin.")
     asn = models.ForeignKey(ASN, on_delete=models.CASCADE, db_index=True, help_text="Dependency. Network commonly seen in BGP paths towards monitored country.")
@@ -180,56 +205,79 @@ class Hegemony_country(CachingMixin, models.Model):
     weightscheme = models.CharField(max_length=16, default="None", help_text="Weighting scheme used for the AS Hegemony calculation.")
     transitonly = models.BooleanField(default=False, help_text="If True, then origin ASNs of BGP path are ignored (focus only on transit networks).")
 
-    objects = CachingManager()
+    objects = VersionedManager()
 
     class Meta:
-        base_manager_name = 'objects'  # Attribute name of CachingManager(), above
+        base_manager_name = 'objects'  # Attribute name of VersionedManager(), above
 
     def __str__(self):
         return "%s %s AS%s %s" % (self.timebin, self.country.name, self.asn.number, self.hege)
 
 
-class Hegemony_prefix(CachingMixin, models.Model):
+class Prefix_status(models.Model):
+    id = models.SmallIntegerField(primary_key=True)
+    name = models.CharField(max_length=32, unique=True, help_text="RPKI, IRR, or RIR delegated stats status (e.g. Valid, Invalid, NotFound, assigned).")
+
+    objects = VersionedManager()
+
+    class Meta:
+        base_manager_name = 'objects'  # Attribute name of VersionedManager(), above
+
+    def __str__(self):
+        return self.name
+
+
+class Hegemony_prefix(models.Model):
     id = models.BigIntegerField(unique=True, primary_key=True)
     timebin = models.DateTimeField(db_index=True, help_text="Timestamp of reported value.")
-    prefix = models.CharField(max_length=64, db_index=True, help_text="Monitored prefix (IPv4 or IPv6).")
+    prefix = CidrField(db_index=True, help_text="Monitored prefix (IPv4 or IPv6).")
     originasn = models.ForeignKey(ASN, on_delete=models.CASCADE, related_name="prefix_originasn", db_index=True, help_text="Network seen as originating the monitored prefix.")
     country = models.ForeignKey(Country, on_delete=models.CASCADE, db_index=True, help_text="Country for the monitored prefix identified by Maxmind's Geolite2 geolocation database.")
     asn = models.ForeignKey(ASN, on_delete=models.CASCADE, related_name="prefix_asn", help_text="Dependency. Network commonly seen in BGP paths towards monitored prefix.")
     hege = models.FloatField(default=0.0, help_text="AS Hegemony is the estimated fraction of paths towards the monitored prefix. The values range between 0 and 1, low values represent a small number of path (low dependency) and values close to 1 represent strong dependencies.")
     af = models.IntegerField(default=0, help_text="Address Family (IP version), values are either 4 or 6.")
     visibility = models.FloatField(default=0.0, help_text="Percentage of BGP peers that see this prefix.")
-    rpki_status = models.CharField(max_length=32, help_text="Route origin validation state for the monitored prefix and origin AS using RPKI.")
-    irr_status = models.CharField(max_length=32, help_text="Route origin validation state for the monitored prefix and origin AS using IRR.")
-    delegated_prefix_status = models.CharField(max_length=32, help_text="Status of the monitored prefix in the RIR's delegated stats. Status other than 'assigned' are usually considered as bogons.")
-    delegated_asn_status = models.CharField(max_length=32, help_text="Status of the origin ASN in the RIR's delegated stats. Status other than 'assigned' are usually considered as bogons.")
+    rpki_status = models.ForeignKey(Prefix_status, on_delete=models.PROTECT, related_name="+", db_index=False, help_text="Route origin validation state for the monitored prefix and origin AS using RPKI.")
+    irr_status = models.ForeignKey(Prefix_status, on_delete=models.PROTECT, related_name="+", db_index=False, help_text="Route origin validation state for the monitored prefix and origin AS using IRR.")
+    delegated_prefix_status = models.ForeignKey(Prefix_status, on_delete=models.PROTECT, related_name="+", db_index=False, help_text="Status of the monitored prefix in the RIR's delegated stats. Status other than 'assigned' are usually considered as bogons.")
+    delegated_asn_status = models.ForeignKey(Prefix_status, on_delete=models.PROTECT, related_name="+", db_index=False, help_text="Status of the origin ASN in the RIR's delegated stats. Status other than 'assigned' are usually considered as bogons.")
     descr = models.CharField(max_length=64, help_text="Prefix description from IRR (maximum 64 characters).")
     moas = models.BooleanField(default=False, help_text="True if the prefix is originated by multiple ASNs.")
 
-    objects = CachingManager()
+    objects = VersionedManager()
 
     class Meta:
-        base_manager_name = 'objects'  # Attribute name of CachingManager(), above
+        base_manager_name = 'objects'  # Attribute name of VersionedManager(), above
+        constraints = [
+            models.UniqueConstraint(fields=['timebin', 'prefix', 'originasn', 'asn', 'af'], name='unique_hegemony_prefix'),
+        ]
+        # Index for more-specific and covering prefix lookups
+        indexes = [
+            GistIndex(fields=['prefix'], opclasses=['inet_ops'], name='ihr_hegemony_prefix_gist'),
+        ]
 
     def __str__(self):
         return "%s %s AS%s %s" % (self.timebin, self.prefix, self.originasn.number, self.hege)
 
 
-class Atlas_location(CachingMixin, models.Model):
-    name = models.CharField(max_length=255, help_text="Location identifier. The meaning of values dependend on the location type: <ul><li>type=AS: ASN</li><li>type=CT: city name, region name, country code</li><li>type=PB: Atlas Probe ID</li><li>type=IP: IP version (4 or 6)</li></ul> ")
+class Atlas_location(models.Model):
+    name = SearchCharField(max_length=255, help_text="Location identifier. The meaning of values dependend on the location type: <ul><li>type=AS: ASN</li><li>type=CT: city name, region name, country code</li><li>type=PB: Atlas Probe ID</li><li>type=IP: IP version (4 or 6)</li></ul> ")
     type = models.CharField(max_length=4, help_text="Type of location. Possible values are: <ul><li>AS: Autonomous System</li><li>CT: City</li><li>PB: Atlas Probe</li><li>IP: Whole IP space</li></ul>")
     af = models.IntegerField(help_text="Address Family (IP version), values are either 4 or 6.")
 
-    objects = CachingManager()
+    objects = VersionedManager()
 
     class Meta:
-        base_manager_name = 'objects'  # Attribute name of CachingManager(), above
+        base_manager_name = 'objects'  # Attribute name of VersionedManager(), above
+        indexes = [
+            GinIndex(fields=['name'], opclasses=['gin_trgm_ops'], name='ihr_atlas_location_name_trgm'),
+        ]
 
     def __str__(self):
         return "(%s) %s %s" % (self.type, self.name, self.af)
 
 
-class Atlas_delay(CachingMixin, models.Model):
+class Atlas_delay(models.Model):
     timebin = models.DateTimeField(db_index=True, help_text="Timestamp of reported value.")
     startpoint = models.ForeignKey(Atlas_location, on_delete=models.CASCADE,
              db_index=True, related_name='location_startpoint', help_text="Starting location for the delay estimation.")
@@ -242,31 +290,34 @@ class Atlas_delay(CachingMixin, models.Model):
     hop = models.IntegerField(default=0, help_text="Median number of AS hops between the start and end locations.")
     nbrealrtts = models.IntegerField(default=0, help_text="Number of RTT samples directly obtained from traceroutes (as opposed to differential RTTs).")
 
-    objects = CachingManager()
+    objects = VersionedManager()
 
     class Meta:
-        base_manager_name = 'objects'  # Attribute name of CachingManager(), above
+        base_manager_name = 'objects'  # Attribute name of VersionedManager(), above
+        constraints = [
+            models.UniqueConstraint(fields=['timebin', 'startpoint', 'endpoint'], name='unique_atlas_delay'),
+        ]
 
     def __str__(self):
         return "%s -> %s: %s" % (
                 self.startpoint.name, self.endpoint.name, self.median)
 
-class Hegemony_alarms(CachingMixin, models.Model):
+class Hegemony_alarms(models.Model):
     timebin = models.DateTimeField(db_index=True, help_text="Timestamp of reported alarm.")
     originasn = models.ForeignKey(ASN, on_delete=models.CASCADE, related_name="anomalous_originasn", db_index=True, help_text="ASN of the reported dependent network.")
     asn = models.ForeignKey(ASN, on_delete=models.CASCADE, related_name="anomalous_asn", db_index=True, help_text="ASN of the anomalous dependency (transit network).")
     deviation = models.FloatField(default=0.0, help_text="Significance of the AS Hegemony change.")
     af = models.IntegerField(help_text="Address Family (IP version), values are either 4 or 6.")
 
-    objects = CachingManager()
+    objects = VersionedManager()
 
     class Meta:
-        base_manager_name = 'objects'  # Attribute name of CachingManager(), above
+        base_manager_name = 'objects'  # Attribute name of VersionedManager(), above
 
     def __str__(self):
         return "(%s, %s, v%s) %s" % (self.originasn, self.asn, self.af, self.deviation)
 
-class Atlas_delay_alarms(CachingMixin, models.Model):
+class Atlas_delay_alarms(models.Model):
     timebin = models.DateTimeField(db_index=True, help_text="Timestamp of reported alarm.")
     startpoint = models.ForeignKey(Atlas_location, on_delete=models.CASCADE,
              db_index=True, related_name='anomalous_startpoint', help_text="Starting location reported as anomalous.")
@@ -274,10 +325,10 @@ class Atlas_delay_alarms(CachingMixin, models.Model):
              db_index=True, related_name='anomalous_endpoint', help_text="Ending location reported as anomalous.")
     deviation = models.FloatField(default=0.0, help_text="Significance of the AS Hegemony change.")
 
-    objects = CachingManager()
+    objects = VersionedManager()
 
     class Meta:
-        base_manager_name = 'objects'  # Attribute name of CachingManager(), above
+        base_manager_name = 'objects'  # Attribute name of VersionedManager(), above
 
     def __str__(self):
         return "(%s, %s) %s" % (self.startpoint, self.endpoint, self.deviation)
@@ -343,15 +394,15 @@ class IHRUser(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
     
-class IHRUser_Channel(CachingMixin,models.Model):
+class IHRUser_Channel(models.Model):
     name = models.CharField(max_length=255)
     channel = models.CharField(max_length=255)
     frequency = models.CharField(max_length=255,default="normal")
     
-    objects = CachingManager()
+    objects = VersionedManager()
     
     class Meta:
-        base_manager_name = 'objects' # Attribute name of CachingManager(), above
+        base_manager_name = 'objects' # Attribute name of VersionedManager(), above
     def __str__(self):
         return "%s (%s)" % (self.name,self.channel)
 
@@ -378,7 +429,7 @@ class MonitoredASN(models.Model):
         default=NOTIFY_LEVEL.HIGH
     )
 
-class Metis_atlas_selection(CachingMixin, models.Model):
+class Metis_atlas_selection(models.Model):
     """
     Metis helps to select a set of diverse Atlas probes in terms of different
     topological metrics (e.g. AS path, RTT).
@@ -390,12 +441,12 @@ class Metis_atlas_selection(CachingMixin, models.Model):
     af = models.IntegerField(help_text="Address Family (IP version), values are either 4 or 6.")
     mean = models.FloatField(default=0.0, help_text="The mean distance value (e.g., AS-path length) we get when using all ASes up to this rank. This decreases with increasing rank, since lower ranks represent closer ASes.")
 
-    objects = CachingManager()
+    objects = VersionedManager()
 
     class Meta:
-        base_manager_name = 'objects'  # Attribute name of CachingManager(), above
+        base_manager_name = 'objects'  # Attribute name of VersionedManager(), above
 
-class Metis_atlas_deployment(CachingMixin, models.Model):
+class Metis_atlas_deployment(models.Model):
     """
     Metis identifies ASes that are far from Atlas probes. Deploying Atlas probes 
     in these ASes would be beneficial for Atlas coverage.
@@ -408,10 +459,10 @@ class Metis_atlas_deployment(CachingMixin, models.Model):
     mean = models.FloatField(default=0.0, help_text="The mean distance value (e.g., AS-path length) we get when using all ASes up to this rank. This decreases with increasing rank, since lower ranks represent closer ASes.")
     nbsamples = models.IntegerField(default=0, help_text="The number of probe ASes for which we have traceroutes to this AS in the time interval. We currently only include candidates that were reached by at least 50% of probe ASes, hence these values are always large.")
 
-    objects = CachingManager()
+    objects = VersionedManager()
 
     class Meta:
-        base_manager_name = 'objects'  # Attribute name of CachingManager(), above
+        base_manager_name = 'objects'  # Attribute name of VersionedManager(), above
 
 
 
@@ -0,0 +1,226 @@
+"""
+Query result cache namespaced by table data versions.
+
+Each table has a data version stored in Redis (ihr:version:<db_table>) that
+is incremented by anything modifying the table: ingestion, retention and
+writes done through the ORM. Cache keys of a query include the SQL, its
+parameters and the versions of all tables read by the query, so bumping a
+version invalidates all cached queries on that table at once and stale
+entries simply expire.
+"""
+import hashlib
+import logging
+import time
+
+import redis
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import InvalidCacheBackendError
+from django.core.exceptions import EmptyResultSet
+from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.db.models.sql.query import Query
+
+from . import metrics
+from .const import POOL
+
+logger = logging.getLogger(__name__)
+conn = redis.Redis(connection_pool=POOL)
+
+VERSION_KEY = 'ihr:version:{}'
+CACHE_ALIAS = getattr(settings, 'IHR_QUERY_CACHE', 'default')
+TIMEOUT = getattr(settings, 'IHR_QUERY_CACHE_TIMEOUT', 3600)
+# Larger results are not cached
+MAX_ROWS = getattr(settings, 'IHR_QUERY_CACHE_MAX_ROWS', 10000)
+
+
+def get_version(table):
+    """Return the current data version of the given table"""
+    return conn.get(VERSION_KEY.format(table))
+
+
+def get_versions(tables):
+    return conn.mget([VERSION_KEY.format(table) for table in tables])
+
+
+def bump_version(table):
+    """Notify all workers that the content of the given table has changed"""
+    return conn.incr(VERSION_KEY.format(table))
+
+
+def bump_model_version(model):
+    """
+    bump_version() for writes done through the ORM, which do not fail when
+    Redis is not reachable: cached queries may then be stale until they
+    expire.
+    """
+    table = model._meta.db_table
+    try:
+        bump_version(table)
+    except redis.RedisError as e:
+        logger.warning('Could not bump the version of %s: %s', table, e)
+
+
+def query_tables(query):
+    """Return the sorted names of tables read by the query and its subqueries"""
+    tables = {query.get_meta().db_table}
+    tables.update(join.table_name for join in query.alias_map.values())
+
+    nodes = [query.where]
+    while nodes:
+        node = nodes.pop()
+        for child in getattr(node, 'children', ()):
+            nodes.append(child)
+            rhs = getattr(child, 'rhs', None)
+            if isinstance(rhs, Query):
+                tables.update(query_tables(rhs))
+
+    return sorted(tables)
+
+
+def get_cache():
+    try:
+        return caches[CACHE_ALIAS]
+    except InvalidCacheBackendError:
+        return None
+
+
+class VersionedQuerySet(models.QuerySet):
+    """
+    QuerySet caching fetched rows and counts. Updates and deletes done with
+    the queryset bump the version of the model table.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._use_cache = True
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._use_cache = self._use_cache
+        return clone
+
+    def no_cache(self):
+        """Bypass the cache, e.g. for reloads triggered by a new version"""
+        clone = self._clone()
+        clone._use_cache = False
+        return clone
+
+    def cache_key(self, kind):
+        """
+        Return the cache key of the query, or None if the query should not be
+        cached.
+        """
+        if not self._use_cache or self.query.select_for_update:
+            return None
+
+        db = self.db
+        try:
+            sql, params = self.query.get_compiler(using=db).as_sql()
+        except EmptyResultSet:
+            return None
+
+        tables = query_tables(self.query)
+        try:
+            versions = get_versions(tables)
+        except redis.RedisError:
+            # Without versions, cached results could be stale
+            logger.warning('Query cache disabled, Redis is not reachable')
+            return None
+
+        # Iterable class distinguishes e.g. values() from values_list()
+        raw = '{}:{}:{}:{}:{}:{}:{}'.format(kind, db, self._iterable_class.__name__,
+                sql, params, tables, versions)
+        return 'ihr:query:' + hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def cached(self, kind):
+        """Return the cached rows or count of the query, None if not cached"""
+        cache = get_cache()
+        key = self.cache_key(kind) if cache is not None else None
+        return cache.get(key) if key is not None else None
+
+    def _fetch_all(self):
+        if self._result_cache is not None:
+            return super()._fetch_all()
+
+        cache = get_cache()
+        key = self.cache_key('rows') if cache is not None else None
+        if key is not None:
+            rows = cache.get(key)
+            if rows is not None:
+                self.count_request('hit')
+                self._result_cache = rows
+                # Related objects are prefetched with their own (cached)
+                # queries
+                if self._prefetch_related_lookups:
+                    self._prefetch_related_objects()
+                return
+
+        start = time.perf_counter()
+        self._result_cache = list(self._iterable_class(self))
+        if key is not None:
+            self.count_request('miss', time.perf_counter() - start)
+            if len(self._result_cache) <= MAX_ROWS:
+                cache.set(key, self._result_cache, TIMEOUT)
+        if self._prefetch_related_lookups and not self._prefetch_done:
+            self._prefetch_related_objects()
+
+    def count(self):
+        if self._result_cache is not None:
+            return len(self._result_cache)
+
+        cache = get_cache()
+        key = self.cache_key('count') if cache is not None else None
+        if key is None:
+            return super().count()
+
+        count = cache.get(key)
+        if count is None:
+            start = time.perf_counter()
+            count = super().count()
+            self.count_request('miss', time.perf_counter() - start)
+            cache.set(key, count, TIMEOUT)
+        else:
+            self.count_request('hit')
+        return count
+
+    def count_request(self, result, elapsed=None):
+        name = metrics.endpoint()
+        metrics.inc('ihr_query_cache_requests_total', endpoint=name, result=result)
+        if elapsed is not None:
+            metrics.inc('ihr_query_cache_fill_seconds_total', elapsed, endpoint=name)
+
+    def bump_version(self):
+        bump_model_version(self.model)
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        self.bump_version()
+        return rows
+    update.alters_data = True
+
+    def delete(self):
+        deleted = super().delete()
+        self.bump_version()
+        return deleted
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def bulk_create(self, *args, **kwargs):
+        objs = super().bulk_create(*args, **kwargs)
+        self.bump_version()
+        return objs
+
+
+def model_changed(sender, **kwargs):
+    bump_model_version(sender)
+
+
+class VersionedManager(models.Manager.from_queryset(VersionedQuerySet)):
+    """Manager of models whose queries are cached by table version"""
+
+    def contribute_to_class(self, model, name):
+        super().contribute_to_class(model, name)
+        if not model._meta.abstract:
+            post_save.connect(model_changed, sender=model, dispatch_uid='ihr_version_save')
+            post_delete.connect(model_changed, sender=model, dispatch_uid='ihr_version_delete')
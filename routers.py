@@ -0,0 +1,157 @@
+"""
+Database router sending read-only API traffic to replicas.
+
+Replicas are aliases of settings.DATABASES listed in IHR_DB_REPLICAS. The
+ReplicaRouterMiddleware selects one database per request: a healthy replica
+(round-robin) for GET/HEAD/OPTIONS requests and the primary ('default') for
+everything else. Queries made outside of a request (e.g. management
+commands) and queries on user models always go to the primary.
+
+Replica health is checked by a background thread of each worker, requests
+only read the result of the last check and never wait for a replica.
+"""
+import itertools
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, DatabaseError
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = 'default'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Models written by the user API, reads should see the latest writes
+PRIMARY_ONLY_MODELS = ('ihruser', 'ihruser_channel', 'emailchangerequest', 'monitoredasn')
+
+# Replication lag in seconds, zero if the replica has replayed all received WAL
+LAG_QUERY = """SELECT CASE
+    WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END"""
+
+_local = threading.local()
+
+
+class ReplicaSet:
+    """Round-robin selection of healthy replicas"""
+
+    def __init__(self, aliases, max_lag, check_interval):
+        missing = [alias for alias in aliases if alias not in settings.DATABASES]
+        if missing:
+            raise ImproperlyConfigured("IHR_DB_REPLICAS contains aliases missing from DATABASES: {}".format(
+                ', '.join(missing)))
+
+        self.aliases = list(aliases)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._cycle = itertools.cycle(self.aliases)
+        # alias -> healthy, replicas are unhealthy until their first check
+        self._status = {}
+        self._lock = threading.Lock()
+        self._checker = None
+
+    def check(self, alias):
+        """Return True if the replica is reachable and not lagging"""
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(LAG_QUERY)
+                lag = cursor.fetchone()[0]
+        except DatabaseError as e:
+            logger.warning("Replica %s is unreachable: %s", alias, e)
+            connections[alias].close()
+            return False
+
+        if lag > self.max_lag:
+            logger.warning("Replica %s is lagging by %.1f seconds", alias, lag)
+            return False
+
+        return True
+
+    def check_all(self):
+        for alias in self.aliases:
+            self._status[alias] = self.check(alias)
+
+    def _run(self):
+        while True:
+            try:
+                self.check_all()
+            except Exception:
+                logger.exception("Replica health check failed")
+            time.sleep(self.check_interval)
+
+    def start(self):
+        """Start the health check thread of this process"""
+        with self._lock:
+            if self._checker is None and self.aliases:
+                # Started by the first request, after the worker is forked
+                self._checker = threading.Thread(target=self._run, name='replica-check', daemon=True)
+                self._checker.start()
+
+    def is_healthy(self, alias):
+        return self._status.get(alias, False)
+
+    def choose(self):
+        """Return the next healthy replica, or the primary if there is none"""
+        if self._checker is None:
+            self.start()
+
+        for _ in range(len(self.aliases)):
+            with self._lock:
+                alias = next(self._cycle)
+            if self.is_healthy(alias):
+                return alias
+
+        return PRIMARY
+
+
+replicas = ReplicaSet(
+        getattr(settings, 'IHR_DB_REPLICAS', []),
+        getattr(settings, 'IHR_DB_REPLICA_MAX_LAG', 60),
+        getattr(settings, 'IHR_DB_REPLICA_CHECK_INTERVAL', 10),
+        )
+
+
+def get_request_db():
+    """Return the database selected for the current request (None outside requests)"""
+    return getattr(_local, 'db', None)
+
+
+class ReplicaRouterMiddleware:
+    """Select the database used by the ReplicaRouter for each request"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method in SAFE_METHODS:
+            _local.db = replicas.choose()
+        else:
+            _local.db = PRIMARY
+
+        try:
+            return self.get_response(request)
+        finally:
+            _local.db = None
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label != 'ihr' or model._meta.model_name in PRIMARY_ONLY_MODELS:
+            return PRIMARY
+
+        return get_request_db() or PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas contain the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are updated by Postgres replication
+        return db == PRIMARY
@@ -0,0 +1,100 @@
+"""
+Precomputed OpenAPI schema.
+
+Generating the schema introspects every view, filter and serializer, so it
+is done once, by the schema command at deploy time or at the first request,
+and stored in IHR_SCHEMA_DIR. The stored JSON and YAML documents are served
+as static blobs with an ETag, clients sending a matching If-None-Match header
+get a 304 response. Workers read the stored documents once, they should be
+restarted after the schema command. With DEBUG the schema is generated once
+per process and not stored.
+"""
+import hashlib
+import os
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_safe
+
+SCHEMA_DIR = getattr(settings, 'IHR_SCHEMA_DIR', os.path.join(settings.BASE_DIR, 'schema'))
+# Public URL of the API, used for the host and basePath of the schema
+SCHEMA_URL = getattr(settings, 'IHR_SCHEMA_URL', None)
+FORMATS = {
+    '.json': 'application/json',
+    '.yaml': 'application/yaml',
+}
+# Seconds clients and proxies can reuse the schema without revalidation
+MAX_AGE = 3600
+
+# format -> (content, etag)
+_blobs = {}
+_lock = threading.Lock()
+
+
+def path(format):
+    return os.path.join(SCHEMA_DIR, 'swagger' + format)
+
+
+def etag(content):
+    return '"{}"'.format(hashlib.sha1(content).hexdigest())
+
+
+def generate():
+    """Return the schema documents, keyed by format"""
+    from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    from .urls import api_info, exposed_api
+
+    generator = OpenAPISchemaGenerator(api_info, url=SCHEMA_URL, patterns=exposed_api)
+    schema = generator.get_schema(request=None, public=True)
+    return {
+        '.json': OpenAPICodecJson(validators=[]).encode(schema),
+        '.yaml': OpenAPICodecYaml(validators=[]).encode(schema),
+    }
+
+
+def store(documents):
+    """Write schema documents, replacing the current ones"""
+    os.makedirs(SCHEMA_DIR, exist_ok=True)
+    for format, content in documents.items():
+        # Write to a temporary file so workers never read a partial file
+        tmp_path = path(format) + '.tmp'
+        with open(tmp_path, 'wb') as fo:
+            fo.write(content)
+        os.replace(tmp_path, path(format))
+
+
+def get_blob(format):
+    """Return the document of the given format and its ETag"""
+    blob = _blobs.get(format)
+    if blob is not None:
+        return blob
+
+    with _lock:
+        if format not in _blobs:
+            try:
+                with open(path(format), 'rb') as fi:
+                    content = fi.read()
+            except FileNotFoundError:
+                documents = generate()
+                if not settings.DEBUG:
+                    store(documents)
+                content = documents[format]
+            _blobs[format] = (content, etag(content))
+        return _blobs[format]
+
+
+@require_safe
+def serve(request, format):
+    content, tag = get_blob(format)
+
+    if tag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content, content_type=FORMATS[format])
+    response['ETag'] = tag
+    patch_cache_control(response, public=True, max_age=MAX_AGE)
+    return response
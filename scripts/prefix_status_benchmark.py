@@ -0,0 +1,76 @@
+"""
+Measure the size of Hegemony_prefix status columns and the latency of status
+filters. Run with django-extensions:
+
+    internetHealthReport/manage.py runscript prefix_status_benchmark --script-args 2022-03-10 Invalid
+
+Arguments are the day used for filter queries (default: last day in the
+table) and the status substring (default: Invalid).
+"""
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.db import connection
+
+from ihr.dimensions import prefix_statuses
+from ihr.models import Hegemony_prefix, Prefix_status
+
+REPEAT = 5
+STATUS_FIELDS = ('rpki_status', 'irr_status', 'delegated_prefix_status', 'delegated_asn_status')
+
+
+def timeit(queryset):
+    """Return the best time (in ms) to count the rows of the queryset"""
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        count = queryset.count()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return count, best
+
+
+def sizes():
+    table = Hegemony_prefix._meta.db_table
+    status = Prefix_status._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_total_relation_size(%s), pg_total_relation_size(%s)", [table, status])
+        table_size, status_size = cursor.fetchone()
+
+        # Bytes per row used by status columns, as codes and as the names
+        # they replace
+        codes = ' + '.join('pg_column_size(h.{}_id)'.format(f) for f in STATUS_FIELDS)
+        names = ' + '.join('pg_column_size({}.name)'.format(f) for f in STATUS_FIELDS)
+        joins = ' '.join('JOIN {0} {1} ON {1}.id = h.{1}_id'.format(status, f) for f in STATUS_FIELDS)
+        cursor.execute("SELECT AVG({}), AVG({}) FROM (SELECT * FROM {} TABLESAMPLE SYSTEM (1)) h {}".format(
+            codes, names, table, joins))
+        code_bytes, name_bytes = cursor.fetchone()
+
+    return table_size, status_size, code_bytes, name_bytes
+
+
+def run(*args):
+    if args:
+        day = datetime.strptime(args[0], '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    else:
+        last = Hegemony_prefix.objects.no_cache().order_by('-timebin').values_list('timebin', flat=True).first()
+        day = last.replace(hour=0, minute=0, second=0, microsecond=0)
+    substring = args[1] if len(args) > 1 else 'Invalid'
+
+    table_size, status_size, code_bytes, name_bytes = sizes()
+    print('Table size: {:.1f} MB (status dimension: {:.1f} kB)'.format(
+        table_size / 1e6, status_size / 1e3))
+    if code_bytes is not None:
+        print('Status columns per row: {:.1f} bytes as codes, {:.1f} bytes as names'.format(
+            code_bytes, name_bytes))
+
+    queryset = Hegemony_prefix.objects.no_cache().filter(
+            timebin__gte=day, timebin__lt=day + timedelta(days=1))
+    codes = prefix_statuses.codes(substring)
+    print('Statuses containing "{}": {}'.format(substring, [prefix_statuses.get(c) for c in codes]))
+
+    for field in STATUS_FIELDS:
+        count, codes_ms = timeit(queryset.filter(**{field + '_id__in': codes}))
+        _, names_ms = timeit(queryset.filter(**{field + '__name__contains': substring}))
+        print('{}: {} rows, code set {:.1f} ms, substring on names {:.1f} ms'.format(
+            field, count, codes_ms, names_ms))
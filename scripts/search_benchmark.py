@@ -0,0 +1,62 @@
+"""
+Compare the latency of network searches using the pg_trgm indexes with the
+previous UPPER(name) LIKE queries, which scan the whole ASN table. Run with
+django-extensions:
+
+    internetHealthReport/manage.py runscript search_benchmark --script-args google 2497 tel
+
+Arguments are the searched values (default: a few names and numbers).
+"""
+import time
+
+from django.db import connection
+
+from ihr.models import ASN
+from ihr.views import NetworkFilter
+
+REPEAT = 5
+SEARCHES = ('google', 'level', 'cloud', 'telecom', 'univ', '2497', '1299', '65')
+# Page size of the UI search box
+LIMIT = 10
+
+# Query done by the search filter before the trigram indexes
+SCAN_QUERY = """SELECT number, name FROM {} WHERE number::text LIKE %s OR UPPER(name::text) LIKE UPPER(%s)
+    ORDER BY number LIMIT {}""".format(ASN._meta.db_table, LIMIT)
+
+
+def best_time(query):
+    """Return the best time (in ms) of the given function"""
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        query()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def uses_index(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN " + sql, params)
+        plan = '\n'.join(row[0] for row in cursor.fetchall())
+    return 'Index Scan' in plan
+
+
+def run(*args):
+    searches = args or SEARCHES
+    print('{} ASNs'.format(ASN.objects.no_cache().count()))
+
+    for value in searches:
+        def scan():
+            with connection.cursor() as cursor:
+                pattern = '%{}%'.format(value)
+                cursor.execute(SCAN_QUERY, [pattern, pattern])
+                return cursor.fetchall()
+
+        queryset = NetworkFilter({'search': value}, queryset=ASN.objects.no_cache()).qs[:LIMIT]
+        scan_ms = best_time(scan)
+        trigram_ms = best_time(lambda: list(queryset.all()))
+        top = ', '.join('AS{} {}'.format(asn.number, asn.name) for asn in list(queryset)[:3])
+        print('{}: scan {:.1f} ms, trigram {:.1f} ms (index: {}), best matches: {}'.format(
+            value, scan_ms, trigram_ms, uses_index(queryset), top))
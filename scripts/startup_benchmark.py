@@ -0,0 +1,79 @@
+"""
+Measure the startup of a worker: the time to load Django with the WSGI
+application and middleware, the time to import the URLconf (i.e. all views,
+filters and serializers), and the memory used (RSS) by the fresh process.
+Each run is done in a new Python process. Run with django-extensions:
+
+    internetHealthReport/manage.py runscript startup_benchmark --script-args 5
+
+The argument is the number of runs (default: 5). The script also lists the
+heavy modules (pandas, arrow, ...) loaded at startup, they should only be
+loaded by the views needing them.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RUNS = 5
+HEAVY_MODULES = ('pandas', 'pyarrow', 'arrow', 'numpy')
+
+# Executed by each worker process
+WORKER = """
+import json, resource, sys, time
+
+def rss():
+    # Current RSS in MB, peak RSS if /proc is not available
+    try:
+        with open('/proc/self/status') as fi:
+            for line in fi:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+start = time.perf_counter()
+base_rss = rss()
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+from django.utils.module_loading import import_module
+
+get_wsgi_application()
+setup = time.perf_counter()
+import_module(settings.ROOT_URLCONF)
+end = time.perf_counter()
+
+print(json.dumps({
+    'setup_ms': (setup - start) * 1000,
+    'urls_ms': (end - setup) * 1000,
+    'rss_mb': rss(),
+    'rss_delta_mb': rss() - base_rss,
+    'modules': len(sys.modules),
+    'heavy': [name for name in %r if name in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def start_worker():
+    """Return the measures of a new worker process"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+    output = subprocess.run([sys.executable, '-c', WORKER], env=env, check=True,
+            stdout=subprocess.PIPE, universal_newlines=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(*args):
+    runs = int(args[0]) if args else RUNS
+    results = [start_worker() for _ in range(runs)]
+
+    print('{} runs, median (min - max)'.format(runs))
+    for name, label in (('setup_ms', 'Django setup (ms)'), ('urls_ms', 'URLconf import (ms)'),
+            ('rss_mb', 'RSS (MB)'), ('rss_delta_mb', 'RSS increase (MB)'), ('modules', 'Loaded modules')):
+        values = [result[name] for result in results]
+        print('{:<22} {:>8.1f} ({:.1f} - {:.1f})'.format(label, statistics.median(values), min(values), max(values)))
+
+    heavy = sorted(set(name for result in results for name in result['heavy']))
+    print('Heavy modules loaded at startup: {}'.format(', '.join(heavy) if heavy else 'none'))
@@ -1,5 +1,72 @@
 from rest_framework import serializers
 from .models import ASN, Country, Delay,  Forwarding, Delay_alarms, Forwarding_alarms, Disco_events, Disco_probes, Hegemony, HegemonyCone, Atlas_location, Atlas_delay, Atlas_delay_alarms, Hegemony_alarms, Hegemony_country, Hegemony_prefix, Metis_atlas_selection, Metis_atlas_deployment
+from .dimensions import asn_names, atlas_locations, prefix_statuses
+
+
+class ASNNameField(serializers.ReadOnlyField):
+    """
+    Name of the ASN given by the source field (e.g. asn_id). Names are read
+    from the in-process ASN dictionary instead of joining the ASN table.
+    """
+    def to_representation(self, value):
+        return asn_names.get(value)
+
+
+class PrefixStatusField(serializers.ReadOnlyField):
+    """Name of the prefix status code given by the source field"""
+    def to_representation(self, value):
+        return prefix_statuses.get(value)
+
+
+class AtlasLocationMixin:
+    """
+    Attribute (type, name, or af) of the Atlas location given by the source
+    field (e.g. startpoint_id). Locations are read from the in-process
+    location table instead of fetching Atlas_location rows.
+    """
+    ATTRIBUTES = ('type', 'name', 'af')
+
+    def __init__(self, attribute, **kwargs):
+        self.index = self.ATTRIBUTES.index(attribute)
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        location = atlas_locations.get(value)
+        if location is None:
+            return None
+        return location[self.index]
+
+class AtlasLocationCharField(AtlasLocationMixin, serializers.CharField):
+    pass
+
+class AtlasLocationIntegerField(AtlasLocationMixin, serializers.IntegerField):
+    pass
+
+
+def expanded_fields(request):
+    """Return the set of field names given in the expand parameter"""
+    if request is None:
+        return set()
+    return set(f.strip() for f in request.query_params.get('expand', '').split(',') if f.strip())
+
+class ExpandableFieldsMixin:
+    """
+    Fields listed in Meta.expandable_fields are serialized only if requested
+    with the expand parameter (comma separated list of field names).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Document all fields in the API schema
+        if getattr(self.context.get('view'), 'swagger_fake_view', False):
+            return
+
+        expand = expanded_fields(self.context.get('request'))
+        for name in self.Meta.expandable_fields:
+            if name not in expand:
+                self.fields.pop(name, None)
+
 
 class UserRegisterSerializer(serializers.Serializer):
     email = serializers.EmailField(required=True)
@@ -47,9 +114,7 @@ class UserForgetPasswordSerializer(serializers.Serializer):
         return data
 
 class DelaySerializer(serializers.ModelSerializer):
-    queryset = Delay.objects.select_related("asn")
-    asn_name = serializers.PrimaryKeyRelatedField(
-            queryset=queryset, source='asn.name', 
+    asn_name = ASNNameField(source='asn_id',
             help_text="Name of the Autonomous System corresponding to the reported IP address.")
     magnitude = serializers.FloatField(help_text="Amplitude of the delay change")
 
@@ -57,11 +122,9 @@ class DelaySerializer(serializers.ModelSerializer):
         model = Delay
         fields = ('asn', 'timebin',  'magnitude', 'asn_name')
 
-class DelayAlarmsSerializer(serializers.ModelSerializer):
-    queryset = Delay_alarms.objects.prefetch_related('msmid', "asn").all()
+class DelayAlarmsSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
     msmid = serializers.StringRelatedField(many=True)
-    asn_name = serializers.PrimaryKeyRelatedField(
-            queryset=queryset, source='asn.name', 
+    asn_name = ASNNameField(source='asn_id',
             help_text="Name of the Autonomous System corresponding to the reported IP address.")
 
     class Meta:
@@ -76,22 +139,19 @@ class DelayAlarmsSerializer(serializers.ModelSerializer):
                 'nbprobes',
                 'msm_prb_ids',
                 'msmid')
+        expandable_fields = ('msm_prb_ids', 'msmid')
 
 class ForwardingSerializer(serializers.ModelSerializer):
-    queryset = Forwarding.objects.select_related("asn")
-    asn_name = serializers.PrimaryKeyRelatedField(
-            queryset=queryset, source='asn.name', 
+    asn_name = ASNNameField(source='asn_id',
             help_text="Name of the Autonomous System corresponding to the reported IP address.")
 
     class Meta:
         model = Forwarding
         fields = ('asn', 'timebin', 'magnitude', 'asn_name')
 
-class ForwardingAlarmsSerializer(serializers.ModelSerializer):
-    queryset = Forwarding_alarms.objects.prefetch_related('msmid', 'asn').all()
+class ForwardingAlarmsSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
     msmid = serializers.StringRelatedField(many=True)
-    asn_name = serializers.PrimaryKeyRelatedField(
-            queryset=queryset, source='asn.name', 
+    asn_name = ASNNameField(source='asn_id',
             help_text="Name of the Autonomous System corresponding to the reported IP address.")
 
     class Meta:
@@ -106,6 +166,7 @@ class ForwardingAlarmsSerializer(serializers.ModelSerializer):
                 'responsibility',
                 'msm_prb_ids',
                 'msmid')
+        expandable_fields = ('msm_prb_ids', 'msmid')
 
 class DiscoProbesSerializer(serializers.ModelSerializer):
     class Meta:
@@ -120,8 +181,10 @@ class DiscoProbesSerializer(serializers.ModelSerializer):
                 'lat',
                 'lon')
 
-class DiscoEventsSerializer(serializers.ModelSerializer):
+class DiscoEventsSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
     discoprobes = DiscoProbesSerializer(many=True, read_only=True)
+    discoprobes_count = serializers.IntegerField(read_only=True,
+            help_text="Number of Atlas probes reported for this event (i.e. length of discoprobes).")
 
     class Meta:
         model = Disco_events
@@ -134,14 +197,16 @@ class DiscoEventsSerializer(serializers.ModelSerializer):
                 'nbdiscoprobes',
                 'totalprobes',
                 'ongoing',
-                'discoprobes')
+                'discoprobes',
+                'discoprobes_count')
+        expandable_fields = ('discoprobes', 'discoprobes_count')
 
 
 class HegemonySerializer(serializers.ModelSerializer):
-    asn_name = serializers.CharField(source='asn.name', 
+    asn_name = ASNNameField(source='asn_id', 
             help_text="Autonomous System name of the dependency.")
-    originasn_name = serializers.CharField(
-            source='originasn.name', help_text="Autonomous System name of the dependent network.")
+    originasn_name = ASNNameField(
+            source='originasn_id', help_text="Autonomous System name of the dependent network.")
 
     class Meta:
         model = Hegemony
@@ -154,10 +219,9 @@ class HegemonySerializer(serializers.ModelSerializer):
                 'originasn_name')
 
 class HegemonyAlarmsSerializer(serializers.ModelSerializer):
-    queryset = Hegemony_alarms.objects.prefetch_related("asn","originasn").all()
-    asn_name = serializers.CharField(source='asn.name', 
+    asn_name = ASNNameField(source='asn_id', 
             help_text="Autonomous System name of the reported dependency.")
-    originasn_name = serializers.CharField(source='originasn.name', 
+    originasn_name = ASNNameField(source='originasn_id', 
             help_text="Autonomous System name of the reported dependent network.")
 
     class Meta:
@@ -177,7 +241,7 @@ class HegemonyConeSerializer(serializers.ModelSerializer):
         fields = ('timebin', 'asn', 'conesize', 'af')
 
 class HegemonyCountrySerializer(serializers.ModelSerializer):
-    asn_name = serializers.CharField(source='asn.name', 
+    asn_name = ASNNameField(source='asn_id', 
             help_text="Autonomous System name of the dependency.")
 
     class Meta:
@@ -193,10 +257,18 @@ class HegemonyCountrySerializer(serializers.ModelSerializer):
                 'transitonly')
 
 class HegemonyPrefixSerializer(serializers.ModelSerializer):
-    originasn_name = serializers.CharField(source='originasn.name', 
+    originasn_name = ASNNameField(source='originasn_id', 
             help_text="Autonomous System name of the ASN originating the prefix.")
-    asn_name = serializers.CharField(source='asn.name', 
+    asn_name = ASNNameField(source='asn_id', 
             help_text="Autonomous System name of the dependency.")
+    rpki_status = PrefixStatusField(source='rpki_status_id',
+            help_text="Route origin validation state for the monitored prefix and origin AS using RPKI.")
+    irr_status = PrefixStatusField(source='irr_status_id',
+            help_text="Route origin validation state for the monitored prefix and origin AS using IRR.")
+    delegated_prefix_status = PrefixStatusField(source='delegated_prefix_status_id',
+            help_text="Status of the monitored prefix in the RIR's delegated stats. Status other than 'assigned' are usually considered as bogons.")
+    delegated_asn_status = PrefixStatusField(source='delegated_asn_status_id',
+            help_text="Status of the origin ASN in the RIR's delegated stats. Status other than 'assigned' are usually considered as bogons.")
 
     class Meta:
         model = Hegemony_prefix
@@ -220,12 +292,12 @@ class HegemonyPrefixSerializer(serializers.ModelSerializer):
 
 
 class NetworkDelaySerializer(serializers.ModelSerializer):
-    startpoint_type = serializers.CharField(source='startpoint.type')
-    startpoint_name = serializers.CharField(source='startpoint.name')
-    startpoint_af = serializers.IntegerField(source='startpoint.af')
-    endpoint_type = serializers.CharField(source='endpoint.type')
-    endpoint_name = serializers.CharField(source='endpoint.name')
-    endpoint_af = serializers.IntegerField(source='endpoint.af')
+    startpoint_type = AtlasLocationCharField('type', source='startpoint_id')
+    startpoint_name = AtlasLocationCharField('name', source='startpoint_id')
+    startpoint_af = AtlasLocationIntegerField('af', source='startpoint_id')
+    endpoint_type = AtlasLocationCharField('type', source='endpoint_id')
+    endpoint_name = AtlasLocationCharField('name', source='endpoint_id')
+    endpoint_af = AtlasLocationIntegerField('af', source='endpoint_id')
 
     class Meta:
         model = Atlas_delay
@@ -268,12 +340,12 @@ class CountrySerializer(serializers.ModelSerializer):
         fields = ('code', 'name')
 
 class NetworkDelayAlarmsSerializer(serializers.ModelSerializer):
-    startpoint_type = serializers.CharField(source='startpoint.type')
-    startpoint_name = serializers.CharField(source='startpoint.name')
-    startpoint_af = serializers.IntegerField(source='startpoint.af')
-    endpoint_type = serializers.CharField(source='endpoint.type')
-    endpoint_name = serializers.CharField(source='endpoint.name')
-    endpoint_af = serializers.IntegerField(source='endpoint.af')
+    startpoint_type = AtlasLocationCharField('type', source='startpoint_id')
+    startpoint_name = AtlasLocationCharField('name', source='startpoint_id')
+    startpoint_af = AtlasLocationIntegerField('af', source='startpoint_id')
+    endpoint_type = AtlasLocationCharField('type', source='endpoint_id')
+    endpoint_name = AtlasLocationCharField('name', source='endpoint_id')
+    endpoint_af = AtlasLocationIntegerField('af', source='endpoint_id')
 
     class Meta:
         model = Atlas_delay_alarms
@@ -287,7 +359,7 @@ class NetworkDelayAlarmsSerializer(serializers.ModelSerializer):
                 'deviation')
 
 class MetisAtlasSelectionSerializer(serializers.ModelSerializer):
-    asn_name = serializers.CharField(source='asn.name', 
+    asn_name = ASNNameField(source='asn_id', 
             help_text="Autonomous System name.")
 
     class Meta:
@@ -300,7 +372,7 @@ class MetisAtlasSelectionSerializer(serializers.ModelSerializer):
                 'asn_name')
 
 class MetisAtlasDeploymentSerializer(serializers.ModelSerializer):
-    asn_name = serializers.CharField(source='asn.name', 
+    asn_name = ASNNameField(source='asn_id', 
             help_text="Autonomous System name.")
 
     class Meta:
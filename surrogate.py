@@ -0,0 +1,232 @@
+"""
+Surrogate keys of API responses and targeted purges of cached responses.
+
+SurrogateKeyMiddleware adds a Surrogate-Key header to API responses, read by
+the CDN, with the table of the endpoint and one key per dimension of the
+data filtered by the request:
+
+    ihr_hegemony ihr_hegemony:af:4 ihr_hegemony:originasn:2497
+    ihr_hegemony:asn:any ihr_hegemony:day:2022-03-10
+
+Dimensions not filtered by the request are tagged with 'any' since the
+response may contain any value. Rows of a given day (or ASN, ...) are thus
+in responses tagged with that value or with 'any', purging these two keys
+invalidates exactly the responses containing them. The middleware also
+indexes in Redis the response cache keys of each surrogate key, so purge()
+deletes the same responses from the local cache and from the CDN.
+"""
+import logging
+from datetime import timedelta
+
+import redis
+import requests
+from django.conf import settings
+from django.core.cache import caches
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_cache_key, get_max_age
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.module_loading import import_string
+
+from .const import POOL
+
+logger = logging.getLogger(__name__)
+conn = redis.Redis(connection_pool=POOL)
+
+HEADER = 'Surrogate-Key'
+INDEX_KEY = 'ihr:surrogate:{}'
+ANY = 'any'
+# Dimensions of the data (model fields filtered by query parameters)
+DIMENSIONS = ('af', 'asn', 'originasn', 'country')
+DAY_PARAMS = ('timebin', 'timebin__gte', 'timebin__gt', 'timebin__lte', 'timebin__lt')
+# Requests spanning more days are tagged with day:any
+MAX_DAYS = 31
+
+
+############ Keys ##########
+def view_model(path):
+    """Return the model of the API view serving the given path"""
+    try:
+        view = getattr(resolve(path).func, 'view_class', None)
+    except Resolver404:
+        return None
+
+    serializer_class = getattr(view, 'serializer_class', None)
+    if serializer_class is not None and hasattr(serializer_class, 'Meta'):
+        return getattr(serializer_class.Meta, 'model', None)
+    queryset = getattr(view, 'queryset', None)
+    return queryset.model if queryset is not None else None
+
+
+def has_field(model, name):
+    return any(field.name == name for field in model._meta.concrete_fields)
+
+
+def parse_day(value):
+    moment = parse_datetime(value)
+    if moment is not None:
+        return moment.date()
+    return parse_date(value)
+
+
+def requested_days(params):
+    """Return the days covered by timebin parameters, None if unbounded"""
+    try:
+        bounds = {name: parse_day(params[name]) for name in DAY_PARAMS if params.get(name)}
+    except ValueError:
+        return None
+
+    if bounds.get('timebin'):
+        return [bounds['timebin']]
+    start = bounds.get('timebin__gte') or bounds.get('timebin__gt')
+    end = bounds.get('timebin__lte') or bounds.get('timebin__lt')
+    if start is None or end is None or end < start or (end - start).days >= MAX_DAYS:
+        return None
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+def dimension_key(table, dimension, value):
+    return '{}:{}:{}'.format(table, dimension, value)
+
+
+def response_keys(model, params):
+    """Return the surrogate keys of a response of the model view"""
+    table = model._meta.db_table
+    keys = [table]
+
+    for dimension in DIMENSIONS:
+        if not has_field(model, dimension):
+            continue
+        values = [v.strip() for v in params.get(dimension, '').split(',') if v.strip()]
+        keys.extend(dimension_key(table, dimension, value) for value in values or [ANY])
+
+    if has_field(model, 'timebin'):
+        days = requested_days(params)
+        values = [day.isoformat() for day in days] if days else [ANY]
+        keys.extend(dimension_key(table, 'day', value) for value in values)
+
+    return keys
+
+
+def purge_keys(model, dimension=None, values=()):
+    """
+    Return the surrogate keys of responses containing the given values of
+    a dimension ('day', 'af', 'asn', ...), or of all responses of the model.
+    """
+    table = model._meta.db_table
+    if dimension is None:
+        return [table]
+    return [dimension_key(table, dimension, value) for value in values] + [dimension_key(table, dimension, ANY)]
+
+
+############ CDN clients ##########
+class NullCDN:
+    """No CDN in front of the API"""
+
+    def purge(self, keys):
+        pass
+
+
+class LocalCDN:
+    """Stand-in recording purged keys, used by tests"""
+    purged = []
+
+    def purge(self, keys):
+        self.purged.extend(keys)
+
+
+class FastlyCDN:
+    """Purge keys with the Fastly API (IHR_CDN_SERVICE and IHR_CDN_TOKEN)"""
+    url = 'https://api.fastly.com/service/{}/purge'
+    # Maximum number of keys per request
+    batch_size = 256
+
+    def purge(self, keys):
+        for i in range(0, len(keys), self.batch_size):
+            response = requests.post(
+                    self.url.format(settings.IHR_CDN_SERVICE),
+                    headers={
+                        'Fastly-Key': settings.IHR_CDN_TOKEN,
+                        HEADER: ' '.join(keys[i:i + self.batch_size]),
+                        },
+                    timeout=10,
+                    )
+            response.raise_for_status()
+
+
+def cdn_client():
+    return import_string(getattr(settings, 'IHR_CDN_CLIENT', 'ihr.surrogate.NullCDN'))()
+
+
+############ Purge ##########
+def index(keys, cache_key, timeout):
+    """Record that the cached response cache_key is tagged with keys"""
+    pipeline = conn.pipeline(transaction=False)
+    for key in keys:
+        pipeline.sadd(INDEX_KEY.format(key), cache_key)
+        pipeline.expire(INDEX_KEY.format(key), timeout)
+    pipeline.execute()
+
+
+def purge(keys):
+    """
+    Delete responses tagged with any of the given surrogate keys from the
+    response cache and the CDN. Return the number of deleted cache entries.
+    """
+    if not keys:
+        return 0
+
+    cache_keys = set()
+    try:
+        pipeline = conn.pipeline(transaction=False)
+        for key in keys:
+            pipeline.smembers(INDEX_KEY.format(key))
+        for members in pipeline.execute():
+            cache_keys.update(members)
+        conn.delete(*[INDEX_KEY.format(key) for key in keys])
+    except redis.RedisError as e:
+        logger.warning('Could not read the surrogate key index: %s', e)
+
+    if cache_keys:
+        caches[settings.CACHE_MIDDLEWARE_ALIAS].delete_many(list(cache_keys))
+
+    try:
+        cdn_client().purge(list(keys))
+    except requests.RequestException as e:
+        logger.error('Could not purge CDN keys: %s', e)
+
+    return len(cache_keys)
+
+
+class SurrogateKeyMiddleware:
+    """
+    Tag API responses with surrogate keys and index the response cache keys.
+    Must be placed before UpdateCacheMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method != 'GET' or response.status_code != 200:
+            return response
+
+        model = view_model(request.path_info)
+        if model is None:
+            return response
+
+        keys = response_keys(model, request.GET)
+        response[HEADER] = ' '.join(keys)
+
+        # Set by FetchFromCacheMiddleware when the response has just been cached
+        if getattr(request, '_cache_update_cache', False):
+            cache = caches[settings.CACHE_MIDDLEWARE_ALIAS]
+            cache_key = get_cache_key(request, settings.CACHE_MIDDLEWARE_KEY_PREFIX, 'GET', cache=cache)
+            if cache_key is not None:
+                timeout = max(get_max_age(response) or 0, settings.CACHE_MIDDLEWARE_SECONDS)
+                try:
+                    index(keys, cache_key, timeout)
+                except redis.RedisError as e:
+                    logger.warning('Could not index surrogate keys: %s', e)
+
+        return response
@@ -1,17 +1,14 @@
 from django.conf.urls import url
 from django.views.generic import TemplateView
 
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
 
-from . import views
+from . import schema, views
 from .user_api import urls as user_urls
 
 #from rest_framework_swagger.views import get_swagger_view
 #schema_view = get_swagger_view(title='API')
-from drf_yasg.generators import OpenAPISchemaGenerator
 
 
 exposed_api = [
@@ -28,6 +25,8 @@ exposed_api = [
 
     url(r'^networks/$', views.NetworkView.as_view(), name='networkListView'),
     url(r'^countries/$', views.CountryView.as_view(), name='countryListView'),
+    url(r'^autocomplete/$', views.AutocompleteView.as_view(), name='autocompleteView'),
+    url(r'^metrics/$', views.MetricsView.as_view(), name='metricsView'),
     url(r'^link/delay/$', views.DelayView.as_view(), name='delayListView'),
     url(r'^link/forwarding/$', views.ForwardingView.as_view(), name='forwardingListView'),
     url(r'^link/delay/alarms/$', views.DelayAlarmsView.as_view(), name='delayAlarmsListView'),
@@ -45,8 +44,8 @@ exposed_api = [
     url(r'^metis/atlas/deployment/$', views.MetisAtlasDeploymentView.as_view(), name='metisAtlasDeploymentListView'),
 ]
 
-schema_view = get_schema_view(
-       openapi.Info(
+# Served by schema.serve, see schema.py
+api_info = openapi.Info(
          title="IHR API",
          default_version='',
          description="""This RESTful API is intended for developers and researchers who want to fetch Internet Health Report data and integrate IHR results to their workflow. API data is also available via our <a href='/ihr/en-us/documentation#Python_Library'>Python library</a>.
@@ -56,15 +55,11 @@ schema_view = get_schema_view(
          contact=openapi.Contact(email="ihr-admin@iij-ii.co.jp"),
          license=openapi.License(name="Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)",
          url="https://creativecommons.org/licenses/by-nc-sa/4.0/"),
-      ),
-      public=True,
-      permission_classes=(permissions.AllowAny,),
-      patterns=exposed_api,
- )
+      )
 
 app_name = 'ihr'
 urlpatterns = [
-    url(r'^swagger(?P<format>\.json|\.yaml)$', schema_view.without_ui(cache_timeout=0), name='schema-json'),
+    url(r'^swagger(?P<format>\.json|\.yaml)$', schema.serve, name='schema-json'),
     # refered in the base.html template
     url(r'^$', views.index, name='index'),
     url(r'^search/$', views.search, name='search'),
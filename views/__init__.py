@@ -0,0 +1,36 @@
+"""
+Views of the IHR API and website, split by subsystem:
+
+    common   base classes, mixins and parameter checks of the API views
+    filters  filters of the API query parameters
+    api      API endpoints listing the IHR data
+    user     user accounts and saved channels
+    pages    pages of the former website and data of their charts
+
+Modules needed only by a few views (e.g. pandas, arrow) are imported when
+these views are first called, so workers start without loading them. See
+scripts/startup_benchmark.py to measure the startup time of workers.
+"""
+from .common import (LAST_DEFAULT, HEGE_GRANULARITY, QUERY_ROW_BUDGET, QUERY_COST_BUDGET,
+        STATEMENT_TIMEOUT, QUERY_CANCELED, QUERY_TOO_LARGE, QUERY_TOO_COSTLY, HelpfulFilterSet,
+        StandardResultsSetPagination, QueryBudgetMixin, QueryTimeout, StatementTimeoutMixin, ExpandMixin, ArchiveMixin,
+        parse_timebin, requested_timebins, check_timebin, check_query_cost,
+        check_or_fields)
+from .filters import (ListFilter, ListIntegerFilter, ListStringFilter, ListNetworkKeyFilter,
+        parse_prefix, ListPrefixFilter, PrefixFilter, PrefixStatusFilter, SameASNAndOrigin,
+        NetworkDelayFilter, NetworkDelayAlarmsFilter, HegemonyFilter, HegemonyAlarmsFilter,
+        HegemonyCountryFilter, HegemonyPrefixFilter, rank_by_similarity,
+        NetworkDelayLocationsFilter, NetworkFilter, CountryFilter, DelayFilter, ForwardingFilter,
+        DelayAlarmsFilter, ForwardingAlarmsFilter, overlapping_events, DiscoEventsFilter,
+        HegemonyConeFilter, DiscoProbesFilter, MetisAtlasSelectionFilter, MetisAtlasDeploymentFilter)
+from .user import (UserLoginView, UserShowView, UserLogoutView, UserChangePasswordView,
+        UserForgetPasswordView, UserRegisterView, UserSendEmailView,
+        UserSendForgetPasswordEmailView, UserSaveChannelView, UserGetChannelView)
+from .api import (NetworkView, CountryView, DelayView, ForwardingView, DelayAlarmsView,
+        ForwardingAlarmsView, DiscoEventsView, DiscoProbesView, HegemonyView, HegemonyAlarmsView,
+        HegemonyConeView, HegemonyCountryView, HegemonyPrefixView, NetworkDelayView,
+        NetworkDelayAlarmsView, AutocompleteView, PrometheusRenderer, MetricsView,
+        NetworkDelayLocationsView, MetisAtlasSelectionView, MetisAtlasDeploymentView)
+from .pages import (DateTimeEncoder, index, search, delayData, forwardingData, eventToStepGraph,
+        discoGeoData, discoData, hegemonyData, coneData, ASNDetail, CountryDetail, ASNList,
+        CountryList, DiscoDetail)
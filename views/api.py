@@ -0,0 +1,500 @@
+"""
+API endpoints listing the IHR data.
+"""
+import json
+from datetime import datetime, date, timedelta, time, timezone
+
+import redis
+from django.db.models import Count
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control, never_cache, patch_cache_control
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import generics, permissions, renderers
+from rest_framework.exceptions import ParseError, APIException
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from ..models import ASN, Country, Delay, Forwarding, Delay_alarms, Forwarding_alarms, Disco_events, Disco_probes, Hegemony, HegemonyCone, Atlas_delay, Atlas_location, Atlas_delay_alarms, Hegemony_alarms, Hegemony_country, Hegemony_prefix, Metis_atlas_selection, Metis_atlas_deployment
+from ..serializers import ASNSerializer, CountrySerializer, DelaySerializer, ForwardingSerializer, DelayAlarmsSerializer, ForwardingAlarmsSerializer, DiscoEventsSerializer, DiscoProbesSerializer, HegemonySerializer, HegemonyAlarmsSerializer, HegemonyConeSerializer, HegemonyCountrySerializer, HegemonyPrefixSerializer, NetworkDelaySerializer, NetworkDelayAlarmsSerializer, NetworkDelayLocationsSerializer, MetisAtlasSelectionSerializer, MetisAtlasDeploymentSerializer
+from ..dimensions import autocomplete
+from .. import metrics
+from .common import LAST_DEFAULT, QueryBudgetMixin, StatementTimeoutMixin, ExpandMixin, ArchiveMixin, parse_timebin, check_timebin, check_or_fields
+from .filters import NetworkFilter, CountryFilter, DelayFilter, ForwardingFilter, DelayAlarmsFilter, ForwardingAlarmsFilter, DiscoEventsFilter, DiscoProbesFilter, HegemonyFilter, HegemonyAlarmsFilter, HegemonyConeFilter, HegemonyCountryFilter, HegemonyPrefixFilter, NetworkDelayFilter, NetworkDelayAlarmsFilter, NetworkDelayLocationsFilter, MetisAtlasSelectionFilter, MetisAtlasDeploymentFilter
+
+cache_1month = [cache_control(max_age=2592000),]
+
+@method_decorator(cache_1month, name='list')
+class NetworkView(generics.ListAPIView):
+    """
+    List networks referenced on IHR (see. /network_delay/locations/ for network delay locations). Can be searched by keyword, ASN, or IXPID.  Range of ASN/IXPID can be obtained with parameters number__lte and number__gte.
+    """
+
+    #schema = AutoSchema(tags=['entity'])
+    queryset = ASN.objects.all()
+    serializer_class = ASNSerializer
+    filter_class = NetworkFilter
+
+
+@method_decorator(cache_1month, name='list')
+class CountryView(generics.ListAPIView):
+    """
+    List countries referenced on IHR. Can be searched by keywordX.
+    """
+
+    queryset = Country.objects.all()
+    serializer_class = CountrySerializer
+    filter_class = CountryFilter
+
+class DelayView(QueryBudgetMixin, StatementTimeoutMixin, generics.ListAPIView): 
+    """
+    List cumulated link delay changes (magnitude) for each monitored network.  Magnitude values close to zero represent usual delays for the network, whereas higher values stand for significant links congestion in the monitored network.
+    The details of each congested link is available in /delay/alarms/.
+    <ul>
+    <li><b>Required parameters:</b> timebin or a range of timebins (using the two parameters timebin__lte and timebin__gte).</li>
+    <li><b>Limitations:</b> Queries expected to return too many rows (e.g. long timebin ranges without other filters) are rejected. For bulk downloads see: <a href="https://ihr-archive.iijlab.net/" target="_blank">https://ihr-archive.iijlab.net/</a>.</li>
+    </ul>
+    """
+
+    serializer_class = DelaySerializer
+    filter_class = DelayFilter
+
+    def get_queryset(self):
+        check_timebin(self.request.query_params)
+        return Delay.objects.all()
+
+class ForwardingView(QueryBudgetMixin, StatementTimeoutMixin, generics.ListAPIView):
+    """
+    List cumulated forwarding anomaly deviation (magnitude) for each monitored network.  Magnitude values close to zero represent usual forwarding paths for the network, whereas higher positive (resp. negative) values stand for an increasing (resp. decreasing) number of paths passing through the monitored network.
+    The details of each forwarding anomaly is available in /forwarding/alarms/.
+    <ul>
+    <li><b>Required parameters:</b> timebin or a range of timebins (using the two parameters timebin__lte and timebin__gte).</li>
+    <li><b>Limitations:</b> Queries expected to return too many rows (e.g. long timebin ranges without other filters) are rejected. For bulk downloads see: <a href="https://ihr-archive.iijlab.net/" target="_blank">https://ihr-archive.iijlab.net/</a>.</li>
+    </ul>
+    """
+    serializer_class = ForwardingSerializer
+    filter_class = ForwardingFilter
+
+    def get_queryset(self):
+        check_timebin(self.request.query_params)
+        return Forwarding.objects.all()
+
+class DelayAlarmsView(QueryBudgetMixin, StatementTimeoutMixin, ExpandMixin, generics.ListAPIView):
+    """
+    List detected link delay changes.
+    <ul>
+    <li><b>Required parameters:</b> timebin or a range of timebins (using the two parameters timebin__lte and timebin__gte).</li>
+    <li><b>Optional parameters:</b> expand, comma separated list of additional fields to include in the results: msm_prb_ids (Atlas measurement and probe IDs), msmid (Atlas measurement IDs).</li>
+    <li><b>Limitations:</b> Queries expected to return too many rows (e.g. long timebin ranges without other filters) are rejected. For bulk downloads see: <a href="https://ihr-archive.iijlab.net/" target="_blank">https://ihr-archive.iijlab.net/</a>.</li>
+    </ul>
+    """
+    serializer_class = DelayAlarmsSerializer
+    filter_class = DelayAlarmsFilter
+    # link/ip substring filters can be expensive
+    statement_timeout = 30000
+
+    def get_queryset(self):
+        check_timebin(self.request.query_params)
+        return Delay_alarms.objects.all()
+
+class ForwardingAlarmsView(QueryBudgetMixin, StatementTimeoutMixin, ExpandMixin, generics.ListAPIView):
+    """
+    List anomalous forwarding patterns.
+    <ul>
+    <li><b>Required parameters:</b> timebin or a range of timebins (using the two parameters timebin__lte and timebin__gte).</li>
+    <li><b>Optional parameters:</b> expand, comma separated list of additional fields to include in the results: msm_prb_ids (Atlas measurement and probe IDs), msmid (Atlas measurement IDs).</li>
+    <li><b>Limitations:</b> Queries expected to return too many rows (e.g. long timebin ranges without other filters) are rejected. For bulk downloads see: <a href="https://ihr-archive.iijlab.net/" target="_blank">https://ihr-archive.iijlab.net/</a>.</li>
+    </ul>
+    """
+    serializer_class = ForwardingAlarmsSerializer
+    filter_class = ForwardingAlarmsFilter
+    # link/ip substring filters can be expensive
+    statement_timeout = 30000
+
+    def get_queryset(self):
+        check_timebin(self.request.query_params)
+        return Forwarding_alarms.objects.all()
+
+class DiscoEventsView(StatementTimeoutMixin, ExpandMixin, generics.ListAPIView):
+    """
+    List network disconnections detected with RIPE Atlas. These events have different level of granularity, it can be at a network level (AS), city, or country level.
+    <ul>
+    <li><b>Optional parameters:</b> expand, comma separated list of additional fields to include in the results: discoprobes (details of the disconnected Atlas probes), discoprobes_count (number of disconnected Atlas probes).</li>
+    </ul>
+    """
+    queryset = Disco_events.objects.all()
+    serializer_class = DiscoEventsSerializer
+    filter_class = DiscoEventsFilter
+    expand_annotations = {'discoprobes_count': Count('discoprobes')}
+
+class DiscoProbesView(StatementTimeoutMixin, generics.ListAPIView):
+    """
+    List details of Atlas probes that triggered network disconnection events.
+    """
+    queryset = Disco_probes.objects.all() 
+    serializer_class = DiscoProbesSerializer
+    filter_class = DiscoProbesFilter
+    #schema = AutoSchema(tags=['disco'])
+
+class HegemonyView(QueryBudgetMixin, StatementTimeoutMixin, ArchiveMixin, generics.ListAPIView):
+    """
+    List AS dependencies for all ASes visible in monitored BGP data. This endpoint also provides the AS dependency to the entire IP space (a.k.a. global graph) which is available by setting the originasn parameter to 0.
+    <ul>
+    <li><b>Required parameters:</b> timebin or a range of timebins (using the two parameters timebin__lte and timebin__gte).</li>
+    <li><b>Limitations:</b> Queries expected to return too many rows (e.g. long timebin ranges without other filters) are rejected. For bulk downloads see: <a href="https://ihr-archive.iijlab.net/" target="_blank">https://ihr-archive.iijlab.net/</a>.</li>
+    </ul>
+    """
+    serializer_class = HegemonySerializer
+    filter_class = HegemonyFilter
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        last = self.request.query_params.get('timebin', 
+                self.request.query_params.get('timebin__gte', None) )
+        if last is not None:
+            # Cache forever content that is more than a week old
+            today = date.today()
+            past_days = today - timedelta(days=7) 
+            if parse_timebin(last).date() < past_days: 
+                patch_cache_control(response, max_age=15552000)
+
+        return response
+
+    def get_queryset(self):
+        queryset = Hegemony.objects
+        if('timebin' not in self.request.query_params 
+                and 'timebin__lte' not in self.request.query_params
+                and 'timebin__gte' not in self.request.query_params):
+            # Set default timebin value
+            today = date.today()
+            past_days = today - timedelta(days=LAST_DEFAULT) 
+            queryset = queryset.filter(timebin__gte = past_days)
+        else:
+            check_timebin(self.request.query_params)
+        check_or_fields(self.request.query_params, ['originasn', 'asn'])
+        return queryset.all()
+
+class HegemonyAlarmsView(QueryBudgetMixin, StatementTimeoutMixin, generics.ListAPIView):
+    """
+    List significant AS dependency changes detected by IHR anomaly detector.
+    <ul>
+    <li><b>Required parameters:</b> timebin or a range of timebins (using the two parameters timebin__lte and timebin__gte).</li>
+    <li><b>Limitations:</b> Queries expected to return too many rows (e.g. long timebin ranges without other filters) are rejected. For bulk downloads see: <a href="https://ihr-archive.iijlab.net/" target="_blank">https://ihr-archive.iijlab.net/</a>.</li>
+    </ul>
+    """
+    serializer_class = HegemonyAlarmsSerializer
+    filter_class = HegemonyAlarmsFilter
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        last = self.request.query_params.get('timebin', 
+                self.request.query_params.get('timebin__gte', None) )
+        if last is not None:
+            # Cache forever content that is more than a week old
+            today = date.today()
+            past_days = today - timedelta(days=7) 
+            if parse_timebin(last).date() < past_days: 
+                patch_cache_control(response, max_age=15552000)
+
+        return response
+
+    def get_queryset(self):
+        check_timebin(self.request.query_params)
+        return Hegemony_alarms.objects.all()
+
+class HegemonyConeView(QueryBudgetMixin, StatementTimeoutMixin, generics.ListAPIView):
+    """
+    The number of networks that depend on a given network. This is similar to CAIDA's customer cone size.
+    <ul>
+    <li><b>Required parameters:</b> timebin or a range of timebins (using the two parameters timebin__lte and timebin__gte).</li>
+    <li><b>Limitations:</b> Queries expected to return too many rows (e.g. long timebin ranges without other filters) are rejected. For bulk downloads see: <a href="https://ihr-archive.iijlab.net/" target="_blank">https://ihr-archive.iijlab.net/</a>.</li>
+    </ul>
+    networks).
+    """
+    serializer_class = HegemonyConeSerializer
+    filter_class = HegemonyConeFilter
+    ordering = 'timebin'
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        last = self.request.query_params.get('timebin', 
+                self.request.query_params.get('timebin__gte', None) )
+        if last is not None:
+            # Cache forever content that is more than a week old
+            today = date.today()
+            past_days = today - timedelta(days=7) 
+            if parse_timebin(last).date() < past_days: 
+                patch_cache_control(response, max_age=15552000)
+
+        return response
+
+    def get_queryset(self):
+        check_timebin(self.request.query_params)
+        return HegemonyCone.objects.all()
+
+class HegemonyCountryView(QueryBudgetMixin, StatementTimeoutMixin, generics.ListAPIView):
+    """
+    List AS dependencies of countries. A country infrastructure is defined by its ASes registed in RIRs delegated files. Emphasis can be put on eyeball users with the eyeball weighting scheme (i.e. weightscheme='eyeball').
+    <ul>
+    <li><b>Required parameters:</b> timebin or a range of timebins (using the two parameters timebin__lte and timebin__gte).</li>
+    <li><b>Limitations:</b> Queries expected to return too many rows (e.g. long timebin ranges without other filters) are rejected. For bulk downloads see: <a href="https://ihr-archive.iijlab.net/" target="_blank">https://ihr-archive.iijlab.net/</a>.</li>
+    </ul>
+    """
+    serializer_class = HegemonyCountrySerializer
+    filter_class = HegemonyCountryFilter
+
+    def get_queryset(self):
+        queryset = Hegemony_country.objects
+        if('timebin' not in self.request.query_params 
+                and 'timebin__lte' not in self.request.query_params
+                and 'timebin__gte' not in self.request.query_params):
+            # Set default timebin value
+            today = date.today()
+            past_days = today - timedelta(days=LAST_DEFAULT) 
+            queryset = queryset.filter(timebin__gte = past_days)
+        else:
+            check_timebin(self.request.query_params)
+        check_or_fields(self.request.query_params, ['country', 'asn'])
+        return queryset.all()
+
+
+class HegemonyPrefixView(QueryBudgetMixin, StatementTimeoutMixin, ArchiveMixin, generics.ListAPIView):
+    """
+    List AS dependencies of prefixes. 
+    <ul>
+    <li><b>Required parameters:</b> timebin or a range of timebins (using the two parameters timebin__lte and timebin__gte). And one of the following: prefix, prefix__contains, prefix__contained_by, originasn, country, rpki_status, irr_status, delegated_prefix_status, delegated_asn_status.</li>
+    <li><b>Limitations:</b> Queries expected to return too many rows (e.g. long timebin ranges without other filters) are rejected. For bulk downloads see: <a href="https://ihr-archive.iijlab.net/" target="_blank">https://ihr-archive.iijlab.net/</a>.</li>
+    </ul>
+    """
+    serializer_class = HegemonyPrefixSerializer
+    filter_class = HegemonyPrefixFilter
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        last = self.request.query_params.get('timebin', 
+                self.request.query_params.get('timebin__gte', None) )
+        if last is not None:
+            # Cache forever content that is more than a week old
+            today = date.today()
+            past_days = today - timedelta(days=7) 
+            if parse_timebin(last).date() < past_days: 
+                patch_cache_control(response, max_age=15552000)
+            else:
+                max_age = 60*60*6
+                patch_cache_control(response, max_age=max_age)
+
+        return response
+
+
+    def get_queryset(self):
+        queryset = Hegemony_prefix.objects
+        if('timebin' not in self.request.query_params 
+                and 'timebin__lte' not in self.request.query_params
+                and 'timebin__gte' not in self.request.query_params):
+            # Set default timebin value
+            today = date.today()
+            past_days = today - timedelta(days=LAST_DEFAULT) 
+            queryset = queryset.filter(timebin__gte = past_days)
+        else:
+            check_timebin(self.request.query_params)
+        check_or_fields(self.request.query_params, ['prefix', 'prefix__contains', 'prefix__contained_by', 'originasn', 'country', 'rpki_status', 'irr_status', 'delegated_prefix_status', 'delegated_asn_status'])
+        return queryset.all()
+
+
+class NetworkDelayView(QueryBudgetMixin, StatementTimeoutMixin, ArchiveMixin, generics.ListAPIView):
+    """
+    List estimated network delays between two potentially remote locations. A location can be, for example, an AS, city, Atlas probe.
+    <ul>
+    <li><b>Required parameters:</b> timebin or a range of timebins (using the two parameters timebin__lte and timebin__gte).</li>
+    <li><b>Limitations:</b> Queries expected to return too many rows (e.g. long timebin ranges without other filters) are rejected. For bulk downloads see: <a href="https://ihr-archive.iijlab.net/" target="_blank">https://ihr-archive.iijlab.net/</a>.</li>
+    </ul>
+    """
+    serializer_class = NetworkDelaySerializer
+    filter_class = NetworkDelayFilter
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        last = self.request.query_params.get('timebin', 
+                self.request.query_params.get('timebin__gte', None) )
+        if last is not None:
+            # Cache forever content that is more than a week old
+            today = date.today()
+            past_days = today - timedelta(days=7) 
+            if parse_timebin(last).date() < past_days: 
+                patch_cache_control(response, max_age=15552000)
+
+        return response
+
+    def get_queryset(self):
+        check_timebin(self.request.query_params)
+        return Atlas_delay.objects.all()
+
+class NetworkDelayAlarmsView(QueryBudgetMixin, StatementTimeoutMixin, generics.ListAPIView):
+    """
+    List significant network delay changes detected by IHR anomaly detector.
+    <ul>
+    <li><b>Required parameters:</b> timebin or a range of timebins (using the two parameters timebin__lte and timebin__gte).</li>
+    <li><b>Limitations:</b> Queries expected to return too many rows (e.g. long timebin ranges without other filters) are rejected. For bulk downloads see: <a href="https://ihr-archive.iijlab.net/" target="_blank">https://ihr-archive.iijlab.net/</a>.</li>
+    </ul>
+    """
+    serializer_class = NetworkDelayAlarmsSerializer
+    filter_class = NetworkDelayAlarmsFilter
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        last = self.request.query_params.get('timebin', 
+                self.request.query_params.get('timebin__gte', None) )
+        if last is not None:
+            # Cache forever content that is more than a week old
+            today = date.today()
+            past_days = today - timedelta(days=7) 
+            if parse_timebin(last).date() < past_days: 
+                patch_cache_control(response, max_age=15552000)
+
+        return response
+
+    def get_queryset(self):
+        check_timebin(self.request.query_params)
+        return Atlas_delay_alarms.objects.all()
+
+class AutocompleteView(APIView):
+    """
+    Suggestions for the search box: networks (ASN or IXP ID and name), countries (code and name), and network delay locations (see /network_delay/locations/) with a word starting with the given text. The id of suggested locations is the location key used by /network_delay/.
+    <ul>
+    <li><b>Required parameters:</b> q, beginning of the searched name, ASN, or country code.</li>
+    <li><b>Optional parameters:</b> limit, maximum number of suggestions (default 10, at most 100).</li>
+    </ul>
+    """
+    MAX_LIMIT = 100
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('q', openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True,
+                description="Beginning of the searched name, ASN (e.g. AS2497 or 2497), or country code."),
+            openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                description="Maximum number of suggestions."),
+        ],
+    )
+    def get(self, request, *args, **kwargs):
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), self.MAX_LIMIT)
+        except ValueError:
+            raise ParseError("Invalid limit, it should be an integer.")
+
+        results = [{'type': type, 'id': id, 'name': name}
+                for type, id, name in autocomplete.search(request.query_params.get('q', ''), limit)]
+        response = Response(results)
+        patch_cache_control(response, max_age=3600)
+        return response
+
+class PrometheusRenderer(renderers.BaseRenderer):
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data.encode(self.charset)
+        # Errors (e.g. authentication)
+        return json.dumps(data).encode(self.charset)
+
+@method_decorator(never_cache, name='get')
+class MetricsView(APIView):
+    """
+    Cache, query and database pool metrics of all workers in the Prometheus text format. Restricted to admin users.
+    """
+    permission_classes = (permissions.IsAdminUser,)
+    renderer_classes = (PrometheusRenderer,)
+    swagger_schema = None
+
+    def get(self, request, *args, **kwargs):
+        try:
+            # Include the latest metrics of this worker
+            metrics.flush()
+            counters, gauges = metrics.aggregated()
+        except redis.RedisError as e:
+            raise APIException('Metrics are not available: {}'.format(e))
+        return Response(metrics.render(counters, gauges), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@method_decorator(cache_1month, name='list')
+class NetworkDelayLocationsView(generics.ListAPIView):
+    """
+    List locations monitored for network delay measurements.  A location can be, for example, an AS, city, Atlas probe.
+    """
+    queryset = Atlas_location.objects.all()
+    serializer_class = NetworkDelayLocationsSerializer
+    filter_class = NetworkDelayLocationsFilter
+
+class MetisAtlasSelectionView(QueryBudgetMixin, StatementTimeoutMixin, generics.ListAPIView):
+    """
+    Metis helps to select a set of diverse Atlas probes in terms of different topological metrics (e.g. AS path, RTT).
+    <ul>
+    <li><b>Limitations:</b> Queries expected to return too many rows (e.g. long timebin ranges without other filters) are rejected. For bulk downloads see: <a href="https://ihr-archive.iijlab.net/" target="_blank">https://ihr-archive.iijlab.net/</a>.</li>
+    </ul>
+    """
+    serializer_class = MetisAtlasSelectionSerializer
+    filter_class = MetisAtlasSelectionFilter
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        last = self.request.query_params.get('timebin', 
+                self.request.query_params.get('timebin__gte', None) )
+        if last is not None:
+            # Cache forever content that is more than a week old
+            today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=timezone.utc)
+            past_days = today - timedelta(days=7) 
+            if parse_timebin(last) < past_days: 
+                patch_cache_control(response, max_age=15552000)
+
+        return response
+
+    def get_queryset(self):
+        queryset = Metis_atlas_selection.objects
+        if('timebin' not in self.request.query_params 
+                and 'timebin__lte' not in self.request.query_params
+                and 'timebin__gte' not in self.request.query_params):
+            # Set default timebin value
+            today = datetime.combine(date.today(), time.min)
+            past_days = today - timedelta(days=6) 
+            queryset = queryset.filter(timebin__gte = past_days)
+        else:
+            check_timebin(self.request.query_params)
+
+        return queryset.all()
+
+class MetisAtlasDeploymentView(QueryBudgetMixin, StatementTimeoutMixin, generics.ListAPIView):
+    """
+    Metis identifies ASes that are far from Atlas probes. Deploying Atlas probes in these ASes would be beneficial for Atlas coverage.
+    <ul>
+    <li><b>Limitations:</b> Queries expected to return too many rows (e.g. long timebin ranges without other filters) are rejected. For bulk downloads see: <a href="https://ihr-archive.iijlab.net/" target="_blank">https://ihr-archive.iijlab.net/</a>.</li>
+    </ul>
+    """
+    serializer_class = MetisAtlasDeploymentSerializer
+    filter_class = MetisAtlasDeploymentFilter
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        last = self.request.query_params.get('timebin', 
+                self.request.query_params.get('timebin__gte', None) )
+        if last is not None:
+            # Cache forever content that is more than a week old
+            today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=timezone.utc)
+            past_days = today - timedelta(days=7) 
+            if parse_timebin(last) < past_days: 
+                patch_cache_control(response, max_age=15552000)
+
+        return response
+
+    def get_queryset(self):
+        queryset = Metis_atlas_deployment.objects
+        if('timebin' not in self.request.query_params 
+                and 'timebin__lte' not in self.request.query_params
+                and 'timebin__gte' not in self.request.query_params):
+            # Set default timebin value
+            today = datetime.combine(date.today(), time.min)
+            past_days = today - timedelta(days=6) 
+            queryset = queryset.filter(timebin__gte = past_days)
+        else:
+            check_timebin(self.request.query_params)
+
+        return queryset.all()
@@ -0,0 +1,298 @@
+"""
+Base classes, mixins and parameter checks shared by the API views.
+"""
+import functools
+import json
+from decimal import Decimal
+
+from django.conf import settings as conf_settings
+from django.core.exceptions import EmptyResultSet
+from django.db import transaction, OperationalError, connections, router
+from django_filters import rest_framework as filters
+from rest_framework.exceptions import ParseError, APIException
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import PageNumberPagination
+
+from ..serializers import expanded_fields
+from ..watchdog import QueryWatchdog
+from .. import archive, metrics
+
+# by default shows only one week of data
+LAST_DEFAULT = 6
+HEGE_GRANULARITY = 15
+# Maximum number of rows and cost, as estimated by the query planner, that
+# can be fetched per request
+QUERY_ROW_BUDGET = getattr(conf_settings, 'IHR_QUERY_ROW_BUDGET', 5000000)
+QUERY_COST_BUDGET = getattr(conf_settings, 'IHR_QUERY_COST_BUDGET', None)
+# Default statement_timeout (in milliseconds) for API queries
+STATEMENT_TIMEOUT = getattr(conf_settings, 'IHR_STATEMENT_TIMEOUT', 60000)
+# Postgres error code for cancelled queries (timeout or cancel request)
+QUERY_CANCELED = '57014'
+QUERY_TOO_LARGE = "The query is too large: about {} rows are expected but at most {} rows can be fetched per request. Please reduce the timebin range or add more filters."
+QUERY_TOO_COSTLY = "The query is too expensive: its estimated cost is {} but at most {} is allowed per request. Please reduce the timebin range or add more filters."
+
+
+########## Get help_text from model ###############
+class HelpfulFilterSet(filters.FilterSet):
+    @classmethod
+    def filter_for_field(cls, f, name, lookup_expr):
+        filter = super(HelpfulFilterSet, cls).filter_for_field(f, name, lookup_expr)
+        filter.extra['help_text'] = f.help_text
+        return filter
+
+########### Custom Pagination ##########
+class StandardResultsSetPagination(PageNumberPagination):
+    page_size_query_param = 'limit'
+
+########### Query admission ##########
+class QueryBudgetMixin:
+    """
+    Reject requests for which the query planner expects more rows than
+    row_budget (or a cost higher than cost_budget).
+    """
+    row_budget = QUERY_ROW_BUDGET
+    cost_budget = QUERY_COST_BUDGET
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        check_query_cost(queryset, self.row_budget, self.cost_budget)
+        return queryset
+
+########### Query timeout ##########
+class QueryTimeout(APIException):
+    status_code = 503
+    default_detail = "The query took too long. Please reduce the timebin range or add more filters."
+    default_code = 'query_timeout'
+
+class StatementTimeoutMixin:
+    """
+    Run the queries of the view with a statement_timeout (in milliseconds)
+    and cancel them if the client disconnects, when the server exposes the
+    client connection (not with mod_wsgi, see watchdog.py).
+    """
+    statement_timeout = STATEMENT_TIMEOUT
+
+    def list(self, request, *args, **kwargs):
+        using = router.db_for_read(self.get_serializer_class().Meta.model)
+        endpoint = self.__class__.__name__
+
+        # SET LOCAL is reset at the end of the transaction
+        with transaction.atomic(using=using):
+            with connections[using].cursor() as cursor:
+                cursor.execute("SET LOCAL statement_timeout = %s", [self.statement_timeout])
+
+            with QueryWatchdog(request, using) as watchdog:
+                try:
+                    return super().list(request, *args, **kwargs)
+                except OperationalError as e:
+                    if getattr(e.__cause__, 'pgcode', None) != QUERY_CANCELED:
+                        raise
+                    if watchdog.cancelled:
+                        metrics.inc('ihr_query_cancelled_total', endpoint=endpoint)
+                    else:
+                        metrics.inc('ihr_query_timeout_total', endpoint=endpoint)
+                    raise QueryTimeout()
+
+########### Expandable fields ##########
+class ExpandMixin:
+    """
+    Fetch the serializer expandable fields only when they are requested with
+    the expand parameter: other columns are deferred and reverse relations
+    are prefetched only if expanded. Fields that are not model fields are
+    computed with the expressions given in expand_annotations.
+    """
+    expand_annotations = {}
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        expand = expanded_fields(self.request)
+        model = queryset.model
+
+        for name in self.get_serializer_class().Meta.expandable_fields:
+            if name in self.expand_annotations:
+                if name in expand:
+                    queryset = queryset.annotate(**{name: self.expand_annotations[name]})
+                continue
+
+            field = model._meta.get_field(name)
+            if field.one_to_many or field.many_to_many:
+                if name in expand:
+                    queryset = queryset.prefetch_related(name)
+            elif name not in expand:
+                queryset = queryset.defer(name)
+
+        return queryset
+
+########### Archived data ##########
+class ArchiveMixin:
+    """
+    Serve rows older than the archive boundary from the Parquet archive (see
+    archive.py). Filters and ordering are applied to archived rows as they
+    are to the database rows, the two are merged when the requested timebin
+    range spans both. Archived rows count against the row_budget of the view
+    and only the rows of the requested page are turned into model instances.
+    """
+
+    def list(self, request, *args, **kwargs):
+        model = self.get_serializer_class().Meta.model
+        start, end = requested_timebins(request.query_params)
+        first_hot = archive.boundary(model)
+        if first_hot is None or start is None or start >= first_hot:
+            return super().list(request, *args, **kwargs)
+
+        # pandas is only needed for archived data
+        import pandas as pd
+
+        queryset = self.get_queryset()
+        lookups, frame_filters = self.archive_filters(queryset)
+        row_budget = getattr(self, 'row_budget', QUERY_ROW_BUDGET)
+        try:
+            frame = archive.read(model, start, end, lookups, frame_filters, max_rows=row_budget)
+        except archive.TooManyRows as e:
+            raise ParseError(QUERY_TOO_LARGE.format(e.nb_rows, row_budget))
+        except ValueError as e:
+            raise ParseError(str(e))
+
+        if end >= first_hot:
+            columns = list(frame.columns)
+            hot = self.filter_queryset(queryset.filter(timebin__gte=first_hot))
+            frame = pd.concat([frame, pd.DataFrame.from_records(list(hot.values_list(*columns)),
+                columns=columns)], ignore_index=True)
+
+        ordering = OrderingFilter().get_ordering(request, queryset, self)
+        if ordering:
+            frame = archive.sort_frame(frame, model, ordering)
+
+        page = self.paginate_queryset(archive.FrameInstances(model, frame))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def archive_filters(self, queryset):
+        """
+        Return the filterset of the view as a list of lookups and a list of
+        DataFrame filters for archive.read
+        """
+        model = queryset.model
+        lookups, frame_filters = [], []
+        for backend in self.filter_backends:
+            if not hasattr(backend, 'get_filterset'):
+                continue
+            filterset = backend().get_filterset(self.request, queryset, self)
+            if filterset is None:
+                continue
+            if not filterset.is_valid():
+                raise ParseError(filterset.errors)
+
+            for name, value in filterset.form.cleaned_data.items():
+                if value is None or value == '':
+                    continue
+                if isinstance(value, Decimal):
+                    value = float(value)
+                filter = filterset.filters[name]
+                if hasattr(filter, 'filter_frame'):
+                    frame_filters.append(functools.partial(filter.filter_frame, model=model, value=value))
+                elif hasattr(filter, 'archive_lookup'):
+                    lookup = filter.archive_lookup(value)
+                    if lookup is not None:
+                        lookups.append(lookup)
+                else:
+                    lookups.append((filter.field_name, filter.lookup_expr, value))
+
+        return lookups, frame_filters
+
+def parse_timebin(value):
+    """ Return the datetime given in a timebin parameter"""
+
+    # Imported on first use, workers start without loading arrow
+    import arrow
+    try:
+        return arrow.get(value).datetime
+    except (ValueError, TypeError):
+        raise ParseError("Could not parse the timebin parameters.")
+
+def requested_timebins(query_params):
+    """ Return the first and last timebins of the query, None if not given"""
+
+    timebin = query_params.get('timebin', None)
+    if timebin is not None:
+        start = end = parse_timebin(timebin)
+        return start, end
+
+    timebin_gte = query_params.get('timebin__gte', None)
+    timebin_lte = query_params.get('timebin__lte', None)
+    if timebin_gte is None or timebin_lte is None:
+        return None, None
+
+    return parse_timebin(timebin_gte), parse_timebin(timebin_lte)
+
+
+############ API ##########
+def check_timebin(query_params):
+    """ Check if the query contain timebin parameters"""
+
+    # check if it contains only the timebin field
+    timebin = query_params.get('timebin', None)
+    if timebin is not None:
+        return True
+
+    timebin_gte = query_params.get('timebin__gte', None)
+    timebin_lte = query_params.get('timebin__lte', None)
+
+    # check if it contains any of the timebin fields
+    if timebin_gte is None and timebin_lte is None:
+        raise ParseError("No timebin parameter. Please provide a timebin value or a range of values with timebin__lte and timebin__gte.")
+
+    # check if the range is complete
+    if timebin_gte is None or timebin_lte is None:
+        raise ParseError("Invalid timebin range. Please provide both timebin__lte and timebin__gte.")
+
+    # check if the range is valid
+    parse_timebin(timebin_gte)
+    parse_timebin(timebin_lte)
+
+    return True
+
+def check_query_cost(queryset, row_budget=QUERY_ROW_BUDGET, cost_budget=QUERY_COST_BUDGET):
+    """ Check if the planner estimates for the query are within the given budget"""
+
+    # Cached queries are not planned again, the row count is then exact
+    cached = getattr(queryset, 'cached', None)
+    if cached is not None:
+        if cached('rows') is not None:
+            return True
+        rows = cached('count')
+        if rows is not None:
+            if rows > row_budget:
+                raise ParseError(QUERY_TOO_LARGE.format(rows, row_budget))
+            return True
+
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return True
+
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        plan = cursor.fetchone()[0]
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    rows = plan[0]['Plan']['Plan Rows']
+    cost = plan[0]['Plan']['Total Cost']
+
+    if rows > row_budget:
+        raise ParseError(QUERY_TOO_LARGE.format(int(rows), row_budget))
+    if cost_budget is not None and cost > cost_budget:
+        raise ParseError(QUERY_TOO_COSTLY.format(int(cost), cost_budget))
+
+    return True
+
+def check_or_fields(query_params, fields):
+    """ Check if the query contain any of the given fields"""
+
+    # check if it contains any of the fields
+    checks = [query_params.get(f, None) is not None for f in fields]
+    if not any(checks):
+        raise ParseError("Required parameter missing. Please provide one of the following parameter: {}".format(fields))
+
+    return True
@@ -0,0 +1,536 @@
+"""
+Filters of the API views query parameters.
+"""
+import ipaddress
+
+import django_filters
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import models as django_models
+from django.db.models import Q, F
+from django.db.models.functions import Cast, Greatest
+from django_filters import rest_framework as filters
+from psycopg2.extras import DateTimeTZRange
+from rest_framework.exceptions import ParseError
+
+from ..models import ASN, Country, Delay, Forwarding, Delay_alarms, Forwarding_alarms, Disco_events, Disco_probes, Hegemony, HegemonyCone, Atlas_delay, Atlas_location, Atlas_delay_alarms, Hegemony_alarms, Hegemony_country, Hegemony_prefix, Metis_atlas_selection, Metis_atlas_deployment, event_period
+from ..dimensions import atlas_locations, prefix_statuses
+from .common import HelpfulFilterSet
+
+# Generic filter for a list of values:
+class ListFilter(django_filters.CharFilter):
+
+    def sanitize(self, value_list):
+        """
+        remove empty items and parse them
+        """
+        return [self.customize(v) for v in value_list if v!=""]
+
+    def customize(self, value):
+        return value
+
+    def filter(self, qs, value):
+        multiple_vals = self.sanitize(value.split(","))
+        if len(multiple_vals) > 0:
+            par = {self.field_name + "__in": multiple_vals}
+            qs = qs.filter(**par)
+        return qs
+
+    def archive_lookup(self, value):
+        multiple_vals = self.sanitize(value.split(","))
+        if len(multiple_vals) > 0:
+            return self.field_name, 'in', multiple_vals
+
+class ListIntegerFilter(ListFilter):
+
+    def customize(self, value):
+        return int(value)
+
+class ListStringFilter(ListFilter):
+
+    def filter(self, qs, value):
+        multiple_vals = self.sanitize(value.split("|"))
+        if len(multiple_vals) > 0:
+            par = {self.field_name + "__in": multiple_vals}
+            qs = qs.filter(**par)
+        return qs
+
+    def archive_lookup(self, value):
+        multiple_vals = self.sanitize(value.split("|"))
+        if len(multiple_vals) > 0:
+            return self.field_name, 'in', multiple_vals
+
+class ListNetworkKeyFilter(ListFilter):
+
+    def filter(self, qs, value):
+        multiple_vals = self.sanitize(value.split("|"))
+
+        if len(multiple_vals) > 0:
+            # Resolve location keys to ids with the in-process location table,
+            # the query is then a simple lookup on startpoint_id/endpoint_id
+            ids = [atlas_locations.get_id(key) for key in multiple_vals]
+            par = {self.field_name + "_id__in": [id for id in ids if id is not None]}
+            qs = qs.filter(**par)
+
+        return qs
+
+    def archive_lookup(self, value):
+        multiple_vals = self.sanitize(value.split("|"))
+        if len(multiple_vals) > 0:
+            ids = [atlas_locations.get_id(key) for key in multiple_vals]
+            return self.field_name, 'in', [id for id in ids if id is not None]
+
+def parse_prefix(value):
+    """ Return the normalized prefix (or IP address) or raise a ParseError"""
+    try:
+        return str(ipaddress.ip_network(value.strip(), strict=False))
+    except ValueError:
+        raise ParseError("Invalid prefix or IP address: {}".format(value))
+
+class ListPrefixFilter(ListFilter):
+
+    def customize(self, value):
+        return parse_prefix(value)
+
+class PrefixFilter(django_filters.CharFilter):
+    """ Lookups on cidr fields (contains or contained_by) using the GiST index"""
+
+    def filter(self, qs, value):
+        if value in ([], (), {}, None, ''):
+            return qs
+        return super().filter(qs, parse_prefix(value))
+
+    def filter_frame(self, frame, model, value):
+        network = ipaddress.ip_network(parse_prefix(value))
+
+        def match(prefix):
+            prefix = ipaddress.ip_network(prefix)
+            if prefix.version != network.version:
+                return False
+            if self.lookup_expr == 'contains':
+                return prefix.supernet_of(network)
+            return prefix.subnet_of(network)
+
+        return frame[frame[self.field_name].map(match).astype(bool)]
+
+class PrefixStatusFilter(django_filters.CharFilter):
+    """ Substring match on status names, translated to the set of matching status codes"""
+
+    def filter(self, qs, value):
+        if value in ([], (), {}, None, ''):
+            return qs
+        par = {self.field_name + "_id__in": prefix_statuses.codes(value)}
+        return qs.filter(**par)
+
+    def archive_lookup(self, value):
+        return self.field_name, 'in', prefix_statuses.codes(value)
+
+
+class SameASNAndOrigin(django_filters.CharFilter):
+
+    def filter(self, qs, value):
+
+        if value in ['true', 'True', '1']:
+            qs = qs.filter(originasn_id=F('asn_id'))
+
+        return qs
+
+    def filter_frame(self, frame, model, value):
+        if value in ['true', 'True', '1']:
+            frame = frame[frame.originasn_id == frame.asn_id]
+        return frame
+    
+
+class NetworkDelayFilter(HelpfulFilterSet):
+    startpoint_name = ListStringFilter(field_name='startpoint__name', help_text="Starting location name. It can be a single value or a list of values separated by the pipe character (i.e. | ). The meaning of values dependend on the location type: <ul><li>type=AS: ASN</li><li>type=CT: city name, region name, country code</li><li>type=PB: Atlas Probe ID</li><li>type=IP: IP version (4 or 6)</li></ul> ")
+    endpoint_name = ListStringFilter(field_name='endpoint__name', help_text="Ending location name. It can be a single value or a list of values separated by the pipe character (i.e. | ). The meaning of values dependend on the location type: <ul><li>type=AS: ASN</li><li>type=CT: city name, region name, country code</li><li>type=PB: Atlas Probe ID</li><li>type=IP: IP version (4 or 6)</li></ul> ")
+    startpoint_type= django_filters.CharFilter(field_name='startpoint__type', help_text="Type of starting location. Possible values are: <ul><li>AS: Autonomous System</li><li>CT: City</li><li>PB: Atlas Probe</li><li>IP: Whole IP space</li></ul>")
+    endpoint_type= django_filters.CharFilter(field_name='endpoint__type', help_text="Type of ending location. Possible values are: <ul><li>AS: Autonomous System</li><li>CT: City</li><li>PB: Atlas Probe</li><li>IP: Whole IP space</li></ul>")
+    startpoint_af= django_filters.NumberFilter(field_name='startpoint__af', help_text="Address Family (IP version), values are either 4 or 6.")
+    endpoint_af= django_filters.NumberFilter(field_name='endpoint__af', help_text="Address Family (IP version), values are either 4 or 6.")
+
+    startpoint_key = ListNetworkKeyFilter(field_name='startpoint', help_text="List of starting location key, separated by the pip character (i.e. | ). A location key is a concatenation of a type, af, and name. For example, CT4New York City, New York, US|AS4174 (yes, the last key corresponds to AS174!).")
+    endpoint_key = ListNetworkKeyFilter(field_name='endpoint', help_text="List of ending location key, separated by the pip character (i.e. | ). A location key is a concatenation of a type, af, and name. For example, CT4New York City, New York, US|AS4174 (yes, the last key corresponds to AS174!).")
+
+    class Meta:
+        model = Atlas_delay
+        fields = {
+            'timebin': ['exact', 'lte', 'gte'],
+            'startpoint_name': ['exact'],
+            'endpoint_name': ['exact'],
+            'startpoint_type': ['exact'],
+            'endpoint_type': ['exact'],
+            'startpoint_af': ['exact'],
+            'endpoint_af': ['exact'],
+            'startpoint_key': ['exact'],
+            'endpoint_key': ['exact'],
+            'median': ['exact', 'lte', 'gte'],
+        }
+        ordering_fields = ('timebin', 'startpoint_name', 'endpoint_name')
+
+    filter_overrides = {
+        django_models.DateTimeField: {
+            'filter_class': filters.IsoDateTimeFilter
+        },
+    }
+
+
+
+class NetworkDelayAlarmsFilter(HelpfulFilterSet):
+    startpoint_name = ListStringFilter(field_name='startpoint__name', help_text="Starting location name. It can be a single value or a list of values separated by the pipe character (i.e. | ). The meaning of values dependend on the location type: <ul><li>type=AS: ASN</li><li>type=CT: city name, region name, country code</li><li>type=PB: Atlas Probe ID</li><li>type=IP: IP version (4 or 6)</li></ul> ")
+    endpoint_name = ListStringFilter(field_name='endpoint__name', help_text="Ending location name. It can be a single value or a list of values separated by the pipe character (i.e. | ). The meaning of values dependend on the location type: <ul><li>type=AS: ASN</li><li>type=CT: city name, region name, country code</li><li>type=PB: Atlas Probe ID</li><li>type=IP: IP version (4 or 6)</li></ul> ")
+    startpoint_type= django_filters.CharFilter(field_name='startpoint__type', help_text="Type of starting location. Possible values are: <ul><li>AS: Autonomous System</li><li>CT: City</li><li>PB: Atlas Probe</li><li>IP: Whole IP space</li></ul>")
+    endpoint_type= django_filters.CharFilter(field_name='endpoint__type', help_text="Type of ending location. Possible values are: <ul><li>AS: Autonomous System</li><li>CT: City</li><li>PB: Atlas Probe</li><li>IP: Whole IP space</li></ul>")
+    startpoint_af= django_filters.NumberFilter(field_name='startpoint__af', help_text="Address Family (IP version), values are either 4 or 6.")
+    endpoint_af= django_filters.NumberFilter(field_name='endpoint__af', help_text="Address Family (IP version), values are either 4 or 6.")
+
+    startpoint_key = ListNetworkKeyFilter(field_name='startpoint', help_text="List of starting location key, separated by the pip character (i.e. | ). A location key is a concatenation of a type, af, and name. For example, CT4New York City, New York, US|AS4174 (yes, the last key corresponds to AS174!).")
+    endpoint_key = ListNetworkKeyFilter(field_name='endpoint', help_text="List of ending location key, separated by the pip character (i.e. | ). A location key is a concatenation of a type, af, and name. For example, CT4New York City, New York, US|AS4174 (yes, the last key corresponds to AS174!).")
+
+    class Meta:
+        model = Atlas_delay_alarms
+        fields = {
+            'timebin': ['exact', 'lte', 'gte'],
+            'startpoint_name': ['exact'],
+            'endpoint_name': ['exact'],
+            'startpoint_type': ['exact'],
+            'endpoint_type': ['exact'],
+            'startpoint_af': ['exact'],
+            'endpoint_af': ['exact'],
+            'startpoint_key': ['exact'],
+            'endpoint_key': ['exact'],
+            'deviation': ['lte', 'gte'],
+        }
+        ordering_fields = ('timebin', 'startpoint_name', 'endpoint_name')
+
+    filter_overrides = {
+        django_models.DateTimeField: {
+            'filter_class': filters.IsoDateTimeFilter
+        },
+    }
+
+class HegemonyFilter(HelpfulFilterSet):
+    asn = ListIntegerFilter(help_text="Dependency. Transit network commonly seen in BGP paths towards originasn. Can be a single value or a list of comma separated values. ")
+    originasn = ListIntegerFilter(help_text="Dependent network, it can be any public ASN. Can be a single value or a list of comma separated values. Retrieve all dependencies of a network by setting a single value and a timebin.")
+
+    class Meta:
+        model = Hegemony
+        fields = {
+            'timebin': ['exact', 'lte', 'gte'],
+            'hege': ['exact', 'lte', 'gte'],
+            'af': ['exact'],
+        }
+        ordering_fields = ('timebin', 'originasn', 'hege', 'af')
+
+    filter_overrides = {
+        django_models.DateTimeField: {
+            'filter_class': filters.IsoDateTimeFilter
+        },
+    }
+
+
+class HegemonyAlarmsFilter(HelpfulFilterSet):
+    asn = ListIntegerFilter(help_text="ASN of the anomalous dependency (transit network). Can be a single value or a list of comma separated values.")
+    originasn = ListIntegerFilter(help_text="ASN of the reported dependent network. Can be a single value or a list of comma separated values.")
+
+    class Meta:
+        model = Hegemony_alarms
+        fields = {
+            'timebin': ['exact', 'lte', 'gte'],
+            'af': ['exact'],
+            'deviation': ['lte', 'gte'],
+        }
+        ordering_fields = ('timebin', 'originasn', 'deviation', 'af')
+
+    filter_overrides = {
+        django_models.DateTimeField: {
+            'filter_class': filters.IsoDateTimeFilter
+        },
+    }
+
+class HegemonyCountryFilter(HelpfulFilterSet):
+    asn = ListIntegerFilter(help_text="Dependency. Network commonly seen in BGP paths towards monitored country. Can be a single value or a list of comma separated values.")
+    country = ListFilter(help_text="Monitored country or region (e.g. EU and AP) as defined by its set of ASes registered in registeries delegated files. Can be a single value or a list of comma separated values. Retrieve all dependencies of a country by setting a single value and a timebin.")
+    weightscheme = django_filters.CharFilter(help_text="Scheme used to aggregate AS Hegemony scores. 'as' gives equal weight to each AS, 'eyeball' put emphasis on large eyeball networks.")
+    transitonly = django_filters.BooleanFilter(help_text="True means that the last AS (origin AS) in BGP paths is ignored, thus focusing only on transit ASes.")
+
+    class Meta:
+        model = Hegemony_country
+        fields = {
+            'timebin': ['exact', 'lte', 'gte'],
+            'hege': ['exact', 'lte', 'gte'],
+            'af': ['exact'],
+        }
+        ordering_fields = ('timebin', 'country', 'hege', 'af')
+
+    filter_overrides = {
+        django_models.DateTimeField: {
+            'filter_class': filters.IsoDateTimeFilter
+        },
+    }
+
+
+class HegemonyPrefixFilter(HelpfulFilterSet):
+    prefix = ListPrefixFilter(help_text="Monitored prefix, it can be any globally reachable prefix. Can be a single value or a list of comma separated values.")
+    prefix__contains = PrefixFilter(field_name='prefix', lookup_expr='contains', help_text="Prefixes covering the given prefix or IP address (e.g. 8.8.8.8 gives all monitored prefixes containing this IP address).")
+    prefix__contained_by = PrefixFilter(field_name='prefix', lookup_expr='contained_by', help_text="The given prefix and all its more-specific prefixes (e.g. 8.0.0.0/8).")
+    originasn = ListIntegerFilter(help_text="Origin network, it can be any public ASN. Can be a single value or a list of comma separated values.")
+    asn = ListIntegerFilter(help_text="Dependency. Network commonly seen in BGP paths towards monitored prefix. Can be a single value or a list of comma separated values.")
+    country = ListFilter(help_text="Country code for prefixes as reported by Maxmind's Geolite2 geolocation database. Can be a single value or a list of comma separated values. Retrieve all dependencies of a country by setting a single value and a timebin.")
+    rpki_status = PrefixStatusFilter(help_text="Route origin validation state for the monitored prefix and origin AS using RPKI.")
+    irr_status = PrefixStatusFilter(help_text="Route origin validation state for the monitored prefix and origin AS using IRR.")
+    delegated_prefix_status = PrefixStatusFilter(help_text="Status of the monitored prefix in the RIR's delegated stats. Status other than 'assigned' are usually considered as bogons.")
+    delegated_asn_status = PrefixStatusFilter(help_text="Status of the origin ASN in the RIR's delegated stats. Status other than 'assigned' are usually considered as bogons.")
+    origin_only = SameASNAndOrigin(help_text="Filter out dependency results and provide only prefix/origin ASN results")
+
+    class Meta:
+        model = Hegemony_prefix
+        fields = {
+            'timebin': ['exact', 'lte', 'gte'],
+            'hege': ['exact', 'lte', 'gte'],
+            'af': ['exact'],
+        }
+        ordering_fields = ('timebin', 'prefix', 'hege', 'af')
+
+    filter_overrides = {
+        django_models.DateTimeField: {
+            'filter_class': filters.IsoDateTimeFilter
+        },
+    }
+
+
+def rank_by_similarity(queryset, value, *expressions):
+    """ Order results by decreasing trigram similarity with the searched value"""
+    similarities = [TrigramSimilarity(expression, value) for expression in expressions]
+    if len(similarities) > 1:
+        similarity = Greatest(*similarities)
+    else:
+        similarity = similarities[0]
+    return queryset.annotate(similarity=similarity).order_by('-similarity', 'pk')
+
+class NetworkDelayLocationsFilter(HelpfulFilterSet):
+    name = django_filters.CharFilter(method='name_search', help_text="Location identifier, can be searched by substring, best matches first. The meaning of these values dependend on the location type: <ul><li>type=AS: ASN</li><li>type=CT: city name, region name, country code</li><li>type=PB: Atlas Probe ID</li><li>type=IP: IP version (4 or 6)</li></ul>")
+    type = django_filters.CharFilter(help_text="Type of location. Possible values are: <ul><li>AS: Autonomous System</li><li>CT: City</li><li>PB: Atlas Probe</li><li>IP: Whole IP space</li></ul>")
+    af = django_filters.NumberFilter(help_text="Address Family (IP version), values are either 4 or 6.")
+
+    def name_search(self, queryset, name, value):
+        # icontains uses the trigram index on name (see SearchCharField)
+        queryset = queryset.filter(name__icontains=value)
+        return rank_by_similarity(queryset, value, 'name')
+
+    class Meta:
+        model = Atlas_location
+        fields = ["type", "name", "af"]
+        ordering_fields = ("name",)
+
+class NetworkFilter(HelpfulFilterSet):
+    name = django_filters.CharFilter(lookup_expr='icontains', help_text='Search for a substring in networks name.')
+    number = ListIntegerFilter(help_text='Search by ASN or IXP ID. It can be either a single value (e.g. 2497) or a list of comma separated values (e.g. 2497,2500,2501)')
+    search = django_filters.CharFilter(method='asn_or_number', help_text='Search for both ASN/IXPID and substring in names, best matches first.')
+
+    def asn_or_number(self, queryset, name, value):
+        if value.startswith("AS") or value.startswith("IX"):
+            try:
+                tmp = int(value[2:])
+                value = value[2:]
+            except ValueError:
+                pass
+
+        # Both conditions use trigram indexes, on name and on number::text
+        queryset = queryset.filter(
+            Q(number__contains=value) | Q(name__icontains=value)
+            )
+        return rank_by_similarity(queryset, value, 'name', Cast('number', django_models.TextField()))
+
+    class Meta:
+        model = ASN
+        fields = {
+                "name": ['exact'],
+                "number": ['exact', 'lte', 'gte'],
+                }
+        ordering_fields = ('number',)
+
+class CountryFilter(HelpfulFilterSet):
+    name = django_filters.CharFilter(lookup_expr='icontains', help_text='Search for a substring in countries name.')
+    code = django_filters.CharFilter(help_text='Search by country code.')
+
+    class Meta:
+        model = Country
+        fields = ["name", "code"]
+        ordering_fields = ("code",)
+
+
+
+class DelayFilter(HelpfulFilterSet):
+    """ 
+    Explain delay filter here
+    """
+    asn = ListIntegerFilter(help_text="ASN or IXP ID of the monitored network (see number in /network/). Can be a single value or a list of comma separated values.")
+    class Meta:
+        model = Delay
+        fields = {
+            'timebin': ['exact', 'lte', 'gte'],
+            'magnitude': ['exact'],
+        }
+        ordering_fields = ('timebin', 'magnitude')
+
+    filter_overrides = {
+        django_models.DateTimeField: {
+            'filter_class': filters.IsoDateTimeFilter
+        },
+    }
+
+class ForwardingFilter(HelpfulFilterSet):
+    asn = ListIntegerFilter(help_text="ASN or IXP ID of the monitored network (see number in /network/). Can be a single value or a list of comma separated values.")
+    class Meta:
+        model = Forwarding
+        fields = {
+            'timebin': ['exact', 'lte', 'gte'],
+            'magnitude': ['exact'],
+        }
+        ordering_fields = ('timebin', 'magnitude')
+
+    filter_overrides = {
+        django_models.DateTimeField: {
+            'filter_class': filters.IsoDateTimeFilter
+        },
+    }
+class DelayAlarmsFilter(HelpfulFilterSet):
+    asn = ListIntegerFilter(help_text="ASN or IXP ID of the monitored network (see number in /network/). Can be a single value or a list of comma separated values.")
+    class Meta:
+        model = Delay_alarms
+        fields = {
+            'timebin': ['exact', 'lte', 'gte'],
+            'deviation': ['exact', 'lte', 'gte'],
+            'diffmedian': ['exact', 'lte', 'gte'],
+            'medianrtt': ['exact', 'lte', 'gte'],
+            'nbprobes': ['exact', 'lte', 'gte'],
+            'link': ['exact', 'contains'],
+        }
+        ordering_fields = ('timebin', 'deviation', 'nbprobes', 'diffmedian', 'medianrtt')
+
+    filter_overrides = {
+        django_models.DateTimeField: {
+            'filter_class': filters.IsoDateTimeFilter
+        },
+    }
+
+class ForwardingAlarmsFilter(HelpfulFilterSet):
+    asn = ListIntegerFilter(help_text="ASN or IXP ID of the monitored network (see number in /network/). Can be a single value or a list of comma separated values.")
+    class Meta:
+        model = Forwarding_alarms
+        fields = {
+            'timebin': ['exact', 'lte', 'gte'],
+            'correlation': ['exact', 'lte', 'gte'],
+            'responsibility': ['exact', 'lte', 'gte'],
+            'ip': ['exact', 'contains'],
+            'previoushop': ['exact', 'contains'],
+        }
+        ordering_fields = ('timebin', 'responsibility', 'correlation', 'ip', 'previoushop')
+
+    filter_overrides = {
+        django_models.DateTimeField: {
+            'filter_class': filters.IsoDateTimeFilter
+        },
+    }
+
+def overlapping_events(queryset, start, end):
+    """ Select disco events overlapping the period between start and end, using the period GiST index"""
+    return queryset.annotate(period=event_period()).filter(
+            period__overlap=DateTimeTZRange(start, end, '[]'))
+
+class DiscoEventsFilter(HelpfulFilterSet):
+
+    def filter_queryset(self, queryset):
+        # endtime__gte and starttime__lte together select events overlapping
+        # a period, this is done with the period index
+        start = self.form.cleaned_data.get('endtime__gte')
+        end = self.form.cleaned_data.get('starttime__lte')
+        if start is None or end is None:
+            return super().filter_queryset(queryset)
+
+        queryset = overlapping_events(queryset, start, end)
+        for name, value in self.form.cleaned_data.items():
+            if name not in ('endtime__gte', 'starttime__lte'):
+                queryset = self.filters[name].filter(queryset, value)
+        return queryset
+
+    class Meta:
+        model = Disco_events
+        fields = {
+            'streamname': ['exact'],
+            'streamtype': ['exact'],
+            'starttime': ['exact', 'lte', 'gte'],
+            'endtime': ['exact', 'lte', 'gte'],
+            'avglevel': ['exact', 'lte', 'gte'],
+            'nbdiscoprobes': ['exact', 'lte', 'gte'],
+            'totalprobes': ['exact', 'lte', 'gte'],
+            'ongoing': ['exact'],
+        }
+        ordering_fields = ('starttime', 'endtime', 'avglevel', 'nbdiscoprobes')
+
+    filter_overrides = {
+        django_models.DateTimeField: {
+            'filter_class': filters.IsoDateTimeFilter
+        },
+    }
+
+
+class HegemonyConeFilter(HelpfulFilterSet):
+    asn = ListIntegerFilter(help_text="Autonomous System Number (ASN). Can be a single value or a list of comma separated values.")
+    class Meta:
+        model = HegemonyCone
+        fields = {
+            'timebin': ['exact', 'lte', 'gte'],
+            'af': ['exact'],
+        }
+        ordering_fields = ('timebin', 'asn', 'af')
+
+    filter_overrides = {
+        django_models.DateTimeField: {
+            'filter_class': filters.IsoDateTimeFilter
+        },
+    }
+
+class DiscoProbesFilter(HelpfulFilterSet):
+    probe_id = ListIntegerFilter(help_text="List of probe ids separated by commas.")
+    event = ListIntegerFilter(help_text="List of event ids separated by commas.")
+    class Meta:
+        model = Disco_probes
+        fields = {}
+        ordering_fields = ('starttime', 'endtime', 'level')
+
+class MetisAtlasSelectionFilter(HelpfulFilterSet):
+
+    class Meta:
+        model = Metis_atlas_selection 
+        fields = {
+            'timebin': ['exact', 'lte', 'gte'],
+            'rank': ['exact', 'lte', 'gte'],
+            'metric': ['exact'],
+            'af': ['exact'],
+        }
+        ordering_fields = ('timebin', 'metric', 'rank', 'af')
+
+    filter_overrides = {
+        django_models.DateTimeField: {
+            'filter_class': filters.IsoDateTimeFilter
+        },
+    }
+
+class MetisAtlasDeploymentFilter(HelpfulFilterSet):
+
+    class Meta:
+        model = Metis_atlas_deployment 
+        fields = {
+            'timebin': ['exact', 'lte', 'gte'],
+            'rank': ['exact', 'lte', 'gte'],
+            'metric': ['exact'],
+            'af': ['exact'],
+        }
+        ordering_fields = ('timebin', 'metric', 'rank', 'af')
+
+    filter_overrides = {
+        django_models.DateTimeField: {
+            'filter_class': filters.IsoDateTimeFilter
+        },
+    }
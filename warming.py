@@ -0,0 +1,180 @@
+"""
+Warming of the response cache after new data is loaded.
+
+QueryHitsMiddleware counts successful GET requests of API views per URL in
+daily Redis sorted sets, which keep the IHR_CACHE_HITS_MAX_URLS most
+requested URLs. URLs are counted as requested, without reordering parameters,
+because response cache keys are built from the full URL. URLs are relative
+to the mount path of the API (IHR_CACHE_WARM_SCRIPT_PREFIX, e.g. /ihr/api/),
+which is added back when they are replayed. The warmcache
+command replays the most requested URLs, the URLs listed in
+IHR_CACHE_WARM_URLS, and optionally the most frequent URLs of access logs,
+so the first visitors after an ingestion get cached responses.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import redis
+from django.conf import settings
+from django.core.cache import caches
+from django.test import Client, RequestFactory
+from django.urls import Resolver404, get_script_prefix, resolve, reverse
+from django.utils.cache import get_cache_key
+from rest_framework.views import APIView
+
+from .const import POOL
+
+logger = logging.getLogger(__name__)
+conn = redis.Redis(connection_pool=POOL)
+
+HITS_KEY = 'ihr:hits:{}'
+# Number of days of hit counts kept in Redis
+HITS_RETENTION_DAYS = 8
+# Number of URLs kept in each daily sorted set, the least requested ones are
+# dropped
+HITS_MAX_URLS = getattr(settings, 'IHR_CACHE_HITS_MAX_URLS', 10000)
+# Requests made by the warmcache command are not counted
+WARMING_HEADER = 'HTTP_X_IHR_CACHE_WARMING'
+
+WARM_URLS = getattr(settings, 'IHR_CACHE_WARM_URLS', [])
+WARM_HOST = getattr(settings, 'IHR_CACHE_WARM_HOST', 'localhost')
+WARM_SECURE = getattr(settings, 'IHR_CACHE_WARM_SECURE', True)
+# Headers listed in Vary (e.g. Accept) are part of response cache keys, use
+# the values sent by the website
+WARM_HEADERS = getattr(settings, 'IHR_CACHE_WARM_HEADERS', {})
+# Path where the API is mounted by the web server (as the schema command
+# --script-prefix)
+WARM_SCRIPT_PREFIX = getattr(settings, 'IHR_CACHE_WARM_SCRIPT_PREFIX', '/')
+
+# Request line and status of common and combined log formats
+LOG_LINE = re.compile(r'"GET (?P<url>\S+) HTTP/[\d.]+" (?P<status>\d{3}) ')
+
+
+def hits_key(day):
+    return HITS_KEY.format(day.isoformat())
+
+
+def record_hit(url):
+    key = hits_key(datetime.now(timezone.utc).date())
+    pipeline = conn.pipeline(transaction=False)
+    pipeline.zincrby(key, 1, url)
+    pipeline.zremrangebyrank(key, 0, -HITS_MAX_URLS - 1)
+    pipeline.expire(key, HITS_RETENTION_DAYS * 86400)
+    pipeline.execute()
+
+
+def top_urls(limit, days=1):
+    """Return the most requested URLs of the last days"""
+    today = datetime.now(timezone.utc).date()
+    counts = Counter()
+    for i in range(days):
+        for url, hits in conn.zrevrange(hits_key(today - timedelta(days=i)), 0, limit - 1, withscores=True):
+            counts[url] += hits
+    return [url for url, _ in counts.most_common(limit)]
+
+
+def relative_url(url, script_prefix):
+    """Return the URL without the script prefix, None if it is not under it"""
+    if not url.startswith(script_prefix):
+        return None
+    return '/' + url[len(script_prefix):]
+
+
+def log_urls(paths, limit):
+    """
+    Return the most requested URLs of the API in access log files, relative
+    to its mount path
+    """
+    counts = Counter()
+    for path in paths:
+        with open(path, errors='replace') as fi:
+            for line in fi:
+                match = LOG_LINE.search(line)
+                if match is None or match.group('status') != '200':
+                    continue
+                url = relative_url(match.group('url'), WARM_SCRIPT_PREFIX)
+                if url is not None:
+                    counts[url] += 1
+    return [url for url, _ in counts.most_common(limit)]
+
+
+def configured_urls():
+    """
+    Return the URLs of IHR_CACHE_WARM_URLS. Entries are paths or URL names
+    followed by an optional query string (e.g. 'ihr:countryListView?code=JP').
+    """
+    urls = []
+    for entry in WARM_URLS:
+        if entry.startswith('/'):
+            urls.append(entry)
+        else:
+            name, _, query = entry.partition('?')
+            url = relative_url(reverse(name), get_script_prefix())
+            urls.append(url + ('?' + query if query else ''))
+    return urls
+
+
+def warm(urls):
+    """
+    Request the given URLs through the whole middleware stack, hence store
+    fresh responses in the response cache. Yield each URL with its status
+    code and the request time in seconds.
+    """
+    cache = caches[settings.CACHE_MIDDLEWARE_ALIAS]
+    key_prefix = settings.CACHE_MIDDLEWARE_KEY_PREFIX
+    # Requests are made as if received under the API mount path, so cache
+    # keys and links in responses are the ones of production requests
+    headers = dict(WARM_HEADERS, HTTP_HOST=WARM_HOST, SCRIPT_NAME=WARM_SCRIPT_PREFIX.rstrip('/'))
+    headers[WARMING_HEADER] = '1'
+    factory = RequestFactory()
+    client = Client()
+
+    for url in urls:
+        # Responses cached before the new data are dropped, otherwise the
+        # cache middleware would return them
+        key = get_cache_key(factory.get(url, secure=WARM_SECURE, **headers), key_prefix, 'GET', cache=cache)
+        if key is not None:
+            cache.delete(key)
+
+        start = time.perf_counter()
+        try:
+            status = client.get(url, secure=WARM_SECURE, **headers).status_code
+        except Exception:
+            logger.exception('Could not warm %s', url)
+            status = None
+        yield url, status, time.perf_counter() - start
+
+
+def is_api_request(request):
+    """True if the request is handled by a REST framework view"""
+    try:
+        view = resolve(request.path_info).func
+    except Resolver404:
+        return False
+    view_class = getattr(view, 'view_class', None)
+    return view_class is not None and issubclass(view_class, APIView)
+
+
+class QueryHitsMiddleware:
+    """Count successful GET requests of API views for the warmcache command"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        # Authenticated requests are not cached
+        if (request.method == 'GET' and response.status_code == 200
+                and WARMING_HEADER not in request.META
+                and 'HTTP_AUTHORIZATION' not in request.META
+                and is_api_request(request)):
+            try:
+                record_hit(request.get_full_path_info())
+            except redis.RedisError as e:
+                logger.warning('Could not record hit: %s', e)
+
+        return response
@@ -0,0 +1,90 @@
+"""
+Cancel database queries of requests whose client has disconnected.
+
+The client socket is found in the WSGI environment when the server exposes
+it (Django development server, gunicorn, or any server setting
+'ihr.client_socket'). mod_wsgi, used in production, does not give access to
+the client connection: queries of gone clients are not cancelled there and
+only the statement timeout set by the views (IHR_STATEMENT_TIMEOUT) bounds
+them.
+"""
+import logging
+import select
+import socket
+import threading
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two checks of the client connection
+CHECK_INTERVAL = 1
+
+
+def client_socket(request):
+    """Return the socket of the client connection, or None if not available"""
+    environ = request.META
+    if 'ihr.client_socket' in environ:
+        return environ['ihr.client_socket']
+
+    stream = environ.get('wsgi.input')
+    # wsgiref (Django development server): BufferedReader -> SocketIO -> socket
+    sock = getattr(getattr(stream, 'raw', None), '_sock', None)
+    if sock is None:
+        # gunicorn: Body -> reader -> unreader -> socket
+        reader = getattr(stream, 'reader', None)
+        sock = getattr(getattr(reader, 'unreader', None), 'sock', None)
+
+    return sock if isinstance(sock, socket.socket) else None
+
+
+def client_disconnected(sock):
+    """Return True if the peer has closed the connection"""
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+        if not readable:
+            return False
+        return sock.recv(1, socket.MSG_PEEK) == b''
+    except (OSError, ValueError):
+        return True
+
+
+class QueryWatchdog:
+    """
+    Context manager monitoring the client connection while the request
+    queries are running on the given database. The running query is
+    cancelled (same as pg_cancel_backend for the connection backend) as soon
+    as the client disconnects.
+    """
+
+    def __init__(self, request, using, interval=CHECK_INTERVAL):
+        self.sock = client_socket(request)
+        self.using = using
+        self.interval = interval
+        self.cancelled = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        if self.sock is not None:
+            connection = connections[self.using]
+            connection.ensure_connection()
+            self._connection = connection.connection
+            self._thread = threading.Thread(target=self.run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return False
+
+    def run(self):
+        while not self._stop.wait(self.interval):
+            if client_disconnected(self.sock):
+                logger.info("Client disconnected, cancelling query on backend %s",
+                        self._connection.get_backend_pid())
+                self.cancelled = True
+                self._connection.cancel()
+                return